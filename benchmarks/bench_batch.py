@@ -0,0 +1,77 @@
+"""
+离线批处理的吞吐量：用同一组处理器和推送，比较实时分发路径（`Bot.run`，以 `ReplayApi` 代替网络连接）、
+`BatchRunner` 在当前进程中处理以及使用进程池处理时每秒处理的推送数。
+
+运行方式：``PYTHONPATH=src python benchmarks/bench_batch.py [--count 50000] [--workers 4]``
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from lightq import Bot, message_handler
+from lightq.batch import BatchRunner
+from lightq.entities import GroupMessage, FriendMessage, MessageChain
+from lightq.journal import Journal, ReplayApi
+from lightq.logging import logger
+
+from frames import GROUP_MESSAGE_FRAME, NUDGE_EVENT_FRAME, FORWARD_MESSAGE_FRAME
+
+
+@message_handler(GroupMessage)
+def group_handler(chain: MessageChain) -> str:
+    return f'received {len(chain)} elements'
+
+
+@message_handler(FriendMessage)
+def friend_handler(chain: MessageChain) -> None:
+    pass
+
+
+def setup(bot: Bot):
+    bot.add_all([group_handler, friend_handler])
+
+
+def make_pushes(count: int) -> list[str]:
+    frames = [GROUP_MESSAGE_FRAME] * 8 + [NUDGE_EVENT_FRAME, FORWARD_MESSAGE_FRAME]
+    return [frames[i % len(frames)] for i in range(count)]
+
+
+async def run_live(path: str) -> None:
+    bot = Bot.from_api(ReplayApi(path, speed=None))
+    setup(bot)
+    await bot.run()
+    while bot.background_task_count > 0:
+        await asyncio.sleep(0)
+
+
+def measure(name: str, count: int, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f'{name:<24}{elapsed:>8.3f}s{count / elapsed:>12.0f} pushes/s')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+    pushes = make_pushes(args.count)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'pushes.journal')
+        with Journal(path, max_bytes=None) as journal:
+            for push in pushes:
+                journal.write(push, timestamp=0.0)
+        measure('live (Bot.run)', args.count, lambda: asyncio.run(run_live(path)))
+    measure('batch', args.count, lambda: BatchRunner(setup).run(pushes))
+    measure(f'batch (workers={args.workers})', args.count,
+            lambda: BatchRunner(setup, workers=args.workers).run(pushes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+WebSocket 帧分类的基准测试：比较读取循环中完整解析每一帧与只读出 syncId（`peek_sync_id`）的开销，
+以及不关心返回值的命令只读出状态码（`peek_code`）与完整解析响应的开销。
+
+运行方式：``PYTHONPATH=src python benchmarks/bench_frame.py``
+"""
+
+import json
+import timeit
+
+from lightq.api._frame import peek_sync_id, peek_code
+
+from frames import (
+    GROUP_MESSAGE_FRAME,
+    NUDGE_EVENT_FRAME,
+    FORWARD_MESSAGE_FRAME,
+    SEND_MESSAGE_RESPONSE_FRAME,
+    RECALL_RESPONSE_FRAME,
+    MEMBER_LIST_RESPONSE_FRAME
+)
+
+NUMBER = 20000
+
+
+def measure(func) -> float:
+    """返回单次调用的耗时（微秒），取 5 轮中的最小值"""
+    return min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main():
+    frames = {
+        'GroupMessage push': GROUP_MESSAGE_FRAME,
+        'NudgeEvent push': NUDGE_EVENT_FRAME,
+        'Forward push': FORWARD_MESSAGE_FRAME,
+        'sendGroupMessage response': SEND_MESSAGE_RESPONSE_FRAME,
+        'memberList response': MEMBER_LIST_RESPONSE_FRAME
+    }
+    print('classify frame (read syncId)')
+    print(f'{"frame":<28}{"json.loads":>12}{"peek":>12}{"speedup":>10}')
+    for name, frame in frames.items():
+        full = measure(lambda: json.loads(frame)['syncId'])
+        peek = measure(lambda: peek_sync_id(frame))
+        print(f'{name:<28}{full:>10.2f}us{peek:>10.2f}us{full / peek:>9.1f}x')
+    print()
+    print('read status code of a discarded result')
+    full = measure(lambda: json.loads(RECALL_RESPONSE_FRAME)['data']['code'])
+    peek = measure(lambda: peek_code(RECALL_RESPONSE_FRAME))
+    print(f'{"recall response":<28}{full:>10.2f}us{peek:>10.2f}us{full / peek:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
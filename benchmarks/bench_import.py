@@ -0,0 +1,56 @@
+"""
+导入耗时的基准测试：在子进程中以 ``python -X importtime`` 执行各导入语句，统计顶层模块的累计导入耗时，取多次运行的中位数，
+并减去解释器启动时导入的模块（执行 ``pass``）的耗时。
+
+运行方式：``PYTHONPATH=src python benchmarks/bench_import.py``
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+REPEAT = 15
+STATEMENTS = [
+    'import lightq',
+    'import lightq.metrics',
+    'from lightq.api._frame import peek_shard_key',
+    'import lightq.entities',
+    'from lightq import Bot',
+    'from lightq import Bot; Bot(0, "", "http://localhost:8080")',
+    'from lightq import Bot; Bot(0, "")',
+]
+
+
+def import_time(statement: str) -> float:
+    """单次执行 `statement` 时顶层模块的累计导入耗时（毫秒）"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True,
+        text=True,
+        env=os.environ,
+        check=True
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.removeprefix('import time:').split('|')
+        if not name.startswith('  '):  # 缩进表示被其他模块导入
+            total += int(cumulative)
+    return total / 1000
+
+
+def median_import_time(statement: str) -> float:
+    return statistics.median(import_time(statement) for _ in range(REPEAT))
+
+
+def main():
+    startup = median_import_time('pass')
+    print(f'{"statement":<64}{"median":>10}')
+    for statement in STATEMENTS:
+        print(f'{statement:<64}{median_import_time(statement) - startup:>8.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+"""
+消息分发流程的基准测试，覆盖从收到推送到发出回复的各个热点路径：
+
+- 推送的解码（`GroupMessage`、`NudgeEvent`、含 `Forward` 的消息）与 `MessageChain.to_json`
+- 读取循环中的帧分类（`peek_sync_id`）
+- `TypeRouterMixin` 在 1/10/100 个处理器下的路由
+- 正则装饰器的匹配，`KeywordFilter` 对 5000 个关键词的匹配
+- 过滤器按声明的顺序评估与按开销重排（`Bot.reorder_filters`）的对比
+- `HandlerMixin.handle` 的参数解析与注入
+- 通过 `Bot` 与本地替身服务器（`lightq.testing.FakeMiraiServer`）的端到端延迟（收到推送到收到回复）
+
+结果与 `benchmarks/baseline.json` 中保存的基线比较，任一项比基线慢超过容差时以非零状态码退出，
+可用于在修改热点路径后检查性能退化。基线与机器相关，更换机器后请先重新保存基线。
+
+运行方式：
+::
+    PYTHONPATH=src python benchmarks/bench_pipeline.py              # 与基线比较
+    PYTHONPATH=src python benchmarks/bench_pipeline.py --save       # 保存为新的基线
+    PYTHONPATH=src python benchmarks/bench_pipeline.py -k route     # 只运行名称包含 route 的项
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import timeit
+from typing import Any, Awaitable, Callable
+
+from lightq import Bot, RecvContext, filters, message_handler, resolvers
+from lightq.api._base import push_from_json
+from lightq.api._frame import peek_sync_id
+from lightq.decorators import regex_match, resolve
+from lightq.entities import GroupMessage, MessageChain, Member, Group, Plain
+from lightq.filters import KeywordFilter
+from lightq.framework._router import MessageTypeRouter
+from lightq.logging import logger
+from lightq.testing import FakeMiraiServer, make_group_message
+
+from frames import GROUP_MESSAGE, NUDGE_EVENT, FORWARD_MESSAGE, GROUP_MESSAGE_FRAME
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+REPEAT = 5
+
+SyncBenchmark = Callable[[], Any]
+AsyncBenchmark = Callable[[], Awaitable[Any]]
+
+BENCHMARKS: dict[str, Callable[[], SyncBenchmark | AsyncBenchmark]] = {}
+"""名称 => 创建被测函数的工厂。被测函数为同步函数或返回协程的函数"""
+
+ASYNC_BENCHMARKS: set[str] = set()
+END_TO_END_BENCHMARKS: dict[str, Callable[[int], Awaitable[list[float]]]] = {}
+
+
+def benchmark(name: str, is_async: bool = False):
+    def decorator(factory):
+        BENCHMARKS[name] = factory
+        if is_async:
+            ASYNC_BENCHMARKS.add(name)
+        return factory
+
+    return decorator
+
+
+# region 计时
+def measure(func: SyncBenchmark) -> float:
+    """返回单次调用的耗时（微秒），取若干轮中的最小值"""
+    number, _ = timeit.Timer(func).autorange()
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number * 1e6
+
+
+async def measure_async(func: AsyncBenchmark) -> float:
+    """同 `measure`，但被测函数返回协程，在同一个事件循环中依次 await"""
+    number = 1
+    while True:  # 与 timeit.Timer.autorange 一样，增大调用次数直到一轮至少耗时 0.2 秒
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        if time.perf_counter() - start >= 0.2:
+            break
+        number *= 10
+    results = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        results.append(time.perf_counter() - start)
+    return min(results) / number * 1e6
+# endregion
+
+
+# region 解码与编码
+@benchmark('decode.GroupMessage')
+def bench_decode_group_message():
+    return lambda: push_from_json(GROUP_MESSAGE)
+
+
+@benchmark('decode.NudgeEvent')
+def bench_decode_nudge_event():
+    return lambda: push_from_json(NUDGE_EVENT)
+
+
+@benchmark('decode.Forward')
+def bench_decode_forward():
+    return lambda: push_from_json(FORWARD_MESSAGE)
+
+
+@benchmark('encode.MessageChain.to_json')
+def bench_message_chain_to_json():
+    chain = push_from_json(GROUP_MESSAGE).message_chain
+    return chain.to_json
+
+
+@benchmark('frame.peek_sync_id')
+def bench_peek_sync_id():
+    return lambda: peek_sync_id(GROUP_MESSAGE_FRAME)
+# endregion
+
+
+# region 路由与处理
+def make_context(text: str = '/weather 武汉') -> RecvContext:
+    member = Member(123456789, '群友', 'MEMBER', '', 0, 0, 0, Group(987654321, '测试群', 'ADMINISTRATOR'))
+    return RecvContext(Bot(0, ''), GroupMessage(member, MessageChain([Plain(text)])))
+
+
+def make_router(count: int) -> MessageTypeRouter:
+    """创建含 `count` 个处理器的路由器，只有最后一个处理器的过滤器通过，即最坏情况"""
+    handlers = []
+    for i in range(count):
+        @message_handler(GroupMessage, filters=lambda context, i=i: i == count - 1)
+        def handler():
+            pass
+
+        handlers.append(handler)
+    router = MessageTypeRouter()
+    router.build(handlers)
+    return router
+
+
+def bench_router(count: int):
+    router = make_router(count)
+    context = make_context()
+    return lambda: router.route(context)
+
+
+for _count in (1, 10, 100):
+    benchmark(f'route.handlers={_count}', is_async=True)(lambda count=_count: bench_router(count))
+
+
+@benchmark('route.regex', is_async=True)
+def bench_regex():
+    @regex_match(r'/weather\s+(?P<city>\S+)')
+    @message_handler(GroupMessage)
+    def handler(city: str):
+        return city
+
+    async def run():
+        context = make_context()  # 正则的匹配结果缓存在 context 中，每次使用新的 context
+        if await handler.can_handle(context):
+            await handler.handle(context)
+
+    return run
+
+
+@benchmark('filter.keywords=5000', is_async=True)
+def bench_keyword_filter():
+    rng = random.Random(0)
+    banned = KeywordFilter(''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(3, 8))) for _ in range(5000))
+
+    @resolve(banned.matched_words)
+    @message_handler(GroupMessage, filters=banned)
+    def handler(matched_words: list[str]):
+        return matched_words
+
+    async def run():
+        context = make_context()  # 匹配结果缓存在 context 中，每次使用新的 context
+        if await handler.can_handle(context):
+            await handler.handle(context)
+
+    return run
+
+
+def make_filter_order_benchmark(reorder: bool):
+    async def is_admin(context: RecvContext) -> bool:  # 模拟调用命令的过滤器
+        await asyncio.sleep(0)
+        return True
+
+    @message_handler(GroupMessage, filters=[is_admin, filters.from_group(1)])
+    def handler():
+        pass
+
+    context = make_context()  # 来自其他群，被 from_group 拒绝
+    context.bot.reorder_filters = reorder
+
+    async def run():
+        await handler.can_handle(context)
+
+    return run
+
+
+@benchmark('filter.declared_order', is_async=True)
+def bench_filter_declared_order():
+    return make_filter_order_benchmark(False)
+
+
+@benchmark('filter.reordered', is_async=True)
+def bench_filter_reordered():
+    return make_filter_order_benchmark(True)
+
+
+@benchmark('handle.resolvers', is_async=True)
+def bench_handle_resolvers():
+    @resolve(resolvers.group_id, resolvers.sender_id, resolvers.text)
+    @message_handler(GroupMessage)
+    def handler(
+        chain: MessageChain, message: GroupMessage, bot: Bot, group_id: int, sender_id: int, text: str
+    ) -> str:
+        return 'ok'
+
+    context = make_context()
+    return lambda: handler.handle(context)
+# endregion
+
+
+# region 端到端
+async def bench_end_to_end(count: int) -> list[float]:
+    """依次发送 `count` 条群消息推送，返回每条推送从发出到收到回复的耗时（微秒）"""
+
+    @message_handler(GroupMessage)
+    def echo(chain: MessageChain) -> MessageChain:
+        return chain[1:]
+
+    replied = asyncio.Event()
+    server = FakeMiraiServer()
+    server.add_listener(lambda command, sub_command, content: replied.set())
+    async with server:
+        bot = Bot(server.bot_id, server.verify_key, server.url)
+        bot.add(echo)
+        task = asyncio.create_task(bot.run())
+        while server.connections == 0:
+            await asyncio.sleep(0.01)
+        latencies = []
+        for i in range(count):
+            replied.clear()
+            start = time.perf_counter()
+            await server.push(make_group_message(f'message {i}', message_id=i))
+            await replied.wait()
+            latencies.append((time.perf_counter() - start) * 1e6)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    return latencies[count // 10:]  # 丢弃预热阶段
+
+
+END_TO_END_BENCHMARKS['bot.frame_to_reply'] = bench_end_to_end
+# endregion
+
+
+def run(names: list[str]) -> dict[str, float]:
+    results: dict[str, float] = {}
+    for name in names:
+        if name in END_TO_END_BENCHMARKS:
+            latencies = asyncio.run(END_TO_END_BENCHMARKS[name](1000))
+            results[name] = statistics.median(latencies)
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            print(f'{name:<32}{results[name]:>12.2f}us  (p99 {p99:.2f}us)')
+            continue
+        func = BENCHMARKS[name]()
+        if name in ASYNC_BENCHMARKS:
+            results[name] = asyncio.run(measure_async(func))
+        else:
+            results[name] = measure(func)
+        print(f'{name:<32}{results[name]:>12.2f}us')
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float) -> list[str]:
+    """返回比基线慢超过容差的项"""
+    regressions = []
+    print()
+    print(f'{"benchmark":<32}{"baseline":>12}{"current":>12}{"change":>10}')
+    for name, current in results.items():
+        if name not in baseline:
+            print(f'{name:<32}{"-":>12}{current:>10.2f}us')
+            continue
+        change = current / baseline[name] - 1
+        mark = '  REGRESSION' if change > tolerance else ''
+        print(f'{name:<32}{baseline[name]:>10.2f}us{current:>10.2f}us{change:>+10.1%}{mark}')
+        if change > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks of the lightq dispatch pipeline.')
+    parser.add_argument('--save', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown relative to the baseline (default: 0.25, i.e. 25%%)')
+    parser.add_argument('-k', dest='keyword', default='', help='only run benchmarks whose name contains KEYWORD')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)  # 每帧一条的 INFO 日志会掩盖被测代码的开销
+    names = [name for name in [*BENCHMARKS, *END_TO_END_BENCHMARKS] if args.keyword in name]
+    results = run(names)
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as file:
+                baseline = json.load(file)
+        baseline.update({name: round(value, 3) for name, value in results.items()})
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=2)
+            file.write('\n')
+        print(f'baseline saved to {args.baseline}')
+        return
+    if not os.path.exists(args.baseline):
+        print(f'no baseline found at {args.baseline}, run with --save to create one')
+        return
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline, args.tolerance)
+    if len(regressions) > 0:
+        print(f'{len(regressions)} regression(s): {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+回放推送日志的基准测试：将日志中的推送不等待地（或按指定倍速）交给 `Bot`，测量全部推送处理完毕的耗时和吞吐量。
+日志来自生产环境时（``bot.api.journal = Journal(...)``），可在修改代码前后用同一份日志比较，得到可重复的结果。
+
+未指定日志时，先用 `frames.py` 中的样例合成一份日志。
+
+运行方式：
+::
+    PYTHONPATH=src python benchmarks/bench_replay.py                          # 合成 10000 条推送并回放
+    PYTHONPATH=src python benchmarks/bench_replay.py --journal pushes.journal --speed 10
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from lightq import Bot, message_handler
+from lightq.entities import GroupMessage, FriendMessage, MessageChain
+from lightq.journal import Journal, ReplayApi
+from lightq.logging import logger
+
+from frames import GROUP_MESSAGE_FRAME, NUDGE_EVENT_FRAME, FORWARD_MESSAGE_FRAME
+
+
+@message_handler(GroupMessage)
+def group_handler(chain: MessageChain) -> str:
+    return f'received {len(chain)} elements'
+
+
+@message_handler(FriendMessage)
+def friend_handler(chain: MessageChain) -> None:
+    pass
+
+
+def synthesize(path: str, count: int):
+    frames = [GROUP_MESSAGE_FRAME] * 8 + [NUDGE_EVENT_FRAME, FORWARD_MESSAGE_FRAME]
+    with Journal(path, max_bytes=None, compress=True) as journal:
+        for i in range(count):
+            journal.write(frames[i % len(frames)], timestamp=i * 0.001)
+
+
+async def replay(path: str, speed: float | None) -> tuple[int, float]:
+    api = ReplayApi(path, speed=speed)
+    bot = Bot.from_api(api)
+    bot.add_all([group_handler, friend_handler])
+    start = time.perf_counter()
+    await bot.run()
+    while bot.background_task_count > 0:
+        await asyncio.sleep(0)
+    return api.replayed, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--journal', default=None, help='journal to replay, synthesized if not given')
+    parser.add_argument('--count', type=int, default=10000, help='number of synthesized pushes')
+    parser.add_argument('--speed', type=float, default=None, help='replay speed, as fast as possible if not given')
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.journal
+        if path is None:
+            path = os.path.join(directory, 'pushes.journal')
+            synthesize(path, args.count)
+        count, elapsed = asyncio.run(replay(path, args.speed))
+    print(f'replayed {count} pushes in {elapsed:.3f}s ({count / elapsed:.0f} pushes/s)')
+
+
+if __name__ == '__main__':
+    main()
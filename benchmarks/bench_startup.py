@@ -0,0 +1,64 @@
+"""
+启动耗时的基准测试：创建若干个控制器类，每个类包含大量带过滤器和 `after` 依赖的处理器方法，
+测量为多个控制器实例绑定全部处理器（`Controller.handlers`）以及 `Bot.add_all` 和 `Bot.build` 的耗时。
+
+处理器方法数增加时，每个处理器的平均绑定耗时应保持不变（线性）。
+
+运行方式：``PYTHONPATH=src python benchmarks/bench_startup.py``
+"""
+
+import time
+
+from lightq import Bot, Controller, message_handler
+from lightq.entities import GroupMessage
+
+INSTANCES = 20
+METHOD_COUNTS = [10, 50, 200, 500]
+
+
+def make_controller(methods: int) -> type[Controller]:
+    """创建一个包含 `methods` 个处理器方法的控制器类，每个方法都有一个过滤器方法，并排在前一个方法之后"""
+    namespace = {}
+
+    def is_enabled(self, message: GroupMessage) -> bool:
+        return True
+
+    namespace['is_enabled'] = is_enabled
+    previous = None
+    for i in range(methods):
+        def method(self): pass
+
+        method.__name__ = method.__qualname__ = f'handler{i}'
+        handler = message_handler(
+            GroupMessage,
+            filters=is_enabled,
+            after=previous if previous is not None else []
+        )(method)
+        namespace[f'handler{i}'] = handler
+        previous = handler
+    return type(f'Controller{methods}', (Controller,), namespace)
+
+
+def main():
+    print(f'{INSTANCES} controller instances per class')
+    print(f'{"methods":>8}{"bind":>12}{"per handler":>14}{"add+build":>12}{"per handler":>14}')
+    for methods in METHOD_COUNTS:
+        cls = make_controller(methods)
+        instances = [cls() for _ in range(INSTANCES)]
+        start = time.perf_counter()
+        handlers = [handler for instance in instances for handler in instance.handlers()]
+        bind = time.perf_counter() - start
+        assert len(handlers) == methods * INSTANCES
+
+        bot = Bot(0, '')
+        start = time.perf_counter()
+        for instance in instances:
+            bot.add_all(instance.handlers())
+        bot.build()
+        build = time.perf_counter() - start
+        print(f'{methods:>8}{bind * 1e3:>10.1f}ms{bind / len(handlers) * 1e6:>12.1f}us'
+              f'{build * 1e3:>10.1f}ms{build / len(handlers) * 1e6:>12.1f}us')
+
+
+if __name__ == '__main__':
+    main()
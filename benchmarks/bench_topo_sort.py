@@ -0,0 +1,120 @@
+"""
+`bot_topo_sort` 的基准测试：10000 个处理器，分别测试无顺序约束、随机的 before/after 约束（DAG）和一条长链，
+并与原先基于递归 DFS 的实现比较。原实现在长链上会超出递归深度限制。
+
+运行方式：``PYTHONPATH=src python benchmarks/bench_topo_sort.py``
+"""
+
+import functools
+import random
+import time
+from typing import Callable
+
+from lightq.framework._bot import bot_topo_sort
+
+N = 10000
+
+
+class Component:
+    def __init__(self, index: int):
+        self.index = index
+        self.before: list[Component] = []
+        self.after: list[Component] = []
+
+
+def legacy_topological_sort(items, orders):
+    graph = {u: [] for u in items}
+    for u, v in orders:
+        graph[u].append(v)
+    vis = {u: 0 for u in items}
+    topo = []
+
+    def dfs(u) -> bool:
+        vis[u] = -1
+        for v in graph[u]:
+            if vis[v] == -1:
+                return False
+            elif vis[v] == 0:
+                if not dfs(v):
+                    return False
+        vis[u] = 1
+        topo.append(u)
+        return True
+
+    for u in graph:
+        if vis[u] == 0:
+            if not dfs(u):
+                return None
+    topo.reverse()
+    return topo
+
+
+def legacy_bot_topo_sort(items, extra_orders, default=None):
+    orders = []
+    for item in items:
+        orders.extend((item, x) for x in item.before)
+        orders.extend((x, item) for x in item.after)
+    orders.extend(extra_orders)
+    if default is not None:
+        if legacy_topological_sort(items, orders) is None:
+            raise Exception('Cannot topological sort.')
+        out_neighbors = {item: [] for item in items}
+        in_neighbors = {item: [] for item in items}
+        for u, v in orders:
+            out_neighbors[u].append(v)
+            in_neighbors[v].append(u)
+
+        @functools.cache
+        def must_after_default(item) -> bool:
+            return (item in out_neighbors[default]
+                    or any(must_after_default(x) for x in in_neighbors[item]))
+
+        for item in items:
+            if item != default and not must_after_default(item):
+                orders.append((item, default))
+    return legacy_topological_sort(items, orders)
+
+
+def unordered() -> tuple[list[Component], Component]:
+    return [Component(i) for i in range(N)], Component(N)
+
+
+def random_dag() -> tuple[list[Component], Component]:
+    """每个处理器随机地排在至多 3 个编号更小的处理器之后，约 1% 的处理器排在 default 之后"""
+    rng = random.Random(0)
+    items, default = unordered()
+    for i, item in enumerate(items[1:], start=1):
+        item.after = rng.sample(items[:i], min(i, 3))
+        if rng.random() < 0.01:
+            item.after.append(default)
+    return items, default
+
+
+def chain() -> tuple[list[Component], Component]:
+    items, default = unordered()
+    for u, v in zip(items, items[1:]):
+        v.after = [u]
+    return items, default
+
+
+def measure(sort: Callable, items: list[Component], default: Component) -> str:
+    start = time.perf_counter()
+    try:
+        sort([*items, default], [], default)
+    except RecursionError:
+        return 'RecursionError'
+    return f'{(time.perf_counter() - start) * 1e3:.1f}ms'
+
+
+def main():
+    print(f'{N} handlers with a default')
+    print(f'{"graph":<12}{"legacy":>16}{"kahn":>16}')
+    for name, make in [('unordered', unordered), ('random dag', random_dag), ('chain', chain)]:
+        items, default = make()
+        legacy = measure(legacy_bot_topo_sort, items, default)
+        kahn = measure(bot_topo_sort, items, default)
+        print(f'{name:<12}{legacy:>16}{kahn:>16}')
+
+
+if __name__ == '__main__':
+    main()
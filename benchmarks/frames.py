@@ -0,0 +1,81 @@
+"""基准测试使用的 mirai-api-http 推送与响应样例，格式与 mirai-api-http 2.6 实际发出的帧一致。"""
+
+import json
+
+GROUP_MESSAGE = {
+    'type': 'GroupMessage',
+    'sender': {
+        'id': 123456789,
+        'memberName': '群友',
+        'specialTitle': '',
+        'permission': 'MEMBER',
+        'joinTimestamp': 1650000000,
+        'lastSpeakTimestamp': 1669000000,
+        'muteTimeRemaining': 0,
+        'group': {'id': 987654321, 'name': '测试群', 'permission': 'ADMINISTRATOR'}
+    },
+    'messageChain': [
+        {'type': 'Source', 'id': 12345, 'time': 1669000000},
+        {
+            'type': 'Quote', 'id': 12340, 'groupId': 987654321, 'senderId': 111111111,
+            'targetId': 987654321, 'origin': [{'type': 'Plain', 'text': '今天天气怎么样'}]
+        },
+        {'type': 'At', 'target': 222222222, 'display': '@机器人'},
+        {'type': 'Plain', 'text': ' /weather 武汉'},
+        {
+            'type': 'Image', 'imageId': '{01E9451B-70ED-EAE3-B37C-101F1EEBF5B5}.jpg',
+            'url': 'https://gchat.qpic.cn/gchatpic_new/0/0-0-01E9451B70EDEAE3B37C101F1EEBF5B5/0',
+            'path': None, 'base64': None
+        }
+    ]
+}
+
+NUDGE_EVENT = {
+    'type': 'NudgeEvent',
+    'fromId': 123456789,
+    'subject': {'id': 987654321, 'kind': 'Group'},
+    'action': '戳了戳',
+    'suffix': '的脸',
+    'target': 222222222
+}
+
+FORWARD_MESSAGE = {
+    'type': 'FriendMessage',
+    'sender': {'id': 123456789, 'nickname': '好友', 'remark': ''},
+    'messageChain': [
+        {'type': 'Source', 'id': 23456, 'time': 1669000000},
+        {
+            'type': 'Forward',
+            'nodeList': [
+                {
+                    'senderId': 100000000 + i,
+                    'time': 1669000000 + i,
+                    'senderName': f'群友{i}',
+                    'messageChain': [{'type': 'Plain', 'text': f'第 {i} 条消息'}],
+                    'messageId': str(30000 + i)
+                }
+                for i in range(10)
+            ]
+        }
+    ]
+}
+
+
+def dumps(obj) -> str:
+    """以 mirai-api-http 的格式（紧凑、不转义非 ASCII 字符）序列化"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def push_frame(data: dict) -> str:
+    return dumps({'syncId': '-1', 'data': data})
+
+
+GROUP_MESSAGE_FRAME = push_frame(GROUP_MESSAGE)
+NUDGE_EVENT_FRAME = push_frame(NUDGE_EVENT)
+FORWARD_MESSAGE_FRAME = push_frame(FORWARD_MESSAGE)
+SEND_MESSAGE_RESPONSE_FRAME = dumps({'syncId': '42', 'data': {'code': 0, 'msg': '', 'messageId': 12346}})
+RECALL_RESPONSE_FRAME = dumps({'syncId': '43', 'data': {'code': 0, 'msg': 'success'}})
+MEMBER_LIST_RESPONSE_FRAME = dumps({
+    'syncId': '44',
+    'data': {'code': 0, 'msg': '', 'data': [GROUP_MESSAGE['sender']] * 200}
+})
@@ -13,51 +13,41 @@ Bot：请回复“是”或“否”
 """
 
 import asyncio
-from datetime import datetime, timedelta
 from lightq import resolvers, resolve, message_handler, Bot, Controller
 from lightq.decorators import regex_fullmatch
 from lightq.entities import GroupMessage, MessageChain
-
-
-class Status:
-    def __init__(self, command: str, time: datetime):
-        self.command = command
-        self.time = time  # 收到命令的时间，做超时判断之用
+from lightq.state import StateStore, Session
 
 
 class AssistantController(Controller):
-    def __init__(self):
-        # (group_id, sender_id) => status
-        self.status: dict[tuple[int, int], Status] = {}
+    # 每个会话（群号，发送者）的状态保存在 bot.state 中，为正在进行的命令，30 秒后自动过期
 
     @regex_fullmatch('/weather')
-    @resolve(resolvers.group_id, resolvers.sender_id)
     @message_handler(GroupMessage)
-    def weather_command(self, group_id: int, sender_id: int) -> str:
-        self.status[(group_id, sender_id)] = Status('/weather', datetime.now())
+    def weather_command(self, session: Session) -> str:
+        session.set('/weather')
         return '您想查询哪个城市的天气？'
 
     @regex_fullmatch('/mute_all')
-    @resolve(resolvers.group_id, resolvers.sender_id)
     @message_handler(GroupMessage)
-    def mute_all_command(self, group_id: int, sender_id: int) -> str:
-        self.status[(group_id, sender_id)] = Status('/mute_all', datetime.now())
+    def mute_all_command(self, session: Session) -> str:
+        session.set('/mute_all')
         return '您确定要开启全员禁言吗？请回复“是”或“否”'
 
-    @resolve(resolvers.group_id, resolvers.sender_id)
+    @resolve(resolvers.group_id)
     @message_handler(GroupMessage, after=[weather_command, mute_all_command])
     async def lowest_priority_handler(
         self,
         group_id: int,
-        sender_id: int,
+        session: Session,
         chain: MessageChain,
         bot: Bot
     ) -> str | None:
-        status = self.status.pop((group_id, sender_id), None)
-        if status is None or datetime.now() - status.time > timedelta(seconds=30):
+        command = session.pop()
+        if command is None:
             # 连续对话时，用户需要在 30 秒内做出反应，超过 30 秒的回复会被 bot 忽略
             return None
-        if status.command == '/weather':
+        if command == '/weather':
             return await query_weather(str(chain))
         else:  # /mute_all
             if str(chain) == '是':
@@ -66,7 +56,7 @@ class AssistantController(Controller):
             elif str(chain) == '否':
                 return None
             else:
-                self.status[(group_id, sender_id)] = Status('/mute_all', datetime.now())
+                session.set('/mute_all')
                 return '请回复“是”或“否”'
 
 
@@ -77,6 +67,8 @@ async def query_weather(city: str) -> str:
 
 async def main():
     bot = Bot(123456789, 'verify-key')  # 请替换为相应的 QQ 号和 verify key
+    # 对话状态在 30 秒后过期，最多保存 10000 个会话；指定 path 可将状态持久化，bot 重启后对话仍可继续
+    bot.state = StateStore(ttl=30, max_size=10000, path='assistant_state.db')
     controller = AssistantController()
     bot.add_all(controller.handlers())
     await bot.run()
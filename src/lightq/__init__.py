@@ -1,19 +1,73 @@
-from .logging import logger
-from .api import MiraiApi
-from .framework import (
-    Bot,
-    MessageHandler,
-    EventHandler,
-    ExceptionHandler,
-    RecvContext,
-    ExceptionContext,
-    Controller,
-    handler_property,
-    scan_handlers
-)
-from .decorators import (
-    resolve,
-    message_handler,
-    event_handler,
-    exception_handler
-)
+"""
+顶层的名称在首次访问时才导入对应的子模块，``import lightq`` 或只使用 `lightq.metrics`、`lightq.api._frame`
+等轻量子模块时不会导入整个框架。
+"""
+
+import importlib
+import importlib.util
+import typing
+
+if typing.TYPE_CHECKING:
+    from .logging import logger
+    from .api import MiraiApi
+    from .framework import (
+        Bot,
+        BotHost,
+        MessageHandler,
+        EventHandler,
+        ExceptionHandler,
+        RecvContext,
+        ExceptionContext,
+        Controller,
+        handler_property,
+        scan_handlers,
+        PluginLoader
+    )
+    from .decorators import (
+        resolve,
+        message_handler,
+        event_handler,
+        exception_handler
+    )
+
+# 名称 => 定义该名称的子模块
+_LAZY_NAMES = {
+    'logger': '.logging',
+    'MiraiApi': '.api',
+    **dict.fromkeys([
+        'Bot',
+        'BotHost',
+        'MessageHandler',
+        'EventHandler',
+        'ExceptionHandler',
+        'RecvContext',
+        'ExceptionContext',
+        'Controller',
+        'handler_property',
+        'scan_handlers',
+        'PluginLoader'
+    ], '.framework'),
+    **dict.fromkeys([
+        'resolve',
+        'message_handler',
+        'event_handler',
+        'exception_handler'
+    ], '.decorators')
+}
+
+__all__ = list(_LAZY_NAMES)
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name in _LAZY_NAMES:
+        value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+        globals()[name] = value  # 之后的访问不再经过 __getattr__
+        return value
+    # 子模块（如 `lightq.entities`）在首次访问时导入，导入后成为包的属性
+    if not name.startswith('_') and importlib.util.find_spec(f'{__name__}.{name}') is not None:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_NAMES})
@@ -3,6 +3,7 @@ import datetime
 import asyncio
 import typing
 import functools
+import weakref
 from collections import ChainMap
 from collections.abc import MutableSequence, MutableSet
 from typing import Callable, overload, Awaitable, TypeVar, ParamSpec, Any, Coroutine
@@ -163,6 +164,22 @@ def get_class_attributes(cls: type) -> ChainMap[str, Any]:
     return ChainMap(*(vars(c) for c in inspect.getmro(cls)))
 
 
+_class_attribute_names: 'weakref.WeakKeyDictionary[type, dict[int, str]]' = weakref.WeakKeyDictionary()
+
+
+def get_class_attribute_names(cls: type) -> dict[int, str]:
+    """
+    类属性（包括从基类继承的）的 id 到属性名的映射。
+
+    结果按类缓存，同一个类的多个实例共用一份映射，不要修改返回的字典。类创建之后再添加的属性不会出现在缓存的结果中。
+    """
+    names = _class_attribute_names.get(cls)
+    if names is None:
+        names = {id(x): name for name, x in get_class_attributes(cls).items()}
+        _class_attribute_names[cls] = names
+    return names
+
+
 class IdToken(str):
     def __init__(self, description: str = ''):
         super().__init__()
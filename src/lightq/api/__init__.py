@@ -1 +1,35 @@
-from ._api import MiraiApi
+import importlib
+import typing
+
+if typing.TYPE_CHECKING:
+    from ._base import BaseApi
+    from ._api import MiraiApi
+    from ._http_api import MiraiHttpApi
+    from ._http import HttpException
+    from ._media_cache import MediaCache, SqliteMediaCache
+    from ._upload import MediaSource
+
+# 名称 => 定义该名称的子模块。适配器在首次访问时才导入，例如只使用 HTTP 适配器时不会导入 websockets
+_LAZY_NAMES = {
+    'BaseApi': '._base',
+    'MiraiApi': '._api',
+    'MiraiHttpApi': '._http_api',
+    'HttpException': '._http',
+    'MediaCache': '._media_cache',
+    'SqliteMediaCache': '._media_cache',
+    'MediaSource': '._upload'
+}
+
+__all__ = list(_LAZY_NAMES)
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name not in _LAZY_NAMES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(_LAZY_NAMES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_LAZY_NAMES})
@@ -1,30 +1,52 @@
 import asyncio
 import json
+import time
 import urllib.parse
 import typing
 from collections import deque
-from typing import Any, AsyncIterator, cast
+from typing import Any, AsyncIterable, AsyncIterator, cast
 
 import websockets.client
 import websockets.exceptions
 
-from .. import entities
 from ..entities import Message, Event, SyncMessage, UnsupportedEntity
 from ..exceptions import MiraiApiException
 from ..logging import logger
 from .._commons import AutoIncrement
-from ._api_mixin import ApiMixin
+from ._base import BaseApi, push_from_json
+from ._frame import Frame, peek_sync_id, peek_code, load_frame
+from ._http import HttpClient
+from ._media_cache import MediaCache
+from ._upload import post_multipart
+
+# 不关心返回值的命令 (command, sub_command)，其响应只需读出状态码
+DISCARD_RESULT_COMMANDS = frozenset({
+    ('sendNudge', None),
+    ('recall', None),
+    ('deleteFriend', None),
+    ('mute', None),
+    ('unmute', None),
+    ('kick', None),
+    ('quit', None),
+    ('muteAll', None),
+    ('unmuteAll', None),
+    ('setEssence', None),
+    ('groupConfig', 'update'),
+    ('memberInfo', 'update'),
+    ('memberAdmin', None),
+    ('anno_delete', None)
+})
 
 
 class DataQueue:
     def __init__(self):
-        self.__queue: deque[dict[str, Any]] = deque()
-        self.__consumers: deque[asyncio.Future[dict[str, Any]]] = deque()
+        self.__queue: deque[Frame] = deque()
+        self.__consumers: deque[asyncio.Future[Frame]] = deque()
 
-    async def pop(self) -> dict[str, Any]:
+    async def pop(self) -> Frame:
         if len(self.__queue) > 0:
             return self.__queue.popleft()
-        future: asyncio.Future[dict[str, Any]] = asyncio.Future()
+        future: asyncio.Future[Frame] = asyncio.Future()
         self.__consumers.append(future)
 
         def remove_future(_):
@@ -35,11 +57,17 @@ class DataQueue:
         future.add_done_callback(remove_future)
         return await future
 
-    def push(self, data: dict[str, Any]):
-        if len(self.__consumers) > 0:
-            self.__consumers[0].set_result(data)
-        else:
-            self.__queue.append(data)
+    def push(self, data: Frame):
+        # 已完成的 future 要等到下一轮事件循环才会被回调移除，连续收到多个帧时需要跳过它们
+        while len(self.__consumers) > 0:
+            future = self.__consumers.popleft()
+            if not future.done():
+                future.set_result(data)
+                return
+        self.__queue.append(data)
+
+    def __len__(self) -> int:
+        return len(self.__queue)
 
     def set_exceptions(self, exception: BaseException):
         for future in self.__consumers:
@@ -56,13 +84,13 @@ class DataQueue:
 
 class ResponseDict:
     def __init__(self):
-        self.__responses: dict[str, dict[str, Any]] = {}  # sync-id => response-data
-        self.__consumers: dict[str, asyncio.Future[dict[str, Any]]] = {}  # sync-id => future
+        self.__responses: dict[str, Frame] = {}  # sync-id => response-frame
+        self.__consumers: dict[str, asyncio.Future[Frame]] = {}  # sync-id => future
 
-    async def get(self, sync_id: str) -> dict[str, Any]:
+    async def get(self, sync_id: str) -> Frame:
         if sync_id in self.__responses:
             return self.__responses.pop(sync_id)
-        future: asyncio.Future[dict[str, Any]] = asyncio.Future()
+        future: asyncio.Future[Frame] = asyncio.Future()
         if sync_id in self.__consumers:
             raise KeyError(f'there is already a future waiting for response with sync_id: {sync_id}')
         self.__consumers[sync_id] = future
@@ -70,12 +98,17 @@ class ResponseDict:
         future.add_done_callback(lambda _: self.__consumers.pop(sync_id, None))
         return await future
 
-    def put(self, sync_id: str, response: dict[str, Any]):
+    def put(self, sync_id: str, response: Frame):
         if sync_id in self.__consumers:
             self.__consumers[sync_id].set_result(response)
         else:
             self.__responses[sync_id] = response
 
+    @property
+    def pending(self) -> int:
+        """等待响应的数量"""
+        return len(self.__consumers)
+
     def set_exceptions(self, exception: BaseException):
         for future in self.__consumers.values():
             if not future.done():
@@ -88,27 +121,206 @@ class ResponseDict:
         self.__consumers.clear()
 
 
-class MiraiApi(ApiMixin):
+class Channel:
+    """
+    与 mirai-api-http 之间的一条 WebSocket 连接。
+
+    每条连接拥有独立的 session、syncId 计数器和响应表。若指定了 `queue`，则该连接收到的推送会放入
+    `queue` 中，否则推送会被丢弃。
+    """
+
+    def __init__(self, api: 'MiraiApi', endpoint: str, queue: DataQueue | None = None):
+        self.api = api
+        self.endpoint = endpoint
+        self.__queue = queue
+        self.__ws: websockets.client.WebSocketClientProtocol | None = None
+        self.__session_key: str | None = None
+        # 收到 session 或连接关闭时被设置，建立连接时被清除
+        self.__session_event = asyncio.Event()
+        self.__responses = ResponseDict()
+        self.__working_task: asyncio.Task[None] | None = None
+        self.__increment_id = AutoIncrement(max_value=int(1e8))
+        self.__connect_lock = asyncio.Lock()
+
+    @property
+    def session_key(self) -> str | None: return self.__session_key
+
+    @property
+    def connected(self) -> bool: return self.__ws is not None
+
+    async def wait_session_key(self) -> str:
+        """
+        建立连接并等待 mirai-api-http 发来 session（连接建立后的第一条消息）
+
+        :raises ConnectionError: 收到 session 之前连接已关闭（如 verify key 错误）时抛出
+        """
+        await self.connect()
+        await self.__session_event.wait()
+        if self.__session_key is None:
+            raise ConnectionError(f'the /{self.endpoint} connection closed before a session was established')
+        return self.__session_key
+
+    @property
+    def pending(self) -> int:
+        """等待响应的命令数"""
+        return self.__responses.pending
+
+    async def send(self, data: dict[str, Any]) -> Frame:
+        """发送命令并返回未解析的响应帧，不会修改 `data`"""
+        tracer = self.api.tracer
+        if tracer is None:
+            return await self.__send(data)
+        with tracer.start_as_current_span('lightq.command', attributes={
+            'lightq.command': data['command'],
+            'lightq.sub_command': data.get('subCommand') or '',
+            'lightq.channel': self.endpoint
+        }) as span:
+            return await self.__send(data, span)
+
+    async def __send(self, data: dict[str, Any], span: Any = None) -> Frame:
+        await self.connect()
+        if typing.TYPE_CHECKING:
+            assert self.__ws is not None
+        sync_id = self.__increment_id.get()
+        if span is not None:  # 以 syncId 关联 span 与 mirai-api-http 的请求和响应
+            span.set_attribute('lightq.sync_id', str(sync_id))
+        frame = json.dumps({'syncId': sync_id, **data})
+        logger.info(f'websocket send: {frame}')
+        await self.__ws.send(frame)
+        # 响应结果的 syncId 为字符串而非数字
+        return await self.__responses.get(str(sync_id))
+
+    async def __working_method(self):
+        if typing.TYPE_CHECKING:
+            assert self.__ws is not None
+        try:
+            while True:
+                frame: Frame = cast(str, await self.__ws.recv())
+                logger.info(f'websocket recv: {frame}')
+                # 只读出 syncId 以区分推送和响应，完整的解析由 recv 或 send 方法按需进行
+                sync_id = peek_sync_id(frame)
+                if sync_id is None:  # 格式不符合预期，回退到完整解析
+                    frame = load_frame(frame)
+                    sync_id = cast(str, frame['syncId'])
+                if sync_id == '':  # first message after connected
+                    self.__session_key = load_frame(frame)['data']['session']
+                    self.__session_event.set()
+                elif sync_id == self.api.reserved_sync_id:  # 他人发送的消息（并非响应结果）
+                    if self.__queue is not None:
+                        self.__queue.push(frame)
+                        self.api.__push_received__(frame)
+                else:  # 响应结果
+                    self.__responses.put(sync_id, frame)
+        except websockets.exceptions.WebSocketException as exception:
+            if self.__queue is not None:
+                self.__queue.set_exceptions(exception)
+            self.__responses.set_exceptions(exception)
+        finally:
+            if self.__queue is not None:
+                self.__queue.clear()
+            self.__responses.clear()
+            self.__session_key = None
+            self.__session_event.set()  # 唤醒等待 session 的调用者
+            self.__increment_id.reset()
+            ws = self.__ws
+            self.__ws = None
+            await ws.close()  # the close method is idempotent
+
+    async def connect(self):
+        if self.__ws is not None:
+            return
+        async with self.__connect_lock:  # 避免并发调用时重复建立连接
+            if self.__ws is not None:
+                return
+            self.__session_event.clear()
+            encoded_key = urllib.parse.quote_plus(self.api.verify_key)
+            self.__ws = await websockets.client.connect(
+                urllib.parse.urljoin(
+                    self.api.base_url,
+                    f'/{self.endpoint}?verifyKey={encoded_key}&qq={self.api.bot_id}'
+                )
+            )
+
+            def remove_working_task(task):
+                self.__working_task = None
+
+            self.__working_task = asyncio.create_task(self.__working_method())
+            self.__working_task.add_done_callback(remove_working_task)
+
+    async def close(self):
+        if self.__ws is None:
+            return
+        await self.__ws.close()
+        if typing.TYPE_CHECKING:
+            assert self.__working_task is not None
+        await self.__working_task  # wait for the working task to finish
+
+
+class MiraiApi(BaseApi):
     def __init__(
         self,
         bot_id: int,
         verify_key: str,
         base_url: str = 'ws://localhost:8080',
-        reserved_sync_id: str = '-1'
+        reserved_sync_id: str = '-1',
+        command_channels: int = 0,
+        http_url: str | None = None
     ):
+        """
+        :param command_channels: 额外建立的命令连接数。为 0 时所有命令和推送共用一条 `/all` 连接；
+            大于 0 时推送独占一条 `/all` 连接，命令则分摊到若干条 `/event` 连接上（选择等待响应数最少的连接），
+            避免大量发送命令时阻塞消息的接收。
+        :param http_url: HTTP 适配器的地址，上传媒体文件时使用（mirai-api-http 只在 HTTP 适配器中提供上传接口）。
+            默认与 `base_url` 的主机和端口相同。
+        """
+        if command_channels < 0:
+            raise ValueError(f'command_channels must be non-negative, got {command_channels}')
         self.bot_id = bot_id
         self.verify_key = verify_key
         self.base_url = base_url
         self.reserved_sync_id = reserved_sync_id
-        self.__ws: websockets.client.WebSocketClientProtocol | None = None
-        self.__session_key: str | None = None
         self.__queue = DataQueue()
-        self.__responses = ResponseDict()
-        self.__working_task: asyncio.Task[None] | None = None
-        self.__increment_id = AutoIncrement(max_value=int(1e8))
+        self.__push_channel = Channel(self, 'all', self.__queue)
+        # 命令连接只用于发送命令，选用推送量较小的 /event 端点，收到的事件推送会被丢弃
+        self.__command_channels = [Channel(self, 'event') for _ in range(command_channels)]
+        self.__next_channel = 0
+        if http_url is None:
+            http_url = base_url.replace('wss://', 'https://', 1).replace('ws://', 'http://', 1)
+        self.http_url = http_url
+        self.__http_client: HttpClient | None = None
+        self.media_cache: MediaCache | None = MediaCache()
 
     @property
-    def session_key(self) -> str | None: return self.__session_key
+    def session_key(self) -> str | None: return self.__push_channel.session_key
+
+    @property
+    def command_channels(self) -> int: return len(self.__command_channels)
+
+    @property
+    def pending_responses(self) -> int:
+        return self.__push_channel.pending + sum(channel.pending for channel in self.__command_channels)
+
+    @property
+    def queued_pushes(self) -> int: return len(self.__queue)
+
+    @property
+    def command_channel_pending(self) -> list[int]:
+        """各命令连接上等待响应的命令数，可用于观察命令是否均衡地分摊到各连接上"""
+        return [channel.pending for channel in self.__command_channels]
+
+    def __select_channel(self) -> Channel:
+        """选择等待响应数最少的命令连接，数量相同时轮流选择"""
+        channels = self.__command_channels
+        if len(channels) == 0:
+            return self.__push_channel
+        start = self.__next_channel
+        self.__next_channel = (start + 1) % len(channels)
+        selected = channels[start]
+        for i in range(1, len(channels)):
+            channel = channels[(start + i) % len(channels)]
+            if channel.pending < selected.pending:
+                selected = channel
+        return selected
 
     async def send(self, data: dict[str, Any]) -> dict[str, Any]:
         """
@@ -123,7 +335,7 @@ class MiraiApi(ApiMixin):
         }
         ```
 
-        JSON 的 `syncId` 字段由 `send` 方法自动生成，无需传入。
+        JSON 的 `syncId` 字段由 `send` 方法自动生成，无需传入，`data` 本身不会被修改。
 
         :returns: 若状态码为 0 则将响应的 JSON 返回
         :raises:
@@ -131,15 +343,11 @@ class MiraiApi(ApiMixin):
             websockets.exception.WebSocketException: WebSocket 连接被关闭或出错时抛出
         """
         await self.connect()
-        if typing.TYPE_CHECKING:
-            assert self.__ws is not None
-        sync_id = self.__increment_id.get()
-        data['syncId'] = sync_id
-        logger.info(f'websocket send: {data}')
-        await self.__ws.send(json.dumps(data))
-        # 响应结果的 syncId 为字符串而非数字
-        response = await self.__responses.get(str(sync_id))
-        response = cast(dict[str, Any], response['data'])
+        return self.__parse_response(await self.__select_channel().send(data))
+
+    @staticmethod
+    def __parse_response(frame: Frame) -> dict[str, Any]:
+        response = cast(dict[str, Any], load_frame(frame)['data'])
         if 'code' not in response:  # 有的响应不含 code 字段
             return response
         if response['code'] == 0:
@@ -147,6 +355,14 @@ class MiraiApi(ApiMixin):
         else:
             raise MiraiApiException.from_response(response)
 
+    async def __send_discarding_result(self, data: dict[str, Any]) -> dict[str, Any]:
+        """同 `send`，但成功时只读出状态码而不解析响应，返回 ``{'code': 0}``"""
+        await self.connect()
+        frame = await self.__select_channel().send(data)
+        if peek_code(frame) == 0:
+            return {'code': 0}
+        return self.__parse_response(frame)
+
     async def recv(self) -> Message | Event | SyncMessage | UnsupportedEntity:
         """
         Mirai-api-http 推送格式：
@@ -162,76 +378,49 @@ class MiraiApi(ApiMixin):
 
         :raises websockets.exception.WebSocketException: WebSocket 连接被关闭或出错时抛出
         """
-        await self.connect()
-        data = await self.__queue.pop()
-        data = cast(dict[str, Any], data['data'])
-        if data['type'] in entities.MESSAGE_CLASSES:
-            return Message.from_json(data)
-        elif data['type'] in entities.EVENT_CLASSES:
-            return Event.from_json(data)
-        elif data['type'] in entities.SYNC_MESSAGE_CLASSES:
-            return SyncMessage.from_json(data)
-        else:
-            return UnsupportedEntity(data)
+        return push_from_json(cast(dict[str, Any], load_frame(await self.recv_frame())['data']))
 
-    async def __working_method(self):
-        if typing.TYPE_CHECKING:
-            assert self.__ws is not None
-        try:
-            while True:
-                data = cast(dict[str, Any], json.loads(await self.__ws.recv()))
-                logger.info(f'websocket recv: {data}')
-                sync_id: str = data['syncId']
-                if sync_id == '':  # first message after connected
-                    self.__session_key = data['data']['session']
-                elif sync_id == self.reserved_sync_id:  # 他人发送的消息（并非响应结果）
-                    self.__queue.push(data)
-                else:  # 响应结果
-                    self.__responses.put(sync_id, data)
-        except websockets.exceptions.WebSocketException as exception:
-            self.__queue.set_exceptions(exception)
-            self.__responses.set_exceptions(exception)
-        finally:
-            self.__queue.clear()
-            self.__responses.clear()
-            self.__session_key = None
-            self.__increment_id.reset()
-            ws = self.__ws
-            self.__ws = None
-            await ws.close()  # the close method is idempotent
+    async def recv_frame(self) -> Frame:
+        """
+        接收一条推送的原始帧，不进行解析
+
+        :raises websockets.exception.WebSocketException: WebSocket 连接被关闭或出错时抛出
+        """
+        await self.connect()
+        return await self.__queue.pop()
 
     async def connect(self):
         """与 mirai-api-http 建立连接。如果连接已经建立，则什么也不做。"""
-        if self.__ws is not None:
-            return
-        encoded_key = urllib.parse.quote_plus(self.verify_key)
-        self.__ws = await websockets.client.connect(
-            urllib.parse.urljoin(
-                self.base_url,
-                f'/all?verifyKey={encoded_key}&qq={self.bot_id}'
-            )
+        await asyncio.gather(
+            self.__push_channel.connect(),
+            *(channel.connect() for channel in self.__command_channels)
         )
 
-        def remove_working_task(task):
-            self.__working_task = None
-
-        self.__working_task = asyncio.create_task(self.__working_method())
-        self.__working_task.add_done_callback(remove_working_task)
-
     async def close(self):
         """断开与 mirai-api-http 的连接。如果连接已经断开，则什么也不做。"""
-        if self.__ws is None:
-            return
-        await self.__ws.close()
-        if typing.TYPE_CHECKING:
-            assert self.__working_task is not None
-        await self.__working_task  # wait for the working task to finish
-
-    async def __aenter__(self):
-        return self
+        await asyncio.gather(
+            self.__push_channel.close(),
+            *(channel.close() for channel in self.__command_channels)
+        )
+        if self.__http_client is not None:
+            await self.__http_client.close()
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close()
+    async def __upload__(
+        self,
+        path: str,
+        fields: dict[str, str],
+        file_field: str,
+        filename: str,
+        chunks: AsyncIterable[bytes]
+    ) -> dict[str, Any]:
+        await self.connect()
+        # mirai-api-http 的 session 在各适配器之间共享。刚建立连接时可能还没有收到 session，需要等待
+        session_key = await self.__push_channel.wait_session_key()
+        if self.__http_client is None:
+            self.__http_client = HttpClient(self.http_url)
+        fields = {'sessionKey': session_key, **fields}
+        logger.info(f'http upload: {path} {fields}')
+        return await post_multipart(self.__http_client, path, fields, file_field, filename, chunks)
 
     def __aiter__(self) -> AsyncIterator[Message | Event | SyncMessage | UnsupportedEntity]:
         async def generator():
@@ -249,10 +438,24 @@ class MiraiApi(ApiMixin):
         content: dict[str, Any] | None = None,
         sub_command: str | None = None
     ) -> dict[str, Any]:
-        return await self.send({
+        """
+        执行命令。对于不关心返回值的命令（见 `DISCARD_RESULT_COMMANDS`），成功时只返回 ``{'code': 0}``。
+        """
+        data = {
             'command': command,
             'content': content if content is not None else {},
             'subCommand': sub_command
-        })
+        }
+        start = time.perf_counter()
+        try:
+            if (command, sub_command) in DISCARD_RESULT_COMMANDS:
+                return await self.__send_discarding_result(data)
+            return await self.send(data)
+        finally:
+            if self.metrics is not None:
+                self.metrics.command_seconds.observe(
+                    time.perf_counter() - start,
+                    command=command if sub_command is None else f'{command}.{sub_command}'
+                )
 
     __send_command__ = send_command
@@ -45,6 +45,9 @@ class ApiMixin:
     ):
         raise NotImplementedError
 
+    def __message_sent__(self, kind: str, target: int, message_id: int, chain: MessageChain):
+        """消息发送成功后调用，`kind` 为 Group、Friend 或 Temp，`target` 为群号或对方的 QQ 号。默认什么也不做"""
+
     async def message_from_id(self, message_id: int, friend_or_group_id: int) -> Message | None:
         """
         通过 message id 获取消息。若该 message id 没有被缓存或缓存失效则返回 `None`。
@@ -106,27 +109,33 @@ class ApiMixin:
     async def send_friend_message(self, friend_id: int, message: str | MessageChain) -> int:
         """发送好友消息"""
         chain = MessageChain([Plain(message)]) if isinstance(message, str) else message
-        return (await self.__send_command__('sendFriendMessage', {
+        message_id: int = (await self.__send_command__('sendFriendMessage', {
             'target': friend_id,
             'messageChain': chain.to_json()
         }))['messageId']
+        self.__message_sent__('Friend', friend_id, message_id, chain)
+        return message_id
 
     async def send_group_message(self, group_id: int, message: str | MessageChain) -> int:
         """发送群消息"""
         chain = MessageChain([Plain(message)]) if isinstance(message, str) else message
-        return (await self.__send_command__('sendGroupMessage', {
+        message_id: int = (await self.__send_command__('sendGroupMessage', {
             'target': group_id,
             'messageChain': chain.to_json()
         }))['messageId']
+        self.__message_sent__('Group', group_id, message_id, chain)
+        return message_id
 
     async def send_temp_message(self, group_id: int, member_id: int, message: str | MessageChain) -> int:
         """发送临时会话消息"""
         chain = MessageChain([Plain(message)]) if isinstance(message, str) else message
-        return (await self.__send_command__('sendTempMessage', {
+        message_id: int = (await self.__send_command__('sendTempMessage', {
             'qq': member_id,
             'group': group_id,
             'messageChain': chain.to_json()
         }))['messageId']
+        self.__message_sent__('Temp', member_id, message_id, chain)
+        return message_id
 
     async def send_nudge(
         self,
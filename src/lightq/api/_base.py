@@ -0,0 +1,102 @@
+import abc
+import typing
+from typing import Any, AsyncIterator
+
+from .. import entities
+from ..entities import Message, Event, SyncMessage, UnsupportedEntity
+from ..logging import logger
+from ._api_mixin import ApiMixin
+from ._frame import Frame
+from ._upload import UploadMixin
+
+if typing.TYPE_CHECKING:
+    from ..history import MessageHistory
+    from ..journal import Journal
+    from ..metrics import BotMetrics
+    from ..tracing import Tracer, NoOpTracer
+
+
+class BaseApi(ApiMixin, UploadMixin, abc.ABC):
+    """
+    mirai-api-http 适配器的公共接口，在 `ApiMixin` 提供的命令之上增加了连接管理、推送接收和媒体上传。
+
+    `MiraiApi`（WebSocket 适配器）与 `MiraiHttpApi`（HTTP 适配器）均实现了该接口，`Bot` 可以使用其中任意一种。
+    """
+
+    bot_id: int
+    verify_key: str
+    base_url: str
+    metrics: 'BotMetrics | None' = None
+    """设置后记录每条命令的往返耗时，通常由 `Bot.metrics` 统一设置"""
+    tracer: 'Tracer | NoOpTracer | None' = None
+    """设置后为每条命令创建 span，通常由 `Bot.tracer` 统一设置"""
+    history: 'MessageHistory | None' = None
+    """设置后记录发出的消息，通常由 `Bot.history` 统一设置"""
+    journal: 'Journal | None' = None
+    """设置后将收到的每条推送的原始帧追加写入日志，可用 `lightq.journal.ReplayApi` 回放"""
+
+    def __message_sent__(self, kind: str, target: int, message_id: int, chain: entities.MessageChain):
+        if self.history is not None:
+            self.history.record_sent(kind, target, self.bot_id, message_id, chain)
+
+    def __push_received__(self, frame: Frame):
+        """收到一条推送后调用。写入日志失败（如磁盘已满）时记录错误并停用日志，不影响推送的接收"""
+        if self.journal is None:
+            return
+        try:
+            self.journal.write(frame)
+        except Exception as e:
+            logger.error(f'failed to write the push journal, journaling is disabled: {repr(e)}')
+            self.journal = None
+
+    @property
+    def pending_responses(self) -> int:
+        """已发出但尚未收到响应的命令数"""
+        return 0
+
+    @property
+    def queued_pushes(self) -> int:
+        """已收到但尚未被 `recv` 取走的推送数"""
+        return 0
+
+    @abc.abstractmethod
+    async def connect(self):
+        """与 mirai-api-http 建立连接。如果连接已经建立，则什么也不做。"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def close(self):
+        """断开与 mirai-api-http 的连接。如果连接已经断开，则什么也不做。"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def recv(self) -> Message | Event | SyncMessage | UnsupportedEntity:
+        """接收一条推送"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def recv_frame(self) -> Frame:
+        """接收一条推送的原始帧（形如 ``{"syncId": ..., "data": {...}}``），不进行解析"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def __aiter__(self) -> AsyncIterator[Message | Event | SyncMessage | UnsupportedEntity]:
+        raise NotImplementedError
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+def push_from_json(data: dict[str, Any]) -> Message | Event | SyncMessage | UnsupportedEntity:
+    """将推送内容（即推送 JSON 的 `data` 部分）转换为实体对象"""
+    if data['type'] in entities.MESSAGE_CLASSES:
+        return Message.from_json(data)
+    elif data['type'] in entities.EVENT_CLASSES:
+        return Event.from_json(data)
+    elif data['type'] in entities.SYNC_MESSAGE_CLASSES:
+        return SyncMessage.from_json(data)
+    else:
+        return UnsupportedEntity(data)
@@ -0,0 +1,72 @@
+"""
+WebSocket 帧的快速分类。
+
+mirai-api-http 发出的帧形如 ``{"syncId":"123","data":{...}}``，`syncId` 总是第一个字段。因此只需检查帧的前缀，
+即可在不解析整个 JSON 的情况下判断该帧是推送还是响应，完整的解析推迟到真正需要数据时再进行。
+对于不关心返回值的命令（如 `recall`、`mute`），其响应只需读出 `code` 即可。
+
+帧的格式不符合预期时，各函数返回 `None`，调用方应回退到完整解析。
+"""
+
+import json
+import re
+from typing import Any, cast
+
+__all__ = ['Frame', 'peek_sync_id', 'peek_code', 'peek_shard_key', 'load_frame']
+
+Frame = str | dict[str, Any]
+"""原始的 JSON 文本，或已经解析过的 JSON 对象"""
+
+SYNC_ID_PREFIX = '{"syncId":"'
+CODE_ONLY_PATTERN = re.compile(r'\{"syncId":"[^"]*","data":\{"code":(-?\d+),"msg":"[^"\\]*"\}\}')
+# 按优先级排列：群号（群消息、群事件）、戳一戳的来源（群或好友）、发送者、好友
+SHARD_KEY_PATTERNS = [
+    re.compile(r'"group"\s*:\s*\{\s*"id"\s*:\s*(\d+)'),
+    re.compile(r'"subject"\s*:\s*\{\s*"id"\s*:\s*(\d+)'),
+    re.compile(r'"sender"\s*:\s*\{\s*"id"\s*:\s*(\d+)'),
+    re.compile(r'"friend"\s*:\s*\{\s*"id"\s*:\s*(\d+)')
+]
+
+
+def peek_sync_id(frame: str) -> str | None:
+    """
+    不解析 JSON，直接读出帧的 `syncId` 字段
+
+    Examples:
+    ::
+        peek_sync_id('{"syncId":"-1","data":{}}') == '-1'
+    """
+    if not frame.startswith(SYNC_ID_PREFIX):
+        return None
+    end = frame.find('"', len(SYNC_ID_PREFIX))
+    return frame[len(SYNC_ID_PREFIX):end] if end != -1 else None
+
+
+def peek_code(frame: Frame) -> int | None:
+    """
+    读出仅含 `code` 和 `msg` 的响应帧的状态码，如 ``{"syncId":"5","data":{"code":0,"msg":""}}``。
+    若帧还包含其他内容，则返回 `None`。
+    """
+    if not isinstance(frame, str):
+        data = frame['data']
+        return data['code'] if data.keys() == {'code', 'msg'} else None
+    match = CODE_ONLY_PATTERN.fullmatch(frame)
+    return int(match[1]) if match is not None else None
+
+
+def peek_shard_key(frame: Frame) -> int:
+    """
+    不解析 JSON，读出推送所属的会话：群相关的推送返回群号，私聊推送返回对方的 QQ 号，无法确定时返回 0。
+    同一个群的推送总是得到相同的结果，可用于将推送分片到不同的进程。
+    """
+    text = frame if isinstance(frame, str) else json.dumps(frame, separators=(',', ':'))
+    for pattern in SHARD_KEY_PATTERNS:
+        match = pattern.search(text)
+        if match is not None:
+            return int(match[1])
+    return 0
+
+
+def load_frame(frame: Frame) -> dict[str, Any]:
+    """完整解析帧"""
+    return cast(dict[str, Any], json.loads(frame)) if isinstance(frame, str) else frame
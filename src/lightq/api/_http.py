@@ -0,0 +1,195 @@
+import asyncio
+import json
+import ssl
+import urllib.parse
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable
+
+__all__ = ['HttpException', 'HttpResponse', 'HttpClient']
+
+
+class HttpException(Exception):
+    """HTTP 状态码不为 2xx"""
+
+    def __init__(self, status: int, reason: str, body: bytes):
+        super().__init__(f'HTTP {status} {reason}')
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    reason: str
+    headers: dict[str, str] = field(default_factory=dict)
+    """响应头，键均为小写"""
+
+    body: bytes = b''
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+    def raise_for_status(self):
+        if not 200 <= self.status < 300:
+            raise HttpException(self.status, self.reason, self.body)
+
+
+class Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @property
+    def reusable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    def close(self):
+        self.writer.close()
+
+
+class HttpClient:
+    """
+    基于 asyncio stream 的 HTTP/1.1 客户端，复用 keep-alive 连接。
+
+    空闲连接会被放回连接池供后续请求复用，同时进行中的请求数不超过 `max_connections`。
+    """
+
+    def __init__(self, base_url: str, max_connections: int = 8):
+        url = urllib.parse.urlsplit(base_url)
+        if url.scheme not in ('http', 'https'):
+            raise ValueError(f'unsupported scheme: {url.scheme!r}')
+        self.host = url.hostname or 'localhost'
+        self.port = url.port or (443 if url.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if url.scheme == 'https' else None
+        self.max_connections = max_connections
+        self.__idle: deque[Connection] = deque()
+        self.__semaphore = asyncio.Semaphore(max_connections)
+
+    @property
+    def idle_connections(self) -> int:
+        return len(self.__idle)
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        query: dict[str, Any] | None = None,
+        body: bytes | AsyncIterable[bytes] | None = None,
+        headers: dict[str, str] | None = None
+    ) -> HttpResponse:
+        """
+        发送 HTTP 请求。
+
+        :param body: 请求体。若为异步可迭代对象，则以 chunked 编码分块发送，不会一次性读入内存
+        """
+        if query:
+            path = f'{path}?{urllib.parse.urlencode(query)}'
+        async with self.__semaphore:
+            while True:
+                connection, reused = await self.__acquire()
+                try:
+                    response, keep_alive = await self.__exchange(connection, method, path, body, headers or {})
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection.close()
+                    # 服务器可能已经关闭了空闲的 keep-alive 连接，此时换一条新连接重试（流式请求体无法重放）
+                    if reused and not isinstance(body, AsyncIterable):
+                        continue
+                    raise
+                except BaseException:
+                    connection.close()
+                    raise
+                if keep_alive and connection.reusable:
+                    self.__idle.append(connection)
+                else:
+                    connection.close()
+                return response
+
+    async def __acquire(self) -> tuple[Connection, bool]:
+        while len(self.__idle) > 0:
+            connection = self.__idle.pop()
+            if connection.reusable:
+                return connection, True
+            connection.close()
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        return Connection(reader, writer), False
+
+    async def __exchange(
+        self,
+        connection: Connection,
+        method: str,
+        path: str,
+        body: bytes | AsyncIterable[bytes] | None,
+        headers: dict[str, str]
+    ) -> tuple[HttpResponse, bool]:
+        writer = connection.writer
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', 'Connection: keep-alive']
+        lines.extend(f'{name}: {value}' for name, value in headers.items())
+        if isinstance(body, AsyncIterable):
+            lines.append('Transfer-Encoding: chunked')
+        else:
+            lines.append(f'Content-Length: {len(body) if body is not None else 0}')
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if isinstance(body, AsyncIterable):
+            async for chunk in body:
+                if len(chunk) == 0:
+                    continue
+                writer.write(b'%x\r\n' % len(chunk))
+                writer.write(chunk)
+                writer.write(b'\r\n')
+                await writer.drain()  # 等待缓冲区写出，避免大文件堆积在内存中
+            writer.write(b'0\r\n\r\n')
+        elif body is not None:
+            writer.write(body)
+        await writer.drain()
+        return await self.__read_response(connection.reader, method)
+
+    @staticmethod
+    async def __read_response(reader: asyncio.StreamReader, method: str) -> tuple[HttpResponse, bool]:
+        status_line = (await reader.readuntil(b'\r\n')).decode('latin-1').rstrip('\r\n')
+        version, status, *reason = status_line.split(' ', 2)
+        response = HttpResponse(int(status), reason[0] if reason else '')
+        while True:
+            line = (await reader.readuntil(b'\r\n')).decode('latin-1').rstrip('\r\n')
+            if line == '':
+                break
+            name, _, value = line.partition(':')
+            response.headers[name.strip().lower()] = value.strip()
+        connection_header = response.headers.get('connection', '').lower()
+        keep_alive = connection_header != 'close' if version == 'HTTP/1.1' else connection_header == 'keep-alive'
+        if method == 'HEAD' or response.status in (204, 304) or 100 <= response.status < 200:
+            return response, keep_alive
+        if response.headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';', 1)[0], 16)
+                if size == 0:
+                    while await reader.readuntil(b'\r\n') != b'\r\n':  # trailers
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            response.body = b''.join(chunks)
+        elif 'content-length' in response.headers:
+            response.body = await reader.readexactly(int(response.headers['content-length']))
+        else:  # 读到连接关闭为止
+            response.body = await reader.read()
+            keep_alive = False
+        return response, keep_alive
+
+    async def close(self):
+        while len(self.__idle) > 0:
+            connection = self.__idle.pop()
+            connection.close()
+            try:
+                await connection.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
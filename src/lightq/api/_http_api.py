@@ -0,0 +1,258 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, cast
+
+from ..entities import Message, Event, SyncMessage, UnsupportedEntity
+from ..exceptions import MiraiApiException
+from ..logging import logger
+from ._base import BaseApi, push_from_json
+from ._frame import Frame
+from ._http import HttpClient
+from ._media_cache import MediaCache
+from ._upload import post_multipart
+
+# 使用 GET 方法的命令，其余命令均使用 POST 方法
+GET_COMMANDS = frozenset({
+    'messageFromId',
+    'botList',
+    'friendList',
+    'groupList',
+    'memberList',
+    'latestMemberList',
+    'botProfile',
+    'friendProfile',
+    'memberProfile',
+    'userProfile',
+    'countMessage',
+    'fetchMessage',
+    'fetchLatestMessage',
+    'peekMessage',
+    'peekLatestMessage',
+    'sessionInfo',
+    'anno_list',
+    'file_list',
+    'file_info'
+})
+
+
+def command_to_path(command: str) -> str:
+    """
+    将 WebSocket 适配器的命令字转换为 HTTP 适配器的路径
+
+    Examples:
+    ::
+        command_to_path('friendList') == '/friendList'
+        command_to_path('anno_list') == '/anno/list'
+    """
+    return '/' + command.replace('_', '/')
+
+
+def command_method(command: str, sub_command: str | None = None) -> str:
+    if sub_command is not None:  # groupConfig, memberInfo 等命令通过子命令区分读写
+        return 'GET' if sub_command == 'get' else 'POST'
+    return 'GET' if command in GET_COMMANDS else 'POST'
+
+
+class MiraiHttpApi(BaseApi):
+    """
+    mirai-api-http 的 HTTP 适配器。
+
+    命令通过 keep-alive 连接池发送，推送则通过 `fetchMessage` 轮询批量获取，命令的并发数与推送的接收互不影响。
+    """
+
+    def __init__(
+        self,
+        bot_id: int,
+        verify_key: str,
+        base_url: str = 'http://localhost:8080',
+        max_connections: int = 8,
+        fetch_count: int = 10,
+        poll_interval: float = 0.5
+    ):
+        """
+        :param max_connections: 连接池的最大连接数
+        :param fetch_count: 每次 `fetchMessage` 获取的最大推送数
+        :param poll_interval: 没有新推送时，两次轮询之间的间隔（秒）
+        """
+        self.bot_id = bot_id
+        self.verify_key = verify_key
+        self.base_url = base_url
+        self.fetch_count = fetch_count
+        self.poll_interval = poll_interval
+        self.__client = HttpClient(base_url, max_connections)
+        self.__session_key: str | None = None
+        self.__buffer: deque[dict[str, Any]] = deque()
+        self.__connect_lock = asyncio.Lock()
+        self.__closed = False
+        self.__pending = 0
+        self.media_cache: MediaCache | None = MediaCache()
+
+    @property
+    def session_key(self) -> str | None: return self.__session_key
+
+    @property
+    def max_connections(self) -> int: return self.__client.max_connections
+
+    @property
+    def pending_responses(self) -> int: return self.__pending
+
+    @property
+    def queued_pushes(self) -> int: return len(self.__buffer)
+
+    async def __post(self, path: str, content: dict[str, Any]) -> dict[str, Any]:
+        response = await self.__client.request(
+            'POST', path,
+            body=json.dumps(content).encode(),
+            headers={'Content-Type': 'application/json'}
+        )
+        response.raise_for_status()
+        return cast(dict[str, Any], response.json())
+
+    async def __get(self, path: str, query: dict[str, Any]) -> dict[str, Any]:
+        response = await self.__client.request('GET', path, query=query)
+        response.raise_for_status()
+        return cast(dict[str, Any], response.json())
+
+    @staticmethod
+    def __check(response: dict[str, Any]) -> dict[str, Any]:
+        if 'code' not in response:  # 有的响应不含 code 字段
+            return response
+        if response['code'] == 0:
+            return response
+        else:
+            raise MiraiApiException.from_response(response)
+
+    async def connect(self):
+        """认证并绑定 session。如果已经绑定，则什么也不做。"""
+        if self.__session_key is not None:
+            return
+        async with self.__connect_lock:  # 避免并发调用时重复认证
+            if self.__session_key is not None:
+                return
+            verified = self.__check(await self.__post('/verify', {'verifyKey': self.verify_key}))
+            session_key = cast(str, verified['session'])
+            self.__check(await self.__post('/bind', {'sessionKey': session_key, 'qq': self.bot_id}))
+            self.__session_key = session_key
+            self.__closed = False
+
+    async def close(self):
+        """释放 session 并关闭连接池。如果已经关闭，则什么也不做。"""
+        self.__closed = True
+        session_key = self.__session_key
+        self.__session_key = None
+        self.__buffer.clear()
+        try:
+            if session_key is not None:
+                await self.__post('/release', {'sessionKey': session_key, 'qq': self.bot_id})
+        finally:
+            await self.__client.close()
+
+    async def send_command(
+        self,
+        command: str,
+        content: dict[str, Any] | None = None,
+        sub_command: str | None = None
+    ) -> dict[str, Any]:
+        """
+        通过 HTTP 适配器执行命令，命令字与 WebSocket 适配器相同。
+
+        :returns: 若状态码为 0 则将响应的 JSON 返回
+        :raises:
+            MiraiApiException: 若状态码非 0 则抛出对应的异常
+            HttpException: HTTP 状态码不为 2xx 时抛出
+        """
+        if self.tracer is None:
+            return await self.__send_command(command, content, sub_command)
+        with self.tracer.start_as_current_span('lightq.command', attributes={
+            'lightq.command': command,
+            'lightq.sub_command': sub_command or ''
+        }):
+            return await self.__send_command(command, content, sub_command)
+
+    async def __send_command(
+        self,
+        command: str,
+        content: dict[str, Any] | None,
+        sub_command: str | None
+    ) -> dict[str, Any]:
+        start = time.perf_counter()
+        self.__pending += 1
+        try:
+            await self.connect()
+            content = {**(content or {}), 'sessionKey': self.__session_key}
+            path = command_to_path(command)
+            logger.info(f'http send: {command} {content}')
+            if command_method(command, sub_command) == 'GET':
+                query = {key: value for key, value in content.items() if value is not None}
+                response = await self.__get(path, query)
+            else:
+                response = await self.__post(path, content)
+            return self.__check(response)
+        finally:
+            self.__pending -= 1
+            if self.metrics is not None:
+                self.metrics.command_seconds.observe(
+                    time.perf_counter() - start,
+                    command=command if sub_command is None else f'{command}.{sub_command}'
+                )
+
+    __send_command__ = send_command
+
+    async def __upload__(
+        self,
+        path: str,
+        fields: dict[str, str],
+        file_field: str,
+        filename: str,
+        chunks: AsyncIterable[bytes]
+    ) -> dict[str, Any]:
+        await self.connect()
+        assert self.__session_key is not None
+        fields = {'sessionKey': self.__session_key, **fields}
+        logger.info(f'http upload: {path} {fields}')
+        return await post_multipart(self.__client, path, fields, file_field, filename, chunks)
+
+    async def fetch_message(self, count: int) -> list[dict[str, Any]]:
+        """获取并移除队列中最早的 `count` 条推送"""
+        return (await self.send_command('fetchMessage', {'count': count}))['data']
+
+    async def recv(self) -> Message | Event | SyncMessage | UnsupportedEntity:
+        """
+        接收一条推送。缓冲区为空时通过 `fetchMessage` 批量拉取，若没有新推送则等待 `poll_interval` 秒后再次拉取。
+
+        :raises ConnectionAbortedError: 已调用 `close` 方法（且之后未调用 `connect` 方法）时抛出
+        """
+        return push_from_json(cast(dict[str, Any], (await self.recv_frame())['data']))
+
+    async def recv_frame(self) -> Frame:
+        """
+        接收一条推送，以与 WebSocket 适配器相同的帧格式（已解析的字典）返回
+
+        :raises ConnectionAbortedError: 已调用 `close` 方法（且之后未调用 `connect` 方法）时抛出
+        """
+        while len(self.__buffer) == 0:
+            if self.__closed:
+                raise ConnectionAbortedError('MiraiHttpApi is closed')
+            await self.connect()
+            pushes = await self.fetch_message(self.fetch_count)
+            logger.info(f'http fetch: {pushes}')
+            self.__buffer.extend(pushes)
+            if len(pushes) == 0:
+                await asyncio.sleep(self.poll_interval)
+        frame = {'syncId': '-1', 'data': self.__buffer.popleft()}
+        self.__push_received__(frame)
+        return frame
+
+    def __aiter__(self) -> AsyncIterator[Message | Event | SyncMessage | UnsupportedEntity]:
+        async def generator():
+            while True:
+                try:
+                    yield await self.recv()
+                except ConnectionAbortedError:
+                    if self.__closed:
+                        break
+                    raise
+
+        return aiter(generator())
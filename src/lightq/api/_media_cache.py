@@ -0,0 +1,196 @@
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+__all__ = ['MediaCache', 'SqliteMediaCache']
+
+
+class MediaCache:
+    """
+    已上传媒体的 id 缓存（内存），以媒体种类、上传类型和内容的 SHA-256 为键。
+
+    同一张图片重复发送时直接使用缓存的 id，无需再次上传。此外还缓存了本地文件（按路径、大小和修改时间区分）的
+    SHA-256，文件未修改时无需重新计算哈希。
+
+    :param max_entries: 最多缓存的 id 数，超出时淘汰最久未使用的条目，为 `None` 时不限制
+    :param max_age: id 的有效期（秒），超过有效期的 id 不再使用，为 `None` 时不限制
+    """
+
+    def __init__(self, max_entries: int | None = None, max_age: float | None = None):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.__ids: OrderedDict[str, tuple[str, float]] = OrderedDict()  # key => (media id, created time)
+        self.__digests: OrderedDict[str, tuple[int, int, str]] = OrderedDict()  # path => (size, mtime, digest)
+
+    def get(self, key: str) -> str | None:
+        entry = self.__ids.get(key)
+        if entry is None:
+            return None
+        media_id, created = entry
+        if self.max_age is not None and time.time() - created > self.max_age:
+            del self.__ids[key]
+            return None
+        self.__ids.move_to_end(key)
+        return media_id
+
+    def put(self, key: str, media_id: str):
+        self.__ids[key] = (media_id, time.time())
+        self.__ids.move_to_end(key)
+        if self.max_entries is not None:
+            while len(self.__ids) > self.max_entries:
+                self.__ids.popitem(last=False)
+
+    def discard(self, key: str):
+        self.__ids.pop(key, None)
+
+    def get_file_digest(self, path: str, size: int, mtime_ns: int) -> str | None:
+        entry = self.__digests.get(path)
+        if entry is None or entry[:2] != (size, mtime_ns):
+            return None
+        self.__digests.move_to_end(path)
+        return entry[2]
+
+    def put_file_digest(self, path: str, size: int, mtime_ns: int, digest: str):
+        self.__digests[path] = (size, mtime_ns, digest)
+        self.__digests.move_to_end(path)
+        if self.max_entries is not None:
+            while len(self.__digests) > self.max_entries:
+                self.__digests.popitem(last=False)
+
+    def clear(self):
+        self.__ids.clear()
+        self.__digests.clear()
+
+    def __len__(self) -> int:
+        return len(self.__ids)
+
+
+class SqliteMediaCache(MediaCache):
+    """
+    持久化到 SQLite 数据库的媒体 id 缓存，bot 重启后仍然有效。
+
+    查询通过数据库索引进行，启动时无需扫描缓存内容或重新计算文件哈希。
+
+    :param path: 数据库文件路径
+    :param max_entries: 最多缓存的 id 数，超出时淘汰最久未使用的条目，为 `None` 时不限制。缓存的文件哈希数也以此为上限
+    :param max_age: id 的有效期（秒），超过有效期的 id 会被删除，为 `None` 时不限制。早于此时间缓存的文件哈希也会被删除
+    """
+
+    def __init__(self, path: str | os.PathLike[str], max_entries: int | None = None, max_age: float | None = None):
+        # 不调用 super().__init__，缓存内容全部保存在数据库中
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.path = path
+        self.__db = sqlite3.connect(path)
+        self.__db.execute('PRAGMA journal_mode=WAL')
+        with self.__db:
+            self.__db.execute(
+                'CREATE TABLE IF NOT EXISTS media ('
+                'key TEXT PRIMARY KEY, media_id TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL)'
+            )
+            self.__db.execute('CREATE INDEX IF NOT EXISTS media_last_used ON media (last_used)')
+            self.__db.execute(
+                'CREATE TABLE IF NOT EXISTS file_digest ('
+                'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL, '
+                'created REAL NOT NULL)'
+            )
+            self.__db.execute('CREATE INDEX IF NOT EXISTS file_digest_created ON file_digest (created)')
+        self.__count: int = self.__db.execute('SELECT COUNT(*) FROM media').fetchone()[0]
+        self.__digest_count: int = self.__db.execute('SELECT COUNT(*) FROM file_digest').fetchone()[0]
+        self.__evict()
+        self.__evict_file_digests()
+
+    def get(self, key: str) -> str | None:
+        row = self.__db.execute('SELECT media_id, created FROM media WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        media_id, created = row
+        now = time.time()
+        with self.__db:
+            if self.max_age is not None and now - created > self.max_age:
+                self.__db.execute('DELETE FROM media WHERE key = ?', (key,))
+                self.__count -= 1
+                return None
+            self.__db.execute('UPDATE media SET last_used = ? WHERE key = ?', (now, key))
+        return media_id
+
+    def put(self, key: str, media_id: str):
+        now = time.time()
+        with self.__db:
+            cursor = self.__db.execute(
+                'INSERT OR IGNORE INTO media (key, media_id, created, last_used) VALUES (?, ?, ?, ?)',
+                (key, media_id, now, now)
+            )
+            if cursor.rowcount == 0:
+                self.__db.execute(
+                    'UPDATE media SET media_id = ?, created = ?, last_used = ? WHERE key = ?',
+                    (media_id, now, now, key)
+                )
+            else:
+                self.__count += 1
+        self.__evict()
+
+    def discard(self, key: str):
+        with self.__db:
+            self.__count -= self.__db.execute('DELETE FROM media WHERE key = ?', (key,)).rowcount
+
+    def __evict(self):
+        with self.__db:
+            if self.max_age is not None:
+                self.__count -= self.__db.execute(
+                    'DELETE FROM media WHERE created < ?', (time.time() - self.max_age,)
+                ).rowcount
+            if self.max_entries is not None and self.__count > self.max_entries:
+                self.__count -= self.__db.execute(
+                    'DELETE FROM media WHERE key IN (SELECT key FROM media ORDER BY last_used LIMIT ?)',
+                    (self.__count - self.max_entries,)
+                ).rowcount
+
+    def __evict_file_digests(self):
+        with self.__db:
+            if self.max_age is not None:
+                self.__digest_count -= self.__db.execute(
+                    'DELETE FROM file_digest WHERE created < ?', (time.time() - self.max_age,)
+                ).rowcount
+            if self.max_entries is not None and self.__digest_count > self.max_entries:
+                self.__digest_count -= self.__db.execute(
+                    'DELETE FROM file_digest WHERE path IN (SELECT path FROM file_digest ORDER BY created LIMIT ?)',
+                    (self.__digest_count - self.max_entries,)
+                ).rowcount
+
+    def get_file_digest(self, path: str, size: int, mtime_ns: int) -> str | None:
+        row = self.__db.execute(
+            'SELECT digest FROM file_digest WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (path, size, mtime_ns)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def put_file_digest(self, path: str, size: int, mtime_ns: int, digest: str):
+        now = time.time()
+        with self.__db:
+            cursor = self.__db.execute(
+                'INSERT OR IGNORE INTO file_digest (path, size, mtime_ns, digest, created) VALUES (?, ?, ?, ?, ?)',
+                (path, size, mtime_ns, digest, now)
+            )
+            if cursor.rowcount == 0:
+                self.__db.execute(
+                    'UPDATE file_digest SET size = ?, mtime_ns = ?, digest = ?, created = ? WHERE path = ?',
+                    (size, mtime_ns, digest, now, path)
+                )
+            else:
+                self.__digest_count += 1
+        self.__evict_file_digests()
+
+    def clear(self):
+        with self.__db:
+            self.__db.execute('DELETE FROM media')
+            self.__db.execute('DELETE FROM file_digest')
+        self.__count = 0
+        self.__digest_count = 0
+
+    def close(self):
+        self.__db.close()
+
+    def __len__(self) -> int:
+        return self.__count
@@ -0,0 +1,238 @@
+import abc
+import asyncio
+import hashlib
+import os
+import uuid
+import urllib.parse
+from typing import Any, AsyncIterable, AsyncIterator, Literal
+
+from ..entities import Image, FlashImage, Voice
+from ..exceptions import MiraiApiException
+from ._http import HttpClient
+from ._media_cache import MediaCache
+
+__all__ = ['MediaSource', 'UploadMixin']
+
+MediaSource = str | os.PathLike[str] | bytes | AsyncIterable[bytes]
+"""本地文件路径、文件内容，或按块产生文件内容的异步可迭代对象"""
+
+CHUNK_SIZE = 64 * 1024
+
+
+def media_key(media: str, kind: str, digest: str) -> str:
+    return f'{media}:{kind}:{digest}'
+
+
+async def read_file_chunks(path: str | os.PathLike[str]) -> AsyncIterator[bytes]:
+    """在线程池中分块读取文件，不阻塞事件循环，也不会一次性读入整个文件"""
+    with open(path, 'rb') as file:
+        while True:
+            chunk = await asyncio.to_thread(file.read, CHUNK_SIZE)
+            if len(chunk) == 0:
+                break
+            yield chunk
+
+
+async def iterate_chunks(source: MediaSource) -> AsyncIterator[bytes]:
+    if isinstance(source, bytes):
+        for start in range(0, len(source), CHUNK_SIZE):
+            yield source[start:start + CHUNK_SIZE]
+    elif isinstance(source, AsyncIterable):
+        async for chunk in source:
+            yield chunk
+    else:
+        async for chunk in read_file_chunks(source):
+            yield chunk
+
+
+async def hash_chunks(chunks: AsyncIterable[bytes], digest: 'hashlib._Hash') -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        digest.update(chunk)
+        yield chunk
+
+
+async def content_digest(source: str | os.PathLike[str] | bytes, cache: MediaCache | None = None) -> str:
+    """计算内容的 SHA-256。若 `source` 为文件路径且文件未被修改，则直接使用 `cache` 中记录的结果"""
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    path = os.path.abspath(source)
+    stat = await asyncio.to_thread(os.stat, path)
+    if cache is not None:
+        cached = cache.get_file_digest(path, stat.st_size, stat.st_mtime_ns)
+        if cached is not None:
+            return cached
+    digest = hashlib.sha256()
+    async for chunk in read_file_chunks(path):
+        digest.update(chunk)
+    if cache is not None:
+        cache.put_file_digest(path, stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+    return digest.hexdigest()
+
+
+async def multipart_body(
+    boundary: str,
+    fields: dict[str, str],
+    file_field: str,
+    filename: str,
+    chunks: AsyncIterable[bytes]
+) -> AsyncIterator[bytes]:
+    """以 multipart/form-data 格式逐块产生请求体，文件内容边读边发"""
+    for name, value in fields.items():
+        yield (f'--{boundary}\r\n'
+               f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+               f'{value}\r\n').encode()
+    yield (f'--{boundary}\r\n'
+           f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+           'Content-Type: application/octet-stream\r\n\r\n').encode()
+    async for chunk in chunks:
+        yield chunk
+    yield f'\r\n--{boundary}--\r\n'.encode()
+
+
+def source_filename(source: MediaSource, default: str) -> str:
+    if isinstance(source, str | os.PathLike):
+        return urllib.parse.quote(os.path.basename(os.fspath(source)))
+    return default
+
+
+async def post_multipart(
+    client: HttpClient,
+    path: str,
+    fields: dict[str, str],
+    file_field: str,
+    filename: str,
+    chunks: AsyncIterable[bytes]
+) -> dict[str, Any]:
+    boundary = uuid.uuid4().hex
+    response = await client.request(
+        'POST', path,
+        body=multipart_body(boundary, fields, file_field, filename, chunks),
+        headers={'Content-Type': f'multipart/form-data; boundary={boundary}'}
+    )
+    response.raise_for_status()
+    result: dict[str, Any] = response.json()
+    if result.get('code', 0) != 0:
+        raise MiraiApiException.from_response(result)
+    return result
+
+
+class UploadMixin:
+    """
+    媒体上传。mirai-api-http 只在 HTTP 适配器中提供上传接口，文件以 multipart/form-data 格式流式上传。
+
+    上传得到的 image id 和 voice id 会以内容的 SHA-256 为键缓存在 `media_cache` 中，
+    将 `media_cache` 设为 `None` 可以禁用缓存，设为 `SqliteMediaCache` 可以在重启后继续使用缓存。
+    """
+
+    media_cache: MediaCache | None
+
+    @abc.abstractmethod
+    async def __upload__(
+        self,
+        path: str,
+        fields: dict[str, str],
+        file_field: str,
+        filename: str,
+        chunks: AsyncIterable[bytes]
+    ) -> dict[str, Any]:
+        """以 multipart/form-data 格式 POST 到 HTTP 适配器的 `path`，`fields` 中无需包含 sessionKey"""
+        raise NotImplementedError
+
+    async def __upload_cached(
+        self,
+        media: str,
+        kind: str,
+        source: MediaSource,
+        path: str,
+        file_field: str,
+        id_field: str
+    ) -> str:
+        cache = self.media_cache
+        fields = {'type': kind}
+        filename = source_filename(source, media)
+        if cache is None:
+            return (await self.__upload__(path, fields, file_field, filename, iterate_chunks(source)))[id_field]
+        if isinstance(source, AsyncIterable):  # 内容只能读取一次，边上传边计算哈希
+            digest = hashlib.sha256()
+            result = await self.__upload__(
+                path, fields, file_field, filename, hash_chunks(iterate_chunks(source), digest)
+            )
+            media_id: str = result[id_field]
+            cache.put(media_key(media, kind, digest.hexdigest()), media_id)
+            return media_id
+        key = media_key(media, kind, await content_digest(source, cache))
+        media_id_or_none = cache.get(key)
+        if media_id_or_none is not None:
+            return media_id_or_none
+        media_id = (await self.__upload__(path, fields, file_field, filename, iterate_chunks(source)))[id_field]
+        cache.put(key, media_id)
+        return media_id
+
+    async def upload_image(self, source: MediaSource, kind: Literal['friend', 'group', 'temp'] = 'group') -> str:
+        """
+        上传图片文件，返回 image id
+
+        :param source: 本地文件路径、文件内容，或按块产生文件内容的异步可迭代对象
+        :param kind: 图片的用途，可选值 friend, group, temp，不同用途的 image id 不能混用
+        """
+        return await self.__upload_cached('image', kind, source, '/uploadImage', 'img', 'imageId')
+
+    async def upload_voice(self, source: MediaSource, kind: Literal['group'] = 'group') -> str:
+        """
+        上传语音文件，返回 voice id
+
+        :param source: 本地文件路径、文件内容，或按块产生文件内容的异步可迭代对象
+        :param kind: 语音的用途，当前仅支持 group
+        """
+        return await self.__upload_cached('voice', kind, source, '/uploadVoice', 'voice', 'voiceId')
+
+    async def upload_file(
+        self,
+        group_id: int,
+        source: MediaSource,
+        name: str | None = None,
+        directory: str = ''
+    ) -> str:
+        """
+        上传群文件，返回文件 id
+
+        :param group_id: 群号
+        :param source: 本地文件路径、文件内容，或按块产生文件内容的异步可迭代对象
+        :param name: 群文件的文件名，若 `source` 为文件路径则默认使用该文件的文件名
+        :param directory: 上传到的目录 id，空串为根目录
+        """
+        filename = urllib.parse.quote(name) if name is not None else source_filename(source, 'file')
+        result = await self.__upload__(
+            '/file/upload',
+            {'type': 'group', 'target': str(group_id), 'path': directory},
+            'file',
+            filename,
+            iterate_chunks(source)
+        )
+        return result['data']['id']
+
+    async def build_image(self, source: MediaSource, kind: Literal['friend', 'group', 'temp'] = 'group') -> Image:
+        """
+        上传图片（若缓存中已有相同内容的图片则跳过上传），并创建对应的 `Image` 消息元素
+
+        :param source: 本地文件路径、文件内容，或按块产生文件内容的异步可迭代对象
+        :param kind: 图片的用途，可选值 friend, group, temp
+        """
+        return Image(image_id=await self.upload_image(source, kind))
+
+    async def build_flash_image(
+        self,
+        source: MediaSource,
+        kind: Literal['friend', 'group', 'temp'] = 'group'
+    ) -> FlashImage:
+        """同 `build_image`，但创建的是 `FlashImage` 消息元素"""
+        return FlashImage(image_id=await self.upload_image(source, kind))
+
+    async def build_voice(self, source: MediaSource, kind: Literal['group'] = 'group') -> Voice:
+        """
+        上传语音（若缓存中已有相同内容的语音则跳过上传），并创建对应的 `Voice` 消息元素
+
+        :param source: 本地文件路径、文件内容，或按块产生文件内容的异步可迭代对象
+        :param kind: 语音的用途，当前仅支持 group
+        """
+        return Voice(voice_id=await self.upload_voice(source, kind))
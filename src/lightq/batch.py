@@ -0,0 +1,318 @@
+"""
+离线批处理：不连接 mirai-api-http，用同一套处理器处理归档的推送（如补做审核、统计分析），收集处理器的响应。
+
+推送按块解码和处理：每个块在一次事件循环调用中顺序路由和调用处理器，不为每条推送创建任务，也不发送响应。
+若 bot 只使用按类型路由的默认路由器，则没有处理器的类型的推送只解析 JSON 而不转换为实体对象（转换是处理推送时最主要的开销）。
+指定 `workers` 时，各块分摊到进程池中，每个工作进程各自调用 `setup` 创建一个 bot。
+
+处理器中调用的命令（如 `recall`）不会被执行，一律返回成功，次数记录在 `BatchRunner.command_counts` 中。
+
+Examples:
+::
+    # 使用进程池时必须定义在模块顶层，工作进程会按名称导入该函数
+    def setup(bot: Bot):
+        bot.add_all(scan_handlers(my_handlers))
+
+    if __name__ == '__main__':
+        runner = BatchRunner(setup, workers=4)
+        for result in runner.process(read_lines('archive.jsonl')):
+            print(result.index, result.handler, result.response)
+"""
+
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import multiprocessing
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, cast
+
+from .api import BaseApi
+from .api._base import push_from_json
+from .api._frame import Frame, load_frame
+from . import entities
+from .entities import Message, Event, SyncMessage, UnsupportedEntity, MessageChain
+from .framework import Bot, RecvContext
+from .framework._router import TypeRouterMixin
+
+__all__ = ['BatchRunner', 'BatchResult', 'OfflineApi', 'read_lines']
+
+Setup = Callable[[Bot], Any]
+Push = str | dict[str, Any]
+"""推送的 JSON 文本或已经解析的 JSON 对象，可以是完整的帧（含 `syncId` 和 `data`），也可以只是 `data` 部分"""
+
+
+class OfflineApi(BaseApi):
+    """
+    不连接 mirai-api-http 的适配器：没有推送，命令不会被执行，一律返回成功（发送消息的命令返回递增的 message id），
+    上传媒体文件时抛出 `NotImplementedError`。
+
+    :param bot_id: bot 的 QQ 号
+    """
+
+    def __init__(self, bot_id: int = 0):
+        self.bot_id = bot_id
+        self.verify_key = ''
+        self.base_url = 'offline:'
+        self.command_counts: dict[str, int] = {}
+        """命令 => 收到的次数"""
+        self.__message_ids = itertools.count(1)
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def recv_frame(self) -> Frame:
+        """
+        :raises ConnectionAbortedError: 总是抛出
+        """
+        raise ConnectionAbortedError('OfflineApi has no pushes')
+
+    async def recv(self) -> Message | Event | SyncMessage | UnsupportedEntity:
+        return push_from_json(cast(dict[str, Any], load_frame(await self.recv_frame())['data']))
+
+    def __aiter__(self) -> AsyncIterator[Message | Event | SyncMessage | UnsupportedEntity]:
+        async def generator():
+            while True:
+                try:
+                    yield await self.recv()
+                except ConnectionAbortedError:
+                    break
+
+        return aiter(generator())
+
+    async def send_command(
+        self,
+        command: str,
+        content: dict[str, Any] | None = None,
+        sub_command: str | None = None
+    ) -> dict[str, Any]:
+        """不执行命令，只记录命令的次数"""
+        key = command if sub_command is None else f'{command}.{sub_command}'
+        self.command_counts[key] = self.command_counts.get(key, 0) + 1
+        return {'code': 0, 'msg': 'success', 'messageId': next(self.__message_ids)}
+
+    __send_command__ = send_command
+
+    async def __upload__(
+        self,
+        path: str,
+        fields: dict[str, str],
+        file_field: str,
+        filename: str,
+        chunks: AsyncIterable[bytes]
+    ) -> dict[str, Any]:
+        raise NotImplementedError(f'{type(self).__name__} cannot upload media files')
+
+
+@dataclass(slots=True)
+class BatchResult:
+    """一条推送的处理结果"""
+
+    index: int
+    """推送在输入中的序号（从 0 开始）"""
+
+    type: str | None
+    """推送的类型，如 GroupMessage，解码失败时为 `None`"""
+
+    handler: str | None
+    """处理该推送的处理器名，没有处理器时为 `None`"""
+
+    response: MessageChain | None
+    """处理器的响应"""
+
+    error: str | None = None
+    """解码、路由或处理器抛出的异常（`repr`），没有异常时为 `None`"""
+
+
+def load(push: Push) -> dict[str, Any]:
+    data = json.loads(push) if isinstance(push, str) else push
+    if 'syncId' in data and 'data' in data:
+        data = data['data']
+    return data
+
+
+def routed_types(bot: Bot) -> set[str] | None:
+    """
+    可能被路由到处理器的推送类型名。若 bot 使用了其他路由器（无法预先知道会处理哪些推送），则返回 `None`
+    """
+    routers = [*bot.message_routers, *bot.event_routers]
+    if not all(isinstance(router, TypeRouterMixin) for router in routers):
+        return None
+    types = set()
+    for name, cls in [*entities.MESSAGE_CLASSES.items(), *entities.EVENT_CLASSES.items()]:
+        if any(base in cast(TypeRouterMixin, router).type_to_handlers for router in routers for base in cls.__mro__):
+            types.add(name)
+    return types
+
+
+async def process_chunk(
+    bot: Bot,
+    types: set[str] | None,
+    start: int,
+    pushes: list[Push],
+    unhandled: bool
+) -> list[BatchResult]:
+    results = []
+    for index, push in enumerate(pushes, start):
+        try:
+            data = load(push)
+            if types is not None and data['type'] not in types:  # 不会被路由到处理器，无需转换
+                if unhandled:
+                    results.append(BatchResult(index, data['type'], None, None))
+                continue
+            entity = push_from_json(data)
+        except Exception as e:
+            results.append(BatchResult(index, None, None, None, repr(e)))
+            continue
+        context = RecvContext(bot, entity)
+        handler = None
+        try:
+            handler = await bot.route(context)
+            if handler is None:
+                if unhandled:
+                    results.append(BatchResult(index, type(entity).__name__, None, None))
+                continue
+            response = await handler.handle(context)
+        except Exception as e:
+            results.append(BatchResult(
+                index, type(entity).__name__, handler.name if handler is not None else None, None, repr(e)
+            ))
+            continue
+        results.append(BatchResult(index, type(entity).__name__, handler.name, response))
+    return results
+
+
+def make_bot(setup: Setup) -> Bot:
+    bot = Bot.from_api(OfflineApi())
+    setup(bot)
+    bot.build()
+    return bot
+
+
+# 工作进程中的 bot、可能被路由到处理器的推送类型和事件循环，由 `init_worker` 创建
+worker_bot: Bot | None = None
+worker_types: set[str] | None = None
+worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+def init_worker(setup: Setup):
+    global worker_bot, worker_types, worker_loop
+    worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(worker_loop)
+    worker_bot = make_bot(setup)
+    worker_types = routed_types(worker_bot)
+
+
+def run_chunk(start: int, pushes: list[Push], unhandled: bool) -> tuple[list[BatchResult], dict[str, int]]:
+    """工作进程的入口，返回处理结果和本块中调用的命令数"""
+    assert worker_bot is not None and worker_loop is not None
+    api = cast(OfflineApi, worker_bot.api)
+    api.command_counts = {}
+    results = worker_loop.run_until_complete(process_chunk(worker_bot, worker_types, start, pushes, unhandled))
+    return results, api.command_counts
+
+
+class BatchRunner:
+    """
+    离线处理推送。`process` 和 `run` 是同步方法，不能在正在运行的事件循环中调用。
+
+    :param setup: 用于向 `Bot` 注册处理器。使用进程池时必须是模块顶层的函数（可被 pickle）
+    :param workers: 工作进程数，为 0 时在当前进程中处理，为 `None` 时使用 CPU 核心数
+    :param chunk_size: 每块的推送数
+    :param start_method: multiprocessing 的启动方式，默认为 spawn
+    """
+
+    def __init__(
+        self,
+        setup: Setup,
+        workers: int | None = 0,
+        chunk_size: int = 1000,
+        start_method: str = 'spawn'
+    ):
+        self.setup = setup
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = chunk_size
+        self.start_method = start_method
+        self.command_counts: dict[str, int] = {}
+        """处理器调用的命令 => 次数（命令不会被执行）"""
+
+    def process(self, pushes: Iterable[Push], unhandled: bool = False) -> Iterator[BatchResult]:
+        """
+        按输入顺序逐块产生处理结果。输入按需读取，同时只有有限个块在内存中，可用于处理任意大的归档。
+
+        :param pushes: 推送的序列
+        :param unhandled: 是否也产生没有处理器的推送的结果
+        """
+        chunks = chunked(pushes, self.chunk_size)
+        if self.workers == 0:
+            yield from self.__process_locally(chunks, unhandled)
+        else:
+            yield from self.__process_in_pool(chunks, unhandled)
+
+    def run(self, pushes: Iterable[Push], unhandled: bool = False) -> list[BatchResult]:
+        """同 `process`，但返回全部结果的列表"""
+        return list(self.process(pushes, unhandled))
+
+    def __process_locally(self, chunks: Iterator[tuple[int, list[Push]]], unhandled: bool) -> Iterator[BatchResult]:
+        loop = asyncio.new_event_loop()
+        try:
+            bot = make_bot(self.setup)
+            types = routed_types(bot)
+            api = cast(OfflineApi, bot.api)
+            for start, chunk in chunks:
+                api.command_counts = {}
+                results = loop.run_until_complete(process_chunk(bot, types, start, chunk, unhandled))
+                self.__count(api.command_counts)
+                yield from results
+        finally:
+            loop.close()
+
+    def __process_in_pool(self, chunks: Iterator[tuple[int, list[Push]]], unhandled: bool) -> Iterator[BatchResult]:
+        with concurrent.futures.ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=init_worker,
+            initargs=(self.setup,)
+        ) as executor:
+            pending: deque[concurrent.futures.Future] = deque()
+            for start, chunk in chunks:
+                pending.append(executor.submit(run_chunk, start, chunk, unhandled))
+                if len(pending) >= self.workers * 2:  # 限制在途的块数，保持输出顺序
+                    yield from self.__collect(pending.popleft())
+            while len(pending) > 0:
+                yield from self.__collect(pending.popleft())
+
+    def __collect(self, future: concurrent.futures.Future) -> list[BatchResult]:
+        results, command_counts = future.result()
+        self.__count(command_counts)
+        return results
+
+    def __count(self, command_counts: dict[str, int]):
+        for command, count in command_counts.items():
+            self.command_counts[command] = self.command_counts.get(command, 0) + count
+
+
+def chunked(pushes: Iterable[Push], size: int) -> Iterator[tuple[int, list[Push]]]:
+    """将推送分块，产生 `(块中第一条推送的序号, 块)`"""
+    iterator = iter(pushes)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if len(chunk) == 0:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def read_lines(path: str | os.PathLike[str]) -> Iterator[str]:
+    """逐行读出 JSON Lines 格式的归档文件（每行一条推送），跳过空行"""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if len(line) > 0:
+                yield line
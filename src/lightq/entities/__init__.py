@@ -1,6 +1,79 @@
+import importlib
+import typing
+
+from . import _commons, _element, _message, _sync_message
 from ._commons import *
 from ._entity import Entity, UnsupportedEntity
 from ._element import *
-from ._event import *
+from ._event_base import Event
 from ._message import *
 from ._sync_message import *
+
+if typing.TYPE_CHECKING:
+    from ._event import *
+
+# 具体的事件类（以及 `EVENT_CLASSES`）在首次访问时才导入，与 `_event.__all__` 中除 `Event` 外的名称相同
+_EVENT_NAMES = [
+    'EVENT_CLASSES',
+    'BotOnlineEvent',
+    'BotOfflineEventActive',
+    'BotOfflineEventForce',
+    'BotOfflineEventDropped',
+    'BotReloginEvent',
+    'FriendInputStatusChangedEvent',
+    'FriendNickChangedEvent',
+    'BotGroupPermissionChangeEvent',
+    'BotMuteEvent',
+    'BotUnmuteEvent',
+    'BotJoinGroupEvent',
+    'BotLeaveEventActive',
+    'BotLeaveEventKick',
+    'BotLeaveEventDisband',
+    'GroupRecallEvent',
+    'FriendRecallEvent',
+    'NudgeEvent',
+    'GroupNameChangeEvent',
+    'GroupEntranceAnnouncementChangeEvent',
+    'GroupMuteAllEvent',
+    'GroupAllowAnonymousChatEvent',
+    'GroupAllowConfessTalkEvent',
+    'GroupAllowMemberInviteEvent',
+    'MemberJoinEvent',
+    'MemberLeaveEventKick',
+    'MemberLeaveEventQuit',
+    'MemberCardChangeEvent',
+    'MemberSpecialTitleChangeEvent',
+    'MemberPermissionChangeEvent',
+    'MemberMuteEvent',
+    'MemberUnmuteEvent',
+    'MemberHonorChangeEvent',
+    'NewFriendRequestEvent',
+    'MemberJoinRequestEvent',
+    'BotInvitedJoinGroupRequestEvent',
+    'OtherClientOnlineEvent',
+    'OtherClientOfflineEvent',
+    'CommandExecutedEvent'
+]
+
+__all__ = [
+    *_commons.__all__,
+    'Entity',
+    'UnsupportedEntity',
+    *_element.__all__,
+    'Event',
+    *_EVENT_NAMES,
+    *_message.__all__,
+    *_sync_message.__all__
+]
+
+
+def __getattr__(name: str) -> typing.Any:
+    if name not in _EVENT_NAMES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module('._event', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_EVENT_NAMES})
@@ -1,12 +1,12 @@
 import abc
 import importlib
 from dataclasses import dataclass
-from typing import Any
 
 from . import _mixin as mixin
 from ._commons import Friend, Group, Member, Client
 from ._element import MessageChain
 from ._entity import Entity
+from ._event_base import Event
 
 __all__ = [
     'Event',
@@ -52,16 +52,6 @@ __all__ = [
 ]
 
 
-class Event(Entity, mixin.FromContextData, abc.ABC):
-    @abc.abstractclassmethod
-    def to_json(self) -> dict[str, Any]:
-        raise NotImplementedError
-
-    @classmethod
-    def from_json(cls, obj: dict[str, Any]) -> 'Event':
-        return event_from_json(obj)
-
-
 class AbstractEvent(mixin.FromJson, mixin.ToJson, Event, abc.ABC):
     pass
 
@@ -614,8 +604,3 @@ def make_event_class_dict() -> dict[str, type[Event]]:
 
 
 EVENT_CLASSES = make_event_class_dict()
-
-
-def event_from_json(obj: dict[str, Any]) -> Event:
-    cls = EVENT_CLASSES[obj['type']]
-    return cls.from_json(obj)
@@ -0,0 +1,28 @@
+import abc
+import importlib
+from typing import Any
+
+from . import _mixin as mixin
+from ._entity import Entity
+
+__all__ = ['Event']
+
+
+class Event(Entity, mixin.FromContextData, abc.ABC):
+    @abc.abstractclassmethod
+    def to_json(self) -> dict[str, Any]:
+        raise NotImplementedError
+
+    @classmethod
+    def from_json(cls, obj: dict[str, Any]) -> 'Event':
+        return event_from_json(obj)
+
+
+def event_classes() -> dict[str, type[Event]]:
+    """事件类型名 => 事件类。具体的事件类定义在 `_event` 模块中，首次调用时才导入"""
+    return importlib.import_module('._event', __package__).EVENT_CLASSES
+
+
+def event_from_json(obj: dict[str, Any]) -> Event:
+    cls = event_classes()[obj['type']]
+    return cls.from_json(obj)
@@ -1,13 +1,16 @@
-from typing import Callable, Type
+import collections
+from typing import Callable, Iterable, Type
 
 from . import resolvers
-from .framework import RecvContext, ExceptionContext, Bot
+from ._commons import IdToken
+from .framework import RecvContext, ExceptionContext, Bot, FilterCost, filter_cost
 from .entities import MessageElement, MessageChain
 
 
 def from_group(*group_id: int, all: bool = False) -> Callable[[RecvContext | ExceptionContext], bool]:
     group_set = set(group_id)
 
+    @filter_cost(FilterCost.CHEAP)
     def actual_filter(context: RecvContext | ExceptionContext) -> bool:
         gid = resolvers.get_group_id(context)
         if gid is None:
@@ -20,6 +23,7 @@ def from_group(*group_id: int, all: bool = False) -> Callable[[RecvContext | Exc
 def from_user(*user_id: int, all: bool = False) -> Callable[[RecvContext | ExceptionContext], bool]:
     user_set = set(user_id)
 
+    @filter_cost(FilterCost.CHEAP)
     def actual_filter(context: RecvContext | ExceptionContext) -> bool:
         uid = resolvers.get_sender_id(context)
         if uid is None:
@@ -30,6 +34,7 @@ def from_user(*user_id: int, all: bool = False) -> Callable[[RecvContext | Excep
 
 
 def chain_contains(item: MessageElement | Type[MessageElement]) -> Callable[[RecvContext | ExceptionContext], bool]:
+    @filter_cost(FilterCost.CHEAP)
     def actual_filter(context: RecvContext | ExceptionContext) -> bool:
         return item in MessageChain.from_context(context)
 
@@ -37,12 +42,141 @@ def chain_contains(item: MessageElement | Type[MessageElement]) -> Callable[[Rec
 
 
 def is_at_user(user_id: int) -> Callable[[RecvContext | ExceptionContext], bool]:
+    @filter_cost(FilterCost.CHEAP)
     def actual_filter(context: RecvContext | ExceptionContext) -> bool:
         return user_id in resolvers.at_targets(context)
 
     return actual_filter
 
 
+@filter_cost(FilterCost.CHEAP)
 def is_at_bot(context: RecvContext | ExceptionContext) -> bool:
     bot_id = Bot.from_context(context).bot_id
     return bot_id in resolvers.at_targets(context)
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick 自动机，构建后不再修改。一次扫描文本即可找出其中出现的全部关键词，
+    耗时只与文本长度和匹配数有关，与关键词的数量无关。
+    """
+
+    def __init__(self, words: Iterable[str], ignore_case: bool):
+        self.ignore_case = ignore_case
+        self.words: frozenset[str] = frozenset(word for word in words if len(word) > 0)
+        self.goto: list[dict[str, int]] = [{}]  # 状态 => {字符 => 下一个状态}，状态 0 为根
+        self.fail: list[int] = [0]
+        self.output: list[str | None] = [None]  # 以该状态结尾的关键词
+        self.output_link: list[int] = [0]  # 沿 fail 链最近的有输出的状态，0 表示没有
+        for word in self.words:
+            state = 0
+            for char in self.normalize(word):
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.output_link.append(0)
+                state = next_state
+            self.output[state] = word
+        queue = collections.deque(self.goto[0].values())  # 按广度优先的顺序计算 fail，根的子节点的 fail 为根
+        while len(queue) > 0:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail != 0 and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                fail = self.goto[fail].get(char, 0)
+                self.fail[next_state] = fail
+                self.output_link[next_state] = fail if self.output[fail] is not None else self.output_link[fail]
+
+    def normalize(self, text: str) -> str:
+        return text.casefold() if self.ignore_case else text
+
+    def find(self, text: str) -> list[str]:
+        """文本中出现的关键词，按首次出现（结尾）的位置排列，不重复"""
+        goto, fail, output, output_link = self.goto, self.fail, self.output, self.output_link
+        found: dict[str, None] = {}
+        state = 0
+        for char in self.normalize(text):
+            while state != 0 and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = state if output[state] is not None else output_link[state]
+            while match != 0:
+                found[output[match]] = None  # type: ignore[index]
+                match = output_link[match]
+        return list(found)
+
+
+class KeywordFilter:
+    """
+    关键词过滤器：消息文本中出现任一关键词时通过，用于审核等需要检查大量违禁词的场景。
+    关键词构建为 Aho-Corasick 自动机，每条消息只扫描一遍文本。
+
+    同一条推送的匹配结果会被缓存，作为过滤器使用后，处理器可以通过 `matched_words` 解析器得到匹配到的关键词而无需再次扫描。
+
+    关键词可以在运行中修改（`add`、`remove`、`set_words`）：修改时构建新的自动机后整体替换，正在进行的匹配不受影响。
+
+    Examples:
+    ::
+        banned = KeywordFilter(load_banned_words())
+
+        @resolve(banned.matched_words)
+        @message_handler(GroupMessage, filters=banned)
+        async def moderate(matched_words: list[str], ...) -> str:
+            ...
+
+    :param words: 关键词
+    :param ignore_case: 是否忽略大小写
+    :param extractor: 从消息链中提取被匹配的文本
+    """
+
+    filter_cost = FilterCost.NORMAL
+
+    def __init__(
+        self,
+        words: Iterable[str] = (),
+        ignore_case: bool = True,
+        extractor: Callable[[MessageChain], str] = MessageChain.__str__
+    ):
+        self.extractor = extractor
+        self.__automaton = KeywordAutomaton(words, ignore_case)
+        self.__token = IdToken('matched words of KeywordFilter')
+
+    @property
+    def words(self) -> frozenset[str]:
+        return self.__automaton.words
+
+    @property
+    def ignore_case(self) -> bool:
+        return self.__automaton.ignore_case
+
+    def set_words(self, words: Iterable[str]):
+        """替换全部关键词"""
+        self.__automaton = KeywordAutomaton(words, self.ignore_case)
+
+    def add(self, *words: str):
+        self.set_words(self.words.union(words))
+
+    def remove(self, *words: str):
+        self.set_words(self.words.difference(words))
+
+    def find(self, text: str) -> list[str]:
+        """文本中出现的关键词，按出现的位置排列，不重复"""
+        return self.__automaton.find(text)
+
+    def matched_words(self, context: RecvContext | ExceptionContext) -> list[str]:
+        """推送的消息中出现的关键词（解析器），结果对同一条推送缓存"""
+        if self.__token not in context.__dict__:
+            context.__dict__[self.__token] = self.find(self.extractor(MessageChain.from_context(context)))
+        return context.__dict__[self.__token]
+
+    def __call__(self, context: RecvContext | ExceptionContext) -> bool:
+        return len(self.matched_words(context)) > 0
+
+    def __repr__(self) -> str:
+        return f'KeywordFilter({len(self.words)} words)'
@@ -1,7 +1,10 @@
 from ._bot import Bot
+from ._host import BotHost
 from ._handler import MessageHandler, EventHandler, ExceptionHandler
+from ._filter_order import FilterCost, FilterStats, filter_cost
 from ._router import MessageRouter, EventRouter, ExceptionRouter
 from ._context import RecvContext, ExceptionContext
 from ._controller import Controller, handler_property
 from ._scan import scan_handlers
+from ._plugin import PluginLoader
 from .._from_context import FromRecvContext, FromExceptionContext, FromContext
@@ -1,8 +1,11 @@
 import asyncio
 import datetime
+import graphlib
+import heapq
 import itertools
-import functools
-from typing import Iterable, overload, Callable, Awaitable, Any, TypeVar, Coroutine, cast
+import time
+import typing
+from typing import Iterable, overload, Callable, Awaitable, Any, TypeVar, Coroutine, Sequence, cast
 
 from .. import _commons, entities
 from ._router import (
@@ -14,13 +17,24 @@ from ._router import (
     ExceptionTypeRouter
 )
 from ._context import RecvContext, ExceptionContext
+from ._filter_order import FilterStats
 from ._handler import MessageHandler, EventHandler, ExceptionHandler
-from ..api import MiraiApi
+from ._waiter import WaiterTable
+from ..api import BaseApi
 from ..entities import Message, Event, MessageChain
 from ..exceptions import MiraiApiException
 from .._from_context import FromContext
 from ..logging import logger
 
+if typing.TYPE_CHECKING:
+    from ..api import MiraiApi
+    from ..history import MessageHistory
+    from ..metrics import BotMetrics
+    from ..state import StateStore
+    from ..profiling import HandlerProfiler
+    from ..watchdog import LoopWatchdog
+    from ..tracing import Tracer, NoOpTracer
+
 T = TypeVar('T')
 
 
@@ -30,9 +44,32 @@ class Bot(FromContext):
         bot_id: int,
         verify_key: str,
         base_url: str = 'ws://localhost:8080',
-        reserved_sync_id: str = '-1'
+        reserved_sync_id: str = '-1',
+        command_channels: int = 0
     ):
-        self.__api = MiraiApi(bot_id, verify_key, base_url, reserved_sync_id)
+        """
+        根据 `base_url` 的协议选择适配器：`ws://`、`wss://` 使用 WebSocket 适配器（`MiraiApi`），
+        `http://`、`https://` 使用 HTTP 适配器（`MiraiHttpApi`）。`reserved_sync_id` 和 `command_channels`
+        仅对 WebSocket 适配器有效。如需更细致地配置适配器，请使用 `Bot.from_api`。
+        """
+        # 只导入用到的适配器，使用 HTTP 适配器时不会导入 websockets
+        if base_url.startswith(('http://', 'https://')):
+            from ..api._http_api import MiraiHttpApi
+            api: BaseApi = MiraiHttpApi(bot_id, verify_key, base_url)
+        else:
+            from ..api._api import MiraiApi
+            api = MiraiApi(bot_id, verify_key, base_url, reserved_sync_id, command_channels)
+        self.__init_with_api(api)
+
+    @classmethod
+    def from_api(cls, api: BaseApi) -> 'Bot':
+        """使用已经创建好的适配器对象创建 bot"""
+        bot = cls.__new__(cls)
+        bot.__init_with_api(api)
+        return bot
+
+    def __init_with_api(self, api: BaseApi):
+        self.__api = api
         self.message_handlers: list[MessageHandler] = []
         self.event_handlers: list[EventHandler] = []
         self.default_exception_handler = make_default_exception_handler()
@@ -50,9 +87,75 @@ class Bot(FromContext):
         self.__event_router_orders: list[tuple[EventRouter, EventRouter]] = []
         self.__exception_router_orders: list[tuple[ExceptionRouter, ExceptionRouter]] = []
         self.__background_tasks: set[asyncio.Task] = set()
+        self.__built = False
+        self.__waiters = WaiterTable()
+        self.__metrics: 'BotMetrics | None' = None
+        self.__tracer: 'Tracer | NoOpTracer | None' = None
+        self.__history: 'MessageHistory | None' = None
+        self.profiler: 'HandlerProfiler | None' = None
+        """处理器的性能剖析器，默认为 `None`（不剖析）"""
+        self.reorder_filters = False
+        """
+        是否按开销和拒绝率调整过滤器的评估顺序，默认为 `False`（按声明的顺序评估）。启用后，每个处理器的过滤器先按声明的开销
+        （见 `filters.filter_cost`）排序，之后按运行中统计的拒绝率调整，使开销小、拒绝率高的过滤器先被评估。
+        仅当过滤器之间互不依赖（没有过滤器假定另一个过滤器已经通过）时才应启用
+        """
+        self.watchdog: 'LoopWatchdog | None' = None
+        """事件循环的看门狗，由 `run` 启动，默认为 `None`（不启动）"""
+        self.state: 'StateStore | None' = None
+        """会话状态存储，默认为 `None`。处理器可通过类型为 `StateStore` 或 `Session` 的参数使用"""
+
+    @property
+    def api(self) -> BaseApi: return self.__api
 
     @property
-    def api(self) -> MiraiApi: return self.__api
+    def metrics(self) -> 'BotMetrics | None':
+        """bot 的运行时指标，默认为 `None`（不记录指标）。赋值为 `BotMetrics` 对象后开始记录"""
+        return self.__metrics
+
+    @metrics.setter
+    def metrics(self, metrics: 'BotMetrics | None'):
+        self.__metrics = metrics
+        self.__api.metrics = metrics
+        if metrics is not None:
+            metrics.bind(self)
+
+    @property
+    def tracer(self) -> 'Tracer | NoOpTracer | None':
+        """
+        创建 span 的 tracer，默认为 `None`（不追踪）。可以是 `lightq.tracing.Tracer`，
+        也可以是 OpenTelemetry 的 tracer
+        """
+        return self.__tracer
+
+    @tracer.setter
+    def tracer(self, tracer: 'Tracer | NoOpTracer | None'):
+        self.__tracer = tracer
+        self.__api.tracer = tracer
+
+    @property
+    def history(self) -> 'MessageHistory | None':
+        """
+        消息历史，默认为 `None`（不记录）。赋值为 `MessageHistory` 对象后记录收到和发出的消息，
+        处理器可通过类型为 `MessageHistory` 的参数使用
+        """
+        return self.__history
+
+    @history.setter
+    def history(self, history: 'MessageHistory | None'):
+        self.__history = history
+        self.__api.history = history
+
+    def filter_stats(self) -> dict[str, list[FilterStats]]:
+        """处理器名 => 其过滤器的运行统计（按当前的评估顺序），只包括有过滤器的处理器，见 `reorder_filters`"""
+        return {
+            handler.name: handler.filter_stats
+            for handler in [*self.message_handlers, *self.event_handlers, *self.exception_handlers]
+            if len(handler.filters) > 0
+        }
+
+    @property
+    def background_task_count(self) -> int: return len(self.__background_tasks)
 
     @property
     def bot_id(self) -> int: return self.__api.bot_id
@@ -64,10 +167,24 @@ class Bot(FromContext):
     def base_url(self) -> str: return self.__api.base_url
 
     @property
-    def reserved_sync_id(self) -> str: return self.__api.reserved_sync_id
+    def reserved_sync_id(self) -> str:
+        """仅适用于 WebSocket 适配器"""
+        return cast('MiraiApi', self.__api).reserved_sync_id
+
+    @property
+    def command_channels(self) -> int:
+        """仅适用于 WebSocket 适配器"""
+        return cast('MiraiApi', self.__api).command_channels
 
     def add(self, item: MessageHandler | EventHandler | ExceptionHandler
                         | MessageRouter | EventRouter | ExceptionRouter):
+        """
+        添加处理器或路由器。若 bot 已经构建（如正在运行），则立即生效：新的处理器被插入到已排好的顺序中，
+        并增量地更新各路由器的索引，不会暂停对推送的分发。
+        """
+        if self.__built:
+            self.__hot_add([item])
+            return
         match item:
             case MessageHandler():
                 self.message_handlers.append(item)
@@ -86,9 +203,43 @@ class Bot(FromContext):
 
     def add_all(self, items: Iterable[MessageHandler | EventHandler | ExceptionHandler
                                       | MessageRouter | EventRouter | ExceptionRouter]):
+        if self.__built:
+            # 一次性加入，处理器之间可以通过 before 和 after 互相引用
+            self.__hot_add(list(items))
+            return
         for item in items:
             self.add(item)
 
+    def remove(self, item: MessageHandler | EventHandler | ExceptionHandler
+                           | MessageRouter | EventRouter | ExceptionRouter):
+        """
+        移除处理器或路由器，以及通过 `add_order` 添加的与之相关的顺序。若 bot 已经构建，则立即生效。
+
+        :raises ValueError: `item` 未被添加、是默认的处理器或路由器，或者仍有其他处理器或路由器通过 before 或 after 引用它
+        """
+        self.remove_all([item])
+
+    def remove_all(self, items: Iterable[MessageHandler | EventHandler | ExceptionHandler
+                                         | MessageRouter | EventRouter | ExceptionRouter]):
+        items = list(items)
+        for item in items:
+            if isinstance(item, MessageHandler | EventHandler | ExceptionHandler):
+                handlers, orders, default, routers = self.__handler_group(item)
+            else:
+                handlers, orders, default, _ = self.__router_group(item)
+            if item not in handlers:
+                raise ValueError(f'{item} has not been added')
+            if item is default:
+                raise ValueError(f'cannot remove the default {item}')
+            for x in handlers:
+                if x not in items and (item in x.before or item in x.after):
+                    raise ValueError(f'{x} is ordered relative to {item}')
+        for item in items:
+            if isinstance(item, MessageHandler | EventHandler | ExceptionHandler):
+                self.__remove_handler(item)
+            else:
+                self.__remove_router(item)
+
     async def close(self):
         await self.__api.close()
 
@@ -113,19 +264,78 @@ class Bot(FromContext):
     ) -> asyncio.Task:
         return self.create_task(_commons.do_everyday(time, action), name=name)
 
-    async def run(self):
-        self.build()
+    async def run(self, *, build: bool = True):
+        """
+        接收推送并分发给处理器，直到连接关闭
+
+        :param build: 是否在开始前调用 `build`。若处理器和路由器已经构建好（如通过 `share_handlers` 共享），
+            则可以传入 `False` 跳过构建
+        """
+        if build:
+            self.build()
+        if self.watchdog is not None:
+            self.watchdog.start(self)
         try:
             async for data in self.__api:
+                if self.__metrics is not None:
+                    self.__metrics.received.inc(type=type(data).__name__)
+                if self.__history is not None and isinstance(data, Message):
+                    self.__history.record(data)
+                if len(self.__waiters) > 0 and isinstance(data, Message) and self.__waiters.offer(data):
+                    continue  # 消息被 `wait_for_message` 取走，不再路由
                 context = RecvContext(self, data)
                 background_func = self.__make_background_func(context)
                 self.create_task(background_func())
                 await asyncio.sleep(0)
         finally:
+            if self.watchdog is not None:
+                await self.watchdog.stop()
             await self.close()
 
+    async def wait_for_message(
+        self,
+        group_id: int | None,
+        sender_id: int,
+        predicate: Callable[[Message], bool] | None = None,
+        timeout: float | None = None
+    ) -> Message:
+        """
+        等待指定会话中下一条满足 `predicate` 的消息，用于多轮对话。等待到的消息不会再交给处理器。
+
+        等待中的会话保存在按（群号，发送者）索引的表中，收到消息时先查表再路由，
+        无需为多轮对话注册一个处理所有消息的低优先级处理器。
+
+        :param group_id: 群号，私聊时为 `None`
+        :param sender_id: 发送者的 QQ 号
+        :param predicate: 消息需满足的条件，为 `None` 时接受任何消息
+        :param timeout: 超时时间（秒），为 `None` 时一直等待
+        :raises TimeoutError: 超时未收到满足条件的消息时抛出
+        """
+        future = self.__waiters.add((group_id if group_id is not None else 0, sender_id), predicate)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:  # Python 3.10 中 asyncio.TimeoutError 不是内置的 TimeoutError
+            raise TimeoutError(f'no message from {sender_id} in {group_id} within {timeout} seconds') from None
+
+    async def route(self, context: RecvContext) -> MessageHandler | EventHandler | None:
+        """
+        将推送路由到处理器但不调用，用于离线处理（见 `lightq.batch`）。调用前须先调用 `build`
+
+        :return: 处理该推送的处理器，没有处理器时为 `None`
+        """
+        return await self.__get_handler(context)
+
     def __make_background_func(self, context: RecvContext) -> Callable[[], Coroutine[Any, Any, None]]:
         async def handle_recv_data():
+            if self.__tracer is None:
+                await dispatch()
+                return
+            with self.__tracer.start_as_current_span(
+                'lightq.receive', attributes={'lightq.type': type(context.data).__name__}
+            ):
+                await dispatch()
+
+        async def dispatch():
             try:
                 handler = await self.__get_handler(context)
                 if handler is None:
@@ -134,8 +344,9 @@ class Bot(FromContext):
                 if await self.__handle_exception(ExceptionContext(e, context, handler=None)):
                     return
                 raise
+            start = time.perf_counter()
             try:
-                response = await handler.handle(context)
+                response = await self.__call_handler(handler, context)
                 if response is None:
                     return
                 await self.__send_to_sender(context.data, response)
@@ -143,15 +354,20 @@ class Bot(FromContext):
                 if await self.__handle_exception(ExceptionContext(e, context, handler)):
                     return
                 raise
+            finally:
+                if self.__metrics is not None:
+                    self.__metrics.handler_seconds.observe(time.perf_counter() - start, handler=handler.name)
 
         return handle_recv_data
 
     async def __handle_exception(self, context: ExceptionContext) -> bool:
+        if self.__metrics is not None:
+            self.__metrics.exceptions.inc(type=type(context.exception).__name__)
         handler = await self.__get_handler(context)
         if handler is None:
             return False
         try:
-            response = await handler.handle(context)
+            response = await self.__call_handler(handler, context)
         except MiraiApiException as e:  # swallow and log MiraiApiException
             logger.error('swallow an exception raised from an exception handler, '
                          f'exception: {repr(e)}, exception handler: {handler}')
@@ -164,6 +380,16 @@ class Bot(FromContext):
                              f'exception: {repr(e)}, exception handler: {handler}')
         return True
 
+    async def __call_handler(
+        self,
+        handler: MessageHandler | EventHandler | ExceptionHandler,
+        context: RecvContext | ExceptionContext
+    ) -> MessageChain | None:
+        if self.__tracer is None:
+            return await handler.handle(context)
+        with self.__tracer.start_as_current_span('lightq.handle', attributes={'lightq.handler': handler.name}):
+            return await handler.handle(context)
+
     @overload
     async def __get_handler(self, context: RecvContext) -> MessageHandler | EventHandler | None: pass
 
@@ -176,15 +402,37 @@ class Bot(FromContext):
     ) -> MessageHandler | EventHandler | ExceptionHandler | None:
         match context:
             case RecvContext(data=Message()):
-                routers = self.message_routers
+                routers, kind = self.message_routers, 'message'
             case RecvContext(data=Event()):
-                routers = self.event_routers
+                routers, kind = self.event_routers, 'event'
             case ExceptionContext():
-                routers = self.exception_routers
+                routers, kind = self.exception_routers, 'exception'
             case _:
                 return None
+        start = time.perf_counter()
+        try:
+            if self.__tracer is None:
+                return await self.__route(routers, context)
+            with self.__tracer.start_as_current_span('lightq.route', attributes={'lightq.kind': kind}) as span:
+                handler = await self.__route(routers, context)
+                span.set_attribute('lightq.handler', handler.name if handler is not None else '')
+                return handler
+        finally:
+            if self.__metrics is not None:
+                self.__metrics.route_seconds.observe(time.perf_counter() - start, kind=kind)
+
+    async def __route(
+        self,
+        routers: list[MessageRouter] | list[EventRouter] | list[ExceptionRouter],
+        context: RecvContext | ExceptionContext
+    ) -> MessageHandler | EventHandler | ExceptionHandler | None:
         for router in routers:
-            handler = await router.route(context)
+            if self.profiler is not None:
+                handler = await self.profiler.profile(
+                    type(router).__qualname__, 'route', context, router.route(context)
+                )
+            else:
+                handler = await router.route(context)
             if handler is not None:
                 return handler
         return None
@@ -218,6 +466,7 @@ class Bot(FromContext):
             await self.api.send_temp_message(data.sender.id, data.sender.group.id, message)
 
     def build(self):
+        self.__built = True
         self.clear()
         self.message_handlers = bot_topo_sort(self.message_handlers, self.__message_handler_orders)
         self.event_handlers = bot_topo_sort(self.event_handlers, self.__event_handler_orders)
@@ -247,6 +496,22 @@ class Bot(FromContext):
         for router in self.exception_routers:
             router.build(self.exception_handlers)
 
+    def share_handlers(self, source: 'Bot'):
+        """
+        直接使用 `source` 已经构建好的处理器和路由器（共享同一批对象而非复制），之后应以 ``run(build=False)``
+        运行本 bot。用于多个账号运行同一套处理器的场景，见 `BotHost`。
+        """
+        self.message_handlers = source.message_handlers
+        self.event_handlers = source.event_handlers
+        self.exception_handlers = source.exception_handlers
+        self.default_exception_handler = source.default_exception_handler
+        self.message_routers = source.message_routers
+        self.event_routers = source.event_routers
+        self.exception_routers = source.exception_routers
+        self.default_message_router = source.default_message_router
+        self.default_event_router = source.default_event_router
+        self.default_exception_router = source.default_exception_router
+
     def clear(self):
         for router in itertools.chain(
             self.message_routers,
@@ -290,6 +555,99 @@ class Bot(FromContext):
                 self.__exception_router_orders.extend(itertools.pairwise(items))
             case _:
                 raise TypeError(f'Unsupported type: {type(item1)}')
+        if self.__built:
+            if isinstance(item1, MessageHandler | EventHandler | ExceptionHandler):
+                handlers, orders, default, routers = self.__handler_group(item1)
+                handlers[:] = bot_topo_sort(handlers, orders, default)
+                for router in routers:
+                    router.build(handlers)
+            else:
+                routers, orders, default, _ = self.__router_group(item1)
+                routers[:] = bot_topo_sort(routers, orders, default)
+
+    def __handler_group(self, item):
+        """处理器所在的列表、顺序、默认处理器以及负责路由它的路由器"""
+        match item:
+            case MessageHandler():
+                return self.message_handlers, self.__message_handler_orders, None, self.message_routers
+            case EventHandler():
+                return self.event_handlers, self.__event_handler_orders, None, self.event_routers
+            case ExceptionHandler():
+                return (self.exception_handlers, self.__exception_handler_orders,
+                        self.default_exception_handler, self.exception_routers)
+            case _:
+                raise TypeError(f'Unsupported type: {type(item)}')
+
+    def __router_group(self, item):
+        """路由器所在的列表、顺序、默认路由器以及它负责的处理器"""
+        match item:
+            case MessageRouter():
+                return self.message_routers, self.__message_router_orders, self.default_message_router, \
+                    self.message_handlers
+            case EventRouter():
+                return self.event_routers, self.__event_router_orders, self.default_event_router, \
+                    self.event_handlers
+            case ExceptionRouter():
+                return self.exception_routers, self.__exception_router_orders, self.default_exception_router, \
+                    self.exception_handlers
+            case _:
+                raise TypeError(f'Unsupported type: {type(item)}')
+
+    # 运行中的修改：列表总是原地修改（通过 `share_handlers` 共享的 bot 能看到修改），且每次修改都在一次同步调用中完成，
+    # 分发推送的协程不会看到修改了一半的状态
+
+    def __hot_add(self, items: list):
+        groups: dict[int, tuple[Any, list]] = {}
+        for item in items:
+            if isinstance(item, MessageHandler | EventHandler | ExceptionHandler):
+                group = self.__handler_group(item)
+            else:
+                group = self.__router_group(item)
+            groups.setdefault(id(group[0]), (group, []))[1].append(item)
+        for (lst, orders, default, others), new_items in groups.values():
+            new_items = [x for x in dict.fromkeys(new_items) if x not in lst]
+            if len(new_items) == 0:
+                continue
+            if isinstance(new_items[0], MessageRouter | EventRouter | ExceptionRouter):
+                for router in new_items:
+                    router.build(others)
+                lst[:] = bot_topo_sort([*lst, *new_items], orders, default)
+                continue
+            if len(new_items) == 1:
+                index = insertion_index(lst, new_items[0], orders, default)
+                if index is not None:
+                    lst.insert(index, new_items[0])
+                    for router in others:
+                        router.add_handler(new_items[0], lst)
+                    continue
+            lst[:] = bot_topo_sort([*lst, *new_items], orders, default)
+            for router in others:
+                router.build(lst)
+
+    def __remove_handler(self, handler: MessageHandler | EventHandler | ExceptionHandler):
+        handlers, orders, default, routers = self.__handler_group(handler)
+        orders[:] = [(u, v) for u, v in orders if u is not handler and v is not handler]
+        if not self.__built:
+            handlers.remove(handler)
+            return
+        if default is not None and handlers.index(handler) > handlers.index(default):
+            # 排在默认处理器之后的处理器被移除后，依赖它的处理器可能不必再排在默认处理器之后
+            handlers[:] = bot_topo_sort([x for x in handlers if x is not handler], orders, default)
+            for router in routers:
+                router.build(handlers)
+            return
+        handlers.remove(handler)
+        for router in routers:
+            router.remove_handler(handler, handlers)
+
+    def __remove_router(self, router: MessageRouter | EventRouter | ExceptionRouter):
+        routers, orders, default, _ = self.__router_group(router)
+        orders[:] = [(u, v) for u, v in orders if u is not router and v is not router]
+        if self.__built and routers.index(router) > routers.index(default):
+            routers[:] = bot_topo_sort([x for x in routers if x is not router], orders, default)
+        else:
+            routers.remove(router)
+        router.clear()
 
     @classmethod
     def from_recv_context(cls, context: RecvContext) -> 'Bot':
@@ -312,61 +670,122 @@ def make_default_exception_handler() -> ExceptionHandler:
     )
 
 
-def topological_sort(items: Iterable[T], orders: Iterable[tuple[T, T]]) -> list[T] | None:
-    # out neighbors
-    graph: dict[T, list[T]] = {u: [] for u in items}
+def stable_topological_sort(items: Iterable[T], orders: Iterable[tuple[T, T]]) -> list[T]:
+    """
+    拓扑排序（Kahn 算法），时间复杂度为 O((V + E) log V)。每一步都从可以排出的元素中选取在 `items` 中最靠前的一个，
+    即字典序最小的拓扑序：`items` 本身满足全部约束时原样返回，没有顺序约束的元素之间保持 `items` 中的先后顺序。
+
+    :raises graphlib.CycleError: 存在环时抛出，异常的第二个参数为环上的元素（首尾相同）
+    """
+    out_neighbors: dict[T, list[T]] = {u: [] for u in items}
+    in_degree = dict.fromkeys(out_neighbors, 0)
+    index = {u: i for i, u in enumerate(out_neighbors)}
     for u, v in orders:
-        assert u in graph and v in graph
-        graph[u].append(v)
-    vis = {u: 0 for u in items}
+        assert u in out_neighbors and v in out_neighbors
+        out_neighbors[u].append(v)
+        in_degree[v] += 1
+    # 以元素在 `items` 中的下标为键的最小堆，下标各不相同，不会比较元素本身
+    heap = [(index[u], u) for u, degree in in_degree.items() if degree == 0]
+    heapq.heapify(heap)
     topo = []
-
-    def dfs(u: T) -> bool:
-        vis[u] = -1
-        for v in graph[u]:
-            if vis[v] == -1:
-                return False
-            elif vis[v] == 0:
-                if not dfs(v):
-                    return False
-        vis[u] = 1
+    while len(heap) > 0:
+        _, u = heapq.heappop(heap)
         topo.append(u)
-        return True
-
-    for u in graph:
-        if vis[u] == 0:
-            if not dfs(u):
-                return None  # Cannot topological sort.
-    topo.reverse()
+        for v in out_neighbors[u]:
+            in_degree[v] -= 1
+            if in_degree[v] == 0:
+                heapq.heappush(heap, (index[v], v))
+    if len(topo) < len(out_neighbors):
+        cycle = find_cycle({u for u, degree in in_degree.items() if degree > 0}, out_neighbors)
+        raise graphlib.CycleError(
+            f'Cannot topological sort, there is a cycle: {" -> ".join(map(repr, cycle))}',
+            cycle
+        )
     return topo
 
 
+def find_cycle(remaining: set[T], out_neighbors: dict[T, list[T]]) -> list[T]:
+    """
+    在 Kahn 算法结束后入度仍大于 0 的元素中找出一个环。这些元素都至少有一个同样未被排序的前驱，
+    沿前驱一直回溯必然会回到已经访问过的元素。
+    """
+    in_neighbor: dict[T, T] = {}
+    for u in remaining:
+        for v in out_neighbors[u]:
+            if v in remaining:
+                in_neighbor.setdefault(v, u)
+    u = next(iter(remaining))
+    visited: dict[T, int] = {}
+    path = []
+    while u not in visited:
+        visited[u] = len(path)
+        path.append(u)
+        u = in_neighbor[u]
+    cycle = path[visited[u]:]
+    cycle.reverse()
+    return [*cycle, cycle[0]]
+
+
+def topological_sort(items: Iterable[T], orders: Iterable[tuple[T, T]]) -> list[T] | None:
+    """拓扑排序，存在环时返回 `None`"""
+    try:
+        return stable_topological_sort(items, orders)
+    except graphlib.CycleError:
+        return None
+
+
+def insertion_index(
+    items: Sequence[T],
+    item: T,
+    extra_orders: Iterable[tuple[T, T]],
+    default: T | None = None
+) -> int | None:
+    """
+    在已经由 `bot_topo_sort` 排好序的 `items` 中为新元素 `item` 找一个插入位置，使所有的顺序仍然成立。
+    无法只通过插入满足顺序（需要移动已有的元素）时返回 `None`，此时应重新排序。
+    """
+    index = {x: i for i, x in enumerate(items)}
+    predecessors = [*item.after, *(u for u, v in extra_orders if v is item), *(x for x in items if item in x.before)]
+    successors = [*item.before, *(v for u, v in extra_orders if u is item), *(x for x in items if item in x.after)]
+    if any(x not in index for x in itertools.chain(predecessors, successors)):
+        return None
+    if default is not None:
+        # 与 `bot_topo_sort` 一致：未直接或间接地指定位于 default 之后的元素置于 default 之前
+        if not any(x is default or index[x] > index[default] for x in predecessors):
+            successors.append(default)
+    low = max((index[x] + 1 for x in predecessors), default=0)
+    high = min((index[x] for x in successors), default=len(items))
+    return high if low <= high else None
+
+
 def bot_topo_sort(
     items: list[T],
     extra_orders: list[tuple[T, T]],
     default: T | None = None
 ) -> list[T]:
+    """
+    按照各元素的 before、after 以及 `extra_orders` 排序。若指定了 `default`，则未直接或间接地指定位于 `default` 之后的元素
+    都被置于 `default` 之前。
+
+    :raises graphlib.CycleError: 顺序中存在环时抛出，异常信息中包含环上的元素
+    """
     orders: list[tuple[T, T]] = []
     for item in items:
         orders.extend((item, x) for x in item.before)
         orders.extend((x, item) for x in item.after)
     orders.extend(extra_orders)
     if default is not None:
-        if topological_sort(items, orders) is None:  # check if there is a circle
-            raise Exception('Cannot topological sort.')
         out_neighbors: dict[T, list[T]] = {item: [] for item in items}
-        in_neighbors: dict[T, list[T]] = {item: [] for item in items}
         for u, v in orders:  # u -> v, v must be placed after u
             out_neighbors[u].append(v)
-            in_neighbors[v].append(u)
-
-        @functools.cache
-        def must_after_default(item) -> bool:
-            return (item in out_neighbors[default]
-                    or any(must_after_default(x) for x in in_neighbors[item]))
-
-        # 若不直接或间接地指定 item 位于 default 之后，则默认地将 item 置于 default 之前
-        for item in items:
-            if item != default and not must_after_default(item):
-                orders.append((item, default))
-    return cast(list[T], topological_sort(items, orders))
+        # 从 default 出发可到达的元素即必须位于 default 之后的元素。其余元素到 default 的边不会形成新的环，
+        # 因为若形成环，则该元素可以从 default 到达
+        must_after_default = {default}
+        stack = [default]
+        while len(stack) > 0:
+            for v in out_neighbors[stack.pop()]:
+                if v not in must_after_default:
+                    must_after_default.add(v)
+                    stack.append(v)
+        orders.extend((item, default) for item in out_neighbors if item not in must_after_default)
+    return stable_topological_sort(items, orders)
@@ -1,7 +1,9 @@
 import typing
+from typing import Callable
 
 from ..entities import Message, Event, SyncMessage, UnsupportedEntity
 from .._from_context import FromExceptionContext, FromContext
+from ._waiter import conversation_key
 
 if typing.TYPE_CHECKING:
     from ._bot import Bot
@@ -17,6 +19,26 @@ class RecvContext(FromContext):
         self.bot = bot
         self.data = data
 
+    @property
+    def bot_id(self) -> int:
+        """收到该推送的 bot 账号，一个进程中运行多个账号（见 `BotHost`）时用于区分推送的来源"""
+        return self.bot.bot_id
+
+    async def wait_for_next(
+        self,
+        predicate: Callable[[Message], bool] | None = None,
+        timeout: float | None = None
+    ) -> Message:
+        """
+        等待与本条消息同一会话（同一个群中的同一个发送者，或同一个好友）的下一条满足 `predicate` 的消息，见 `Bot.wait_for_message`
+
+        :raises TimeoutError: 超时未收到满足条件的消息时抛出
+        """
+        if not isinstance(self.data, Message):
+            raise TypeError(f'cannot wait for the next message of {type(self.data).__name__}')
+        group_id, sender_id = conversation_key(self.data)
+        return await self.bot.wait_for_message(group_id or None, sender_id, predicate, timeout)
+
     @classmethod
     def from_recv_context(cls, context: 'RecvContext') -> 'RecvContext':
         return context
@@ -34,6 +56,11 @@ class ExceptionContext(FromExceptionContext):
         self.context = context
         self.handler = handler
 
+    @property
+    def bot_id(self) -> int:
+        """收到引发异常的推送的 bot 账号"""
+        return self.bot.bot_id
+
     @classmethod
     def from_exception_context(cls, context: 'ExceptionContext') -> 'ExceptionContext':
         return context
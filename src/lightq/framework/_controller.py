@@ -1,4 +1,5 @@
 import abc
+import weakref
 from typing import Callable, Iterable, Any, TypeVar, Generic, cast
 
 from ._handler import MessageHandler, EventHandler, ExceptionHandler
@@ -42,14 +43,28 @@ class handler_property(Generic[Handler]):
         return handler
 
 
-class Controller(abc.ABC):
-    def handlers(self) -> Iterable[MessageHandler | EventHandler | ExceptionHandler]:
-        for name, value in get_class_attributes(type(self)).items():
+_handler_names: 'weakref.WeakKeyDictionary[type, tuple[str, ...]]' = weakref.WeakKeyDictionary()
+
+
+def get_handler_names(cls: type) -> tuple[str, ...]:
+    """类中定义的处理器（包括 `handler_property`）的属性名，按类缓存"""
+    names = _handler_names.get(cls)
+    if names is None:
+        names = tuple(
+            name for name, value in get_class_attributes(cls).items()
             if not name.startswith('_') and isinstance(
                 value,
                 MessageHandler | EventHandler | ExceptionHandler | handler_property
-            ):
-                yield getattr(self, name)
+            )
+        )
+        _handler_names[cls] = names
+    return names
+
+
+class Controller(abc.ABC):
+    def handlers(self) -> Iterable[MessageHandler | EventHandler | ExceptionHandler]:
+        for name in get_handler_names(type(self)):
+            yield getattr(self, name)
 
     def message_handlers(self) -> Iterable[MessageHandler]:
         for handler in self.handlers():
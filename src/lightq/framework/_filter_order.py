@@ -0,0 +1,102 @@
+import enum
+import inspect
+from dataclasses import dataclass
+from typing import Callable, TypeVar
+
+__all__ = ['FilterCost', 'filter_cost', 'FilterStats', 'FilterOrder']
+
+F = TypeVar('F', bound=Callable)
+
+RESORT_INTERVAL = 100
+"""每评估多少次过滤器重新排序一次"""
+
+
+class FilterCost(enum.IntEnum):
+    """过滤器的相对开销"""
+
+    CHEAP = 1
+    """只读取推送中的字段或遍历消息链，如 `filters.from_group`、`filters.is_at_bot`"""
+
+    NORMAL = 10
+    """需要进行文本匹配等计算，如 `filters.KeywordFilter`，未声明开销的同步过滤器默认为此类"""
+
+    EXPENSIVE = 100
+    """需要调用 mirai-api-http 的命令或进行其他 I/O，未声明开销的异步过滤器默认为此类"""
+
+
+def filter_cost(cost: FilterCost | int) -> Callable[[F], F]:
+    """
+    声明过滤器的开销，见 `Bot.reorder_filters`
+
+    Examples:
+    ::
+        @filter_cost(FilterCost.EXPENSIVE)
+        async def is_admin(context: RecvContext) -> bool:
+            ...
+    """
+
+    def decorator(predicate: F) -> F:
+        predicate.filter_cost = cost  # type: ignore[attr-defined]
+        return predicate
+
+    return decorator
+
+
+def get_filter_cost(predicate: Callable) -> int:
+    cost = getattr(predicate, 'filter_cost', None)
+    if cost is not None:
+        return cost
+    function = predicate if inspect.isroutine(predicate) else getattr(predicate, '__call__', predicate)
+    return FilterCost.EXPENSIVE if inspect.iscoroutinefunction(function) else FilterCost.NORMAL
+
+
+@dataclass(slots=True)
+class FilterStats:
+    """一个过滤器的运行统计"""
+
+    name: str
+    cost: int
+    calls: int = 0
+    """被评估的次数（排在前面的过滤器拒绝时，后面的过滤器不会被评估）"""
+
+    rejects: int = 0
+    """拒绝的次数"""
+
+    @property
+    def reject_rate(self) -> float:
+        """拒绝率的估计值（加一平滑，尚未评估时为 0.5）"""
+        return (self.rejects + 1) / (self.calls + 2)
+
+    @property
+    def score(self) -> float:
+        """开销与拒绝率之比，越小越应先评估"""
+        return self.cost / self.reject_rate
+
+
+class FilterOrder:
+    """
+    一个处理器的过滤器的评估顺序。对于相互独立的过滤器，按开销与拒绝率之比从小到大评估时，拒绝一条推送的期望开销最小。
+    初始时按声明的开销排序，之后每评估 `RESORT_INTERVAL` 次按实际的拒绝率重新排序。
+
+    :param filters: 处理器的过滤器，按声明的顺序
+    """
+
+    def __init__(self, filters: list[Callable]):
+        self.filters = list(filters)
+        self.stats = [
+            FilterStats(getattr(predicate, '__qualname__', repr(predicate)), get_filter_cost(predicate))
+            for predicate in filters
+        ]
+        self.order = sorted(range(len(filters)), key=lambda i: self.stats[i].cost)  # sorted 是稳定的
+        self.__countdown = RESORT_INTERVAL
+
+    def record(self, index: int, passed: bool):
+        stats = self.stats[index]
+        stats.calls += 1
+        if not passed:
+            stats.rejects += 1
+        self.__countdown -= 1
+        if self.__countdown == 0:
+            self.__countdown = RESORT_INTERVAL
+            # 替换而不原地修改，正在遍历旧顺序的评估不受影响
+            self.order = sorted(self.order, key=lambda i: self.stats[i].score)
@@ -3,8 +3,9 @@ import types
 from typing import Iterable, Callable, Awaitable, cast, Generic, TypeVar, Any
 
 from ._context import RecvContext, ExceptionContext
+from ._filter_order import FilterOrder, FilterStats
 from ..entities import Message, Event, MessageChain, Plain
-from .._commons import get_class_attributes, invoke
+from .._commons import get_class_attribute_names, invoke
 
 __all__ = [
     'MessageHandler',
@@ -34,17 +35,80 @@ class HandlerMixin(Generic[Handler, Context, Data]):
         self.before = list(before)
         self.after = list(after)
         self.attrname: str | None = None
+        self.__filter_order: FilterOrder | None = None
+
+    @property
+    def name(self) -> str:
+        """处理器函数的 `__qualname__`，用于日志和指标"""
+        return getattr(self.handler, '__qualname__', repr(self.handler))
 
     async def can_handle(self, context: Context) -> bool:
-        for predicate in self.filters:
+        bot = context.bot
+        profiler = bot.profiler
+        if profiler is not None:
+            return await profiler.profile(self.name, 'can_handle', context, self.__can_handle(context))
+        if bot.tracer is not None or bot.reorder_filters:
+            return await self.__can_handle(context)
+        for predicate in self.filters:  # 未启用剖析、追踪和重排时直接执行，避免多一层协程
             if not await invoke(predicate, context):
+                if bot.metrics is not None:
+                    bot.metrics.filter_rejects.inc(handler=self.name)
+                return False
+        return True
+
+    async def __can_handle(self, context: Context) -> bool:
+        tracer = context.bot.tracer
+        order = self.__get_filter_order() if context.bot.reorder_filters else None
+        for index in (order.order if order is not None else range(len(self.filters))):
+            predicate = self.filters[index]
+            if tracer is None:
+                passed = await invoke(predicate, context)
+            else:
+                with tracer.start_as_current_span('lightq.filter', attributes={
+                    'lightq.handler': self.name,
+                    'lightq.filter': getattr(predicate, '__qualname__', repr(predicate))
+                }) as span:
+                    passed = await invoke(predicate, context)
+                    span.set_attribute('lightq.passed', bool(passed))
+            if order is not None:
+                order.record(index, bool(passed))
+            if not passed:
+                metrics = context.bot.metrics
+                if metrics is not None:
+                    metrics.filter_rejects.inc(handler=self.name)
                 return False
         return True
 
+    def __get_filter_order(self) -> FilterOrder:
+        order = self.__filter_order
+        if order is None or order.filters != self.filters:  # 过滤器被修改后重新统计
+            order = self.__filter_order = FilterOrder(self.filters)
+        return order
+
+    @property
+    def filter_stats(self) -> list[FilterStats]:
+        """各过滤器的运行统计，按当前的评估顺序排列。只在 `Bot.reorder_filters` 启用时统计"""
+        order = self.__get_filter_order()
+        return [order.stats[index] for index in order.order]
+
     async def handle(self, context: Context) -> MessageChain | None:
+        profiler = context.bot.profiler
+        if profiler is not None:
+            return await profiler.profile(self.name, 'handle', context, self.__handle(context))
+        return await self.__handle(context)
+
+    async def __handle(self, context: Context) -> MessageChain | None:
+        tracer = context.bot.tracer
         kwargs = {}
         for name, resolver in self.resolvers.items():
-            kwargs[name] = await invoke(resolver, context)
+            if tracer is None:
+                kwargs[name] = await invoke(resolver, context)
+            else:
+                with tracer.start_as_current_span('lightq.resolve', attributes={
+                    'lightq.handler': self.name,
+                    'lightq.parameter': name
+                }):
+                    kwargs[name] = await invoke(resolver, context)
         response = cast(str | MessageChain | None, await invoke(self.handler, **kwargs))
         return MessageChain([Plain(response)]) if isinstance(response, str) else response
 
@@ -63,7 +127,7 @@ class HandlerMixin(Generic[Handler, Context, Data]):
         handler = instance.__dict__.get(self.attrname)
         if handler is None:
             # id to attribute name
-            class_attributes = {id(x): name for name, x in get_class_attributes(type(instance)).items()}
+            class_attributes = get_class_attribute_names(type(instance))
 
             def convert_before_after(lst: list[Handler]) -> list[Handler]:
                 """Convert method handlers in 'before' and 'after' to bounded methods."""
@@ -98,6 +162,7 @@ class HandlerMixin(Generic[Handler, Context, Data]):
                 return result
 
             handler = copy.copy(self)
+            handler.__filter_order = None
             instance.__dict__[self.attrname] = handler
             # convert functions to bound methods
             handler.handler = handler.handler.__get__(instance, owner)
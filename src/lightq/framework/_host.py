@@ -0,0 +1,79 @@
+import asyncio
+
+from ._bot import Bot
+from ..api import BaseApi
+from ..logging import logger
+
+__all__ = ['BotHost']
+
+
+class BotHost:
+    """
+    在同一个进程、同一个事件循环中运行多个 QQ 账号，所有账号共用 `bot` 上注册的处理器和路由器。
+
+    处理器和路由器只构建一次，其余账号的 `Bot` 通过 `Bot.share_handlers` 直接使用构建结果，
+    不会为每个账号复制一份。处理器中可以通过 `RecvContext.bot_id`（或 `resolvers.bot_id`）得知推送来自哪个账号，
+    通过 `Bot` 参数得到该账号对应的 bot，回复会从收到推送的账号发出。
+
+    Examples:
+    ::
+        bot = Bot(111111, 'key', 'ws://localhost:8080')
+        bot.add_all(scan_handlers(handlers_module))
+        host = BotHost(bot)
+        host.add_account(222222, 'key', 'ws://localhost:8080')
+        await host.run()
+
+    :param bot: 注册了处理器和路由器的 bot，同时也是第一个账号
+    """
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.__bots: dict[int, Bot] = {bot.bot_id: bot}
+
+    @property
+    def bots(self) -> dict[int, Bot]:
+        """bot 账号 => bot"""
+        return dict(self.__bots)
+
+    def add_account(self, bot_id: int, verify_key: str, base_url: str = 'ws://localhost:8080') -> Bot:
+        """添加一个账号，适配器根据 `base_url` 的协议选择，同 `Bot.__init__`"""
+        return self.add_bot(Bot(bot_id, verify_key, base_url))
+
+    def add_api(self, api: BaseApi) -> Bot:
+        """使用已经创建好的适配器对象添加一个账号"""
+        return self.add_bot(Bot.from_api(api))
+
+    def add_bot(self, bot: Bot) -> Bot:
+        """添加一个账号，`bot` 上注册的处理器和路由器会被忽略"""
+        if bot.bot_id in self.__bots:
+            raise ValueError(f'bot {bot.bot_id} is already added')
+        self.__bots[bot.bot_id] = bot
+        return bot
+
+    def build(self):
+        """构建处理器和路由器，并让所有账号共用构建结果"""
+        self.bot.build()
+        for bot in self.__bots.values():
+            if bot is not self.bot:
+                bot.share_handlers(self.bot)
+
+    async def run(self):
+        """构建后运行所有账号，直到所有账号的连接都关闭。某个账号出错不会影响其他账号"""
+        self.build()
+
+        async def run_bot(bot: Bot):
+            try:
+                await bot.run(build=False)
+            except Exception as e:
+                logger.error(f'bot {bot.bot_id} stopped because of an exception: {repr(e)}')
+
+        await asyncio.gather(*(run_bot(bot) for bot in self.__bots.values()))
+
+    async def close(self):
+        await asyncio.gather(*(bot.close() for bot in self.__bots.values()))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
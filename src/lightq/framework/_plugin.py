@@ -0,0 +1,174 @@
+import asyncio
+import importlib
+import importlib.util
+import os
+import sys
+from types import ModuleType
+
+from ._bot import Bot
+from ._handler import MessageHandler, EventHandler, ExceptionHandler
+from ._scan import scan_handlers
+from ..logging import logger
+
+__all__ = ['PluginLoader']
+
+Handler = MessageHandler | EventHandler | ExceptionHandler
+
+
+class PluginLoader:
+    """
+    从模块加载处理器（插件），并在模块文件被修改后重新加载模块、将新的处理器替换到 `bot` 中，无需重启 bot 或断开连接。
+
+    替换在一次同步调用中完成：分发推送的协程要么看到全部旧的处理器，要么看到全部新的处理器。正在执行的处理器调用
+    持有的是旧的处理器对象，会在旧版本上执行完毕。模块重新加载失败（如语法错误）或新的处理器无法排序时，保留旧的处理器。
+
+    被替换的处理器通过 `Bot.add_order` 添加的顺序会随之移除，插件内部的顺序应通过 before 和 after 指定。
+
+    Examples:
+    ::
+        loader = PluginLoader(bot, ['plugins.echo', 'plugins.weather'])
+        loader.load()
+        bot.create_task(loader.watch())
+        await bot.run()
+
+    :param bot: 处理器被添加到的 bot
+    :param modules: 插件模块或模块名
+    :param interval: `watch` 检查文件修改的间隔（秒）
+    """
+
+    def __init__(self, bot: Bot, modules: list[ModuleType | str], interval: float = 1.0):
+        self.bot = bot
+        self.interval = interval
+        self.__module_names = [module if isinstance(module, str) else module.__name__ for module in modules]
+        self.__handlers: dict[str, list[Handler]] = {}
+        self.__versions: dict[str, tuple[int, int] | None] = {}
+
+    @property
+    def handlers(self) -> dict[str, list[Handler]]:
+        """模块名 => 该模块当前加入到 bot 中的处理器"""
+        return {name: list(handlers) for name, handlers in self.__handlers.items()}
+
+    def load(self):
+        """导入全部模块，并将其中的处理器添加到 bot"""
+        for name in self.__module_names:
+            if name in self.__handlers:
+                continue
+            module = importlib.import_module(name)
+            handlers = list(scan_handlers(module))
+            self.bot.add_all(handlers)
+            self.__handlers[name] = handlers
+            self.__versions[name] = file_version(module)
+
+    def reload(self, name: str) -> bool:
+        """
+        重新加载模块并替换其处理器。
+
+        新版本在一个新的模块对象中执行，旧的处理器仍然引用旧模块的全局变量，因此正在执行的处理器调用在旧版本上执行完毕，
+        加载失败时保留的旧处理器也不受影响。新模块执行成功且处理器替换成功后，才取代 `sys.modules` 中的旧模块。
+
+        :return: 是否成功替换
+        """
+        old_module = sys.modules[name]
+        version = file_version(old_module)
+        try:
+            module = load_fresh_module(name, old_module)
+            handlers = list(scan_handlers(module))
+        except Exception as e:
+            logger.error(f'failed to reload plugin {name}, keep the old handlers, exception: {repr(e)}')
+            self.__versions[name] = version  # 不再重复加载同一个版本
+            return False
+        old_handlers = self.__handlers[name]
+        try:
+            self.bot.remove_all(old_handlers)
+        except ValueError as e:
+            logger.error(f'failed to replace the handlers of plugin {name}, keep the old handlers, '
+                         f'exception: {repr(e)}')
+            self.__versions[name] = version
+            return False
+        try:
+            self.bot.add_all(handlers)
+        except Exception as e:
+            # 各类处理器分别加入，失败前可能已经加入了一部分新的处理器，先移除它们再恢复旧的处理器
+            added = {*self.bot.message_handlers, *self.bot.event_handlers, *self.bot.exception_handlers}
+            self.bot.remove_all([handler for handler in handlers if handler in added])
+            self.bot.add_all(old_handlers)
+            logger.error(f'failed to add the new handlers of plugin {name}, keep the old handlers, '
+                         f'exception: {repr(e)}')
+            self.__versions[name] = version
+            return False
+        install_module(name, module)
+        self.__handlers[name] = handlers
+        self.__versions[name] = version
+        logger.info(f'reloaded plugin {name}, {len(handlers)} handler(s)')
+        return True
+
+    def check(self) -> list[str]:
+        """
+        重新加载文件被修改过的模块
+
+        :return: 成功重新加载的模块名
+        """
+        reloaded = []
+        for name in self.__handlers:
+            module = sys.modules.get(name)
+            if module is None:
+                continue
+            if file_version(module) != self.__versions[name] and self.reload(name):
+                reloaded.append(name)
+        return reloaded
+
+    async def watch(self):
+        """每隔 `interval` 秒检查一次模块文件，直到被取消"""
+        self.load()
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check()
+
+
+def load_fresh_module(name: str, old_module: ModuleType) -> ModuleType:
+    """
+    从 `old_module` 的文件创建并执行一个新的模块对象，不修改 `old_module`。
+
+    执行期间新模块暂时登记在 `sys.modules` 中（与 import 语句的行为相同，模块内的代码可以找到自身），
+    执行结束后无论成功与否都恢复为旧模块，由调用者决定是否安装新模块。
+
+    :raises ImportError: 模块没有对应的源文件时抛出
+    """
+    path = getattr(old_module, '__file__', None)
+    if path is None:
+        raise ImportError(f'plugin {name} has no source file', name=name)
+    old_spec = getattr(old_module, '__spec__', None)
+    spec = importlib.util.spec_from_file_location(
+        name,
+        path,
+        submodule_search_locations=old_spec.submodule_search_locations if old_spec is not None else None
+    )
+    if spec is None or spec.loader is None:
+        raise ImportError(f'cannot load plugin {name} from {path}', name=name)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.modules[name] = old_module
+    return module
+
+
+def install_module(name: str, module: ModuleType):
+    """将 `module` 登记到 `sys.modules`，若是包的子模块，则同时更新包的属性"""
+    sys.modules[name] = module
+    parent, _, child = name.rpartition('.')
+    if parent != '' and parent in sys.modules:
+        setattr(sys.modules[parent], child, module)
+
+
+def file_version(module: ModuleType) -> tuple[int, int] | None:
+    """模块文件的修改时间和大小，模块没有对应的文件时返回 `None`"""
+    path = getattr(module, '__file__', None)
+    if path is None:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
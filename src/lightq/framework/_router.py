@@ -1,6 +1,6 @@
 import inspect
 import abc
-from typing import Iterable, TypeVar, Generic, cast
+from typing import Iterable, Sequence, TypeVar, Generic, cast
 
 from ..entities import Message, Event
 from ._context import RecvContext, ExceptionContext
@@ -26,6 +26,17 @@ class MessageRouter(abc.ABC):
     @abc.abstractmethod
     def clear(self): pass
 
+    def add_handler(self, handler: MessageHandler, handlers: Sequence[MessageHandler]):
+        """
+        向已经构建好的路由器中加入一个处理器，`handlers` 为加入后（已排好序）的全部处理器。
+        默认重新调用 `build`，子类可以覆盖此方法以增量地更新索引。
+        """
+        self.build(handlers)
+
+    def remove_handler(self, handler: MessageHandler, handlers: Sequence[MessageHandler]):
+        """从已经构建好的路由器中移除一个处理器，`handlers` 为移除后的全部处理器。默认重新调用 `build`。"""
+        self.build(handlers)
+
     @abc.abstractmethod
     async def route(self, context: RecvContext) -> MessageHandler | None: pass
 
@@ -40,6 +51,17 @@ class EventRouter(abc.ABC):
     @abc.abstractmethod
     def clear(self): pass
 
+    def add_handler(self, handler: EventHandler, handlers: Sequence[EventHandler]):
+        """
+        向已经构建好的路由器中加入一个处理器，`handlers` 为加入后（已排好序）的全部处理器。
+        默认重新调用 `build`，子类可以覆盖此方法以增量地更新索引。
+        """
+        self.build(handlers)
+
+    def remove_handler(self, handler: EventHandler, handlers: Sequence[EventHandler]):
+        """从已经构建好的路由器中移除一个处理器，`handlers` 为移除后的全部处理器。默认重新调用 `build`。"""
+        self.build(handlers)
+
     @abc.abstractmethod
     async def route(self, context: RecvContext) -> EventHandler | None: pass
 
@@ -54,6 +76,17 @@ class ExceptionRouter(abc.ABC):
     @abc.abstractmethod
     def clear(self): pass
 
+    def add_handler(self, handler: ExceptionHandler, handlers: Sequence[ExceptionHandler]):
+        """
+        向已经构建好的路由器中加入一个处理器，`handlers` 为加入后（已排好序）的全部处理器。
+        默认重新调用 `build`，子类可以覆盖此方法以增量地更新索引。
+        """
+        self.build(handlers)
+
+    def remove_handler(self, handler: ExceptionHandler, handlers: Sequence[ExceptionHandler]):
+        """从已经构建好的路由器中移除一个处理器，`handlers` 为移除后的全部处理器。默认重新调用 `build`。"""
+        self.build(handlers)
+
     @abc.abstractmethod
     async def route(self, context: ExceptionContext) -> ExceptionHandler | None: pass
 
@@ -77,6 +110,19 @@ class TypeRouterMixin(Generic[Handler, Data]):
     def clear(self):
         self.type_to_handlers.clear()
 
+    # 增量更新时只替换受影响的类型对应的列表而不原地修改，正在遍历旧列表的 `route` 不受影响
+    def add_handler(self, handler: Handler, handlers: Sequence[Handler]):
+        for cls in cast(list[type[Data]], handler.types):
+            self.type_to_handlers[cls] = [x for x in handlers if cls in x.types]
+
+    def remove_handler(self, handler: Handler, handlers: Sequence[Handler]):
+        for cls in cast(list[type[Data]], handler.types):
+            remaining = [x for x in self.type_to_handlers.get(cls, []) if x is not handler]
+            if len(remaining) > 0:
+                self.type_to_handlers[cls] = remaining
+            else:
+                self.type_to_handlers.pop(cls, None)
+
     async def _route_by_exact_type(self, cls: type, context) -> Handler | None:
         if cls in self.type_to_handlers:
             for handler in self.type_to_handlers[cast(type[Data], cls)]:
@@ -0,0 +1,67 @@
+import asyncio
+from typing import Callable
+
+from ..entities import Message, Member
+
+__all__ = ['WaiterTable', 'conversation_key']
+
+Predicate = Callable[[Message], bool]
+
+
+def conversation_key(message: Message) -> tuple[int, int]:
+    """消息所属的会话：群消息和临时消息为（群号，发送者），私聊为（0，好友的 QQ 号）"""
+    sender = message.sender
+    return (sender.group.id if isinstance(sender, Member) else 0), sender.id
+
+
+class WaiterTable:
+    """
+    按会话索引的等待者表。收到消息时只查找该消息所属会话的等待者，
+    无论有多少个会话在等待，每条消息的开销都是 O(1)（不计同一会话的等待者数）。
+    """
+
+    def __init__(self):
+        # 会话 => [(future, predicate)]，按等待的先后排列
+        self.__waiters: dict[tuple[int, int], list[tuple[asyncio.Future[Message], Predicate | None]]] = {}
+
+    def __len__(self) -> int:
+        """正在等待的会话数"""
+        return len(self.__waiters)
+
+    def add(self, key: tuple[int, int], predicate: Predicate | None = None) -> 'asyncio.Future[Message]':
+        """等待会话 `key` 中下一条满足 `predicate` 的消息"""
+        future: asyncio.Future[Message] = asyncio.get_running_loop().create_future()
+        waiter = (future, predicate)
+        self.__waiters.setdefault(key, []).append(waiter)
+
+        def remove(_):
+            waiters = self.__waiters.get(key)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if len(waiters) == 0:
+                    del self.__waiters[key]
+
+        future.add_done_callback(remove)
+        return future
+
+    def offer(self, message: Message) -> bool:
+        """
+        将消息交给所属会话中第一个满足条件的等待者
+
+        :return: 消息是否被等待者取走，被取走的消息不再交给处理器
+        """
+        waiters = self.__waiters.get(conversation_key(message))
+        if waiters is None:
+            return False
+        for future, predicate in list(waiters):
+            if future.done():
+                continue
+            try:
+                matched = predicate is None or predicate(message)
+            except Exception as e:  # 异常交给等待者
+                future.set_exception(e)
+                continue
+            if matched:
+                future.set_result(message)
+                return True
+        return False
@@ -0,0 +1,200 @@
+"""
+消息历史：在进程内记录收到和发出的消息，用于解析引用回复（`Quote`）、处理撤回事件以及需要上下文的处理器。
+mirai-api-http 的消息缓存（`message_from_id`）容量小且会失效，而本地的历史只受 `capacity` 限制。
+
+将 `MessageHistory` 赋值给 `bot.history` 后，`Bot.run` 记录收到的消息，适配器记录通过 `send_*_message` 发出的消息。
+处理器可以通过类型为 `MessageHistory` 的参数使用。
+
+Examples:
+::
+    @message_handler(GroupMessage)
+    def handler(chain: MessageChain, history: MessageHistory) -> str | None:
+        if Quote in chain:
+            entry = history.resolve_quote(chain[Quote])
+            ...
+
+    bot.history = MessageHistory(capacity=100000)
+"""
+
+import heapq
+import itertools
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterator, cast
+
+from ._from_context import FromContext
+from .entities import (
+    Message,
+    GroupMessage,
+    MessageChain,
+    Source,
+    Quote,
+    GroupRecallEvent,
+    FriendRecallEvent
+)
+from .framework import RecvContext
+
+__all__ = ['HistoryEntry', 'MessageHistory']
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryEntry:
+    """一条历史消息。消息链以紧凑的 JSON 文本保存（不含 `Source`），访问 `message_chain` 时才解析"""
+
+    message_id: int
+    kind: str
+    """消息类型：Group、Friend、Temp、Stranger 或 OtherClient"""
+
+    target: int
+    """消息所在的会话：群消息为群号，其余为对方的 QQ 号"""
+
+    sender_id: int
+    """发送者的 QQ 号，bot 发出的消息为 bot 的 QQ 号"""
+
+    time: int
+    """发送时间（Unix 时间戳）"""
+
+    chain: str
+
+    @property
+    def message_chain(self) -> MessageChain:
+        return MessageChain.from_json(json.loads(self.chain))
+
+
+def dump_chain(chain: MessageChain) -> str:
+    if len(chain) > 0 and isinstance(chain[0], Source):
+        chain = chain[1:]
+    return json.dumps(chain.to_json(), ensure_ascii=False, separators=(',', ':'))
+
+
+class MessageHistory(FromContext):
+    """
+    定长的环形缓冲区，写满后覆盖最早的消息。按（消息类型，会话，message id）建立索引，查找的时间复杂度为 O(1)；
+    每个会话的消息另按时间顺序保存，`recent` 的时间复杂度与返回的消息数成正比，与 `capacity` 无关。
+
+    群号和 QQ 号可能相同，因此查找时应指定消息类型；未指定时依次查找该会话的各类消息。
+
+    :param capacity: 最多保存的消息数
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self.__entries: list[HistoryEntry | None] = [None] * capacity
+        self.__written = 0  # 已写入的消息数，第 i 条消息（从 0 开始）的序号为 i，写入位置为 i % capacity
+        self.__index: dict[tuple[str, int, int], int] = {}  # (kind, target, message_id) => 序号
+        # target => kind => 该会话中仍在缓冲区内的消息的序号，从旧到新
+        self.__conversations: dict[int, dict[str, deque[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__index)
+
+    def add(self, entry: HistoryEntry):
+        seq = self.__written
+        position = seq % self.capacity
+        old = self.__entries[position]
+        if old is not None:
+            key = (old.kind, old.target, old.message_id)
+            if self.__index.get(key) == seq - self.capacity:
+                del self.__index[key]
+            # 被覆盖的是缓冲区中最早的消息，也就是它所在会话中最早的消息
+            kinds = self.__conversations[old.target]
+            kinds[old.kind].popleft()
+            if len(kinds[old.kind]) == 0:
+                del kinds[old.kind]
+                if len(kinds) == 0:
+                    del self.__conversations[old.target]
+        self.__entries[position] = entry
+        self.__index[(entry.kind, entry.target, entry.message_id)] = seq
+        self.__conversations.setdefault(entry.target, {}).setdefault(entry.kind, deque()).append(seq)
+        self.__written = seq + 1
+
+    def record(self, message: Message):
+        """记录一条收到的消息，没有 `Source` 元素（无法得知 message id）的消息不会被记录"""
+        if Source not in message.message_chain:
+            return
+        source = message.message_chain[Source]
+        kind = type(message).__name__.removesuffix('Message')
+        if isinstance(message, GroupMessage):
+            target = message.sender.group.id
+        else:  # 临时会话按对方的 QQ 号记录，与发送时一致
+            target = message.sender.id
+        self.add(HistoryEntry(
+            source.id, kind, target, message.sender.id, source.time, dump_chain(message.message_chain)
+        ))
+
+    def record_sent(self, kind: str, target: int, sender_id: int, message_id: int, chain: MessageChain):
+        """记录一条 bot 发出的消息"""
+        self.add(HistoryEntry(message_id, kind, target, sender_id, int(time.time()), dump_chain(chain)))
+
+    def __kinds(self, target: int, kind: str | None) -> Iterator[str]:
+        if kind is not None:
+            return iter((kind,))
+        return iter(self.__conversations.get(target, ()))
+
+    def get(self, message_id: int, target: int, kind: str | None = None) -> HistoryEntry | None:
+        """
+        :param message_id: 消息的 message id
+        :param target: 群号或对方的 QQ 号
+        :param kind: 消息类型（Group、Friend、Temp 等），为 `None` 时依次查找该会话的各类消息
+        """
+        for k in self.__kinds(target, kind):
+            seq = self.__index.get((k, target, message_id))
+            if seq is not None:
+                return self.__entries[seq % self.capacity]
+        return None
+
+    def resolve_quote(self, quote: Quote) -> HistoryEntry | None:
+        """查找被引用回复的原消息"""
+        if quote.group_id != 0:
+            return self.get(quote.id, quote.group_id, 'Group')
+        # 好友消息的会话是发送者和接收者中不是 bot 的一方
+        return self.__get_private(quote.id, quote.sender_id) or self.__get_private(quote.id, quote.target_id)
+
+    def resolve_recall(self, event: GroupRecallEvent | FriendRecallEvent) -> HistoryEntry | None:
+        """查找被撤回的消息"""
+        if isinstance(event, GroupRecallEvent):
+            return self.get(event.message_id, event.group.id, 'Group')
+        return (self.get(event.message_id, event.author_id, 'Friend')
+                or self.get(event.message_id, event.operator, 'Friend'))
+
+    def __get_private(self, message_id: int, target: int) -> HistoryEntry | None:
+        for kind in self.__kinds(target, None):
+            if kind != 'Group':
+                entry = self.get(message_id, target, kind)
+                if entry is not None:
+                    return entry
+        return None
+
+    def recent(self, target: int, count: int = 10, kind: str | None = None) -> list[HistoryEntry]:
+        """
+        会话中最近的至多 `count` 条消息，从旧到新排列
+
+        :param kind: 消息类型，为 `None` 时包括该会话的各类消息
+        """
+        kinds = self.__conversations.get(target, {})
+        seqs = [
+            seq
+            for k in self.__kinds(target, kind)
+            for seq in itertools.islice(reversed(kinds.get(k, ())), count)
+        ]
+        return [cast(HistoryEntry, self.__entries[seq % self.capacity]) for seq in reversed(heapq.nlargest(count, seqs))]
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        """从新到旧遍历全部消息"""
+        for seq in range(self.__written - 1, max(self.__written - self.capacity, 0) - 1, -1):
+            yield cast(HistoryEntry, self.__entries[seq % self.capacity])
+
+    def clear(self):
+        self.__entries = [None] * self.capacity
+        self.__written = 0
+        self.__index.clear()
+        self.__conversations.clear()
+
+    @classmethod
+    def from_recv_context(cls, context: RecvContext) -> 'MessageHistory':
+        history = context.bot.history
+        if history is None:
+            raise RuntimeError('bot.history is not set')
+        return history
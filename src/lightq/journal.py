@@ -0,0 +1,289 @@
+"""
+推送日志：将收到的原始推送帧连同接收时间追加写入磁盘，用于调试和压力测试；并可将日志按原始（或加速后的）时间间隔
+回放给 `Bot`，得到可重复的性能回归测试。
+
+日志文件以 `MAGIC` 和一个标志字节开头，之后是若干条记录，每条记录为 ``>dI``（接收时间戳、帧长度）加上 UTF-8 编码的帧。
+启用压缩时，文件头之后的全部记录构成一个 zlib 流，同一个文件中的记录共享压缩字典，比逐条压缩更紧凑。
+文件超过 `max_bytes` 后轮转为 ``path.1``、``path.2``……（编号越大越旧）。
+
+`Journal.write` 只将记录放入队列，由后台线程成批写入文件并刷新（启用压缩时每批同步刷新一次 zlib 流），
+接收推送的事件循环不等待磁盘。进程崩溃时，已刷新的批次仍然可读。
+
+Examples:
+::
+    bot = Bot(bot_id, verify_key)
+    bot.api.journal = Journal('pushes.journal', compress=True)
+
+    # 回放：不连接 mirai-api-http，命令不会真正执行
+    bot = Bot.from_api(ReplayApi('pushes.journal', speed=10.0))
+    await bot.run()
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Generator, Iterator, cast
+
+from .api._frame import Frame
+from .batch import OfflineApi
+
+__all__ = ['Journal', 'read_journal', 'ReplayApi']
+
+MAGIC = b'LQJ\x01'
+FLAG_COMPRESSED = 0x01
+RECORD_HEADER = struct.Struct('>dI')
+READ_SIZE = 64 * 1024
+
+
+class Journal:
+    """
+    只追加的推送日志。
+
+    :param path: 日志文件路径
+    :param max_bytes: 单个文件的最大字节数，超出后轮转，为 `None` 时不轮转
+    :param backups: 轮转时保留的旧文件数，更旧的文件会被删除
+    :param compress: 是否用 zlib 压缩记录
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        max_bytes: int | None = 64 * 1024 * 1024,
+        backups: int = 5,
+        compress: bool = False
+    ):
+        self.path = os.fspath(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.compress = compress
+        self.__file: Any = None
+        self.__compressor: Any = None
+        self.__size = 0
+        self.__open()
+        self.__closed = False
+        self.__error: Exception | None = None  # 后台线程写入时出现的异常
+        self.__records: queue.Queue[tuple[float, bytes] | None] = queue.Queue()
+        self.__thread = threading.Thread(target=self.__run, name='lightq-journal', daemon=True)
+        self.__thread.start()
+
+    def __open(self):
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            # zlib 流不能续写，格式不同的旧文件也不能续写，此时先轮转出旧文件
+            with open(self.path, 'rb') as file:
+                header = file.read(len(MAGIC) + 1)
+            if self.compress or header != MAGIC + bytes([0]):
+                self.__rotate()
+        self.__file = open(self.path, 'ab')
+        self.__size = self.__file.tell()
+        self.__compressor = zlib.compressobj() if self.compress else None
+        if self.__size == 0:
+            self.__write(MAGIC + bytes([FLAG_COMPRESSED if self.compress else 0]))
+            self.__file.flush()
+
+    def __write(self, data: bytes):
+        self.__file.write(data)
+        self.__size += len(data)
+
+    def __rotate(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        oldest = f'{self.path}.{self.backups}'
+        if os.path.exists(oldest):
+            os.remove(oldest)
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{i}'):
+                os.replace(f'{self.path}.{i}', f'{self.path}.{i + 1}')
+        os.replace(self.path, f'{self.path}.1')
+
+    def write(self, frame: Frame, timestamp: float | None = None):
+        """
+        追加一条推送帧。记录由后台线程写入文件，本方法不等待写入完成
+
+        :param frame: 原始的 JSON 文本或已经解析的帧
+        :param timestamp: 接收时间，默认为当前时间
+        :raises:
+            ValueError: 日志已经关闭时抛出
+            OSError: 之前的记录写入失败（如磁盘已满）时抛出，之后的记录不再写入
+        """
+        if self.__closed:
+            raise ValueError('the journal is closed')
+        if self.__error is not None:
+            raise self.__error
+        text = frame if isinstance(frame, str) else json.dumps(frame, ensure_ascii=False, separators=(',', ':'))
+        self.__records.put((timestamp if timestamp is not None else time.time(), text.encode()))
+
+    def flush(self):
+        """
+        等待已提交的记录全部写入文件
+
+        :raises OSError: 记录写入失败时抛出
+        """
+        self.__records.join()
+        if self.__error is not None:
+            raise self.__error
+
+    def __run(self):
+        """后台线程：每次取出队列中的全部记录，写入后刷新一次"""
+        while True:
+            batch = [self.__records.get()]
+            while True:
+                try:
+                    batch.append(self.__records.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if self.__error is None:
+                    for record in batch:
+                        if record is not None:
+                            self.__append(*record)
+                    if self.__compressor is not None:
+                        self.__write(self.__compressor.flush(zlib.Z_SYNC_FLUSH))
+                    self.__file.flush()
+            except Exception as e:
+                self.__error = e
+            finally:
+                for _ in batch:
+                    self.__records.task_done()
+            if None in batch:  # close 放入的结束标记
+                return
+
+    def __append(self, timestamp: float, payload: bytes):
+        if self.max_bytes is not None and self.__size >= self.max_bytes:
+            if self.__compressor is not None:
+                self.__file.write(self.__compressor.flush())
+            self.__rotate()
+            self.__open()
+        record = RECORD_HEADER.pack(timestamp, len(payload)) + payload
+        if self.__compressor is not None:
+            record = self.__compressor.compress(record)
+        self.__write(record)
+
+    def close(self):
+        """写入队列中剩余的记录并关闭文件"""
+        if self.__closed:
+            return
+        self.__closed = True
+        self.__records.put(None)
+        self.__thread.join()
+        if self.__file is None:
+            return
+        if self.__compressor is not None:
+            self.__file.write(self.__compressor.flush())
+        self.__file.close()
+        self.__file = None
+
+    def __enter__(self) -> 'Journal':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def journal_files(path: str | os.PathLike[str]) -> list[str]:
+    """日志及其轮转文件，从旧到新排列"""
+    path = os.fspath(path)
+    files = [path] if os.path.exists(path) else []
+    for i in itertools.count(1):
+        if not os.path.exists(f'{path}.{i}'):
+            break
+        files.append(f'{path}.{i}')
+    files.reverse()
+    return files
+
+
+def read_file(path: str) -> Iterator[tuple[float, str]]:
+    with open(path, 'rb') as file:
+        header = file.read(len(MAGIC) + 1)
+        if len(header) == 0:
+            return
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f'{path} is not a journal file')
+        decompressor = zlib.decompressobj() if header[-1] & FLAG_COMPRESSED else None
+        buffer = b''
+        while True:
+            chunk = file.read(READ_SIZE)
+            if len(chunk) == 0:
+                break
+            buffer += decompressor.decompress(chunk) if decompressor is not None else chunk
+            offset = 0
+            while len(buffer) - offset >= RECORD_HEADER.size:
+                timestamp, length = RECORD_HEADER.unpack_from(buffer, offset)
+                end = offset + RECORD_HEADER.size + length
+                if end > len(buffer):
+                    break
+                yield timestamp, buffer[offset + RECORD_HEADER.size:end].decode()
+                offset = end
+            buffer = buffer[offset:]
+        # 末尾不完整的记录（写入时进程崩溃）被忽略
+
+
+def read_journal(path: str | os.PathLike[str]) -> Iterator[tuple[float, str]]:
+    """
+    按写入顺序读出日志（包括轮转出的旧文件）中的全部记录
+
+    :return: `(接收时间戳, 原始帧)` 的迭代器
+    """
+    for file in journal_files(path):
+        yield from read_file(file)
+
+
+class ReplayApi(OfflineApi):
+    """
+    回放推送日志的适配器，与 `Bot.from_api` 一起使用。推送按原始时间间隔的 `1 / speed` 发出，日志回放完毕后 `Bot.run` 结束。
+
+    回放时不连接 mirai-api-http，命令的处理与 `lightq.batch.OfflineApi` 相同：不会被执行，一律返回成功。
+
+    :param path: 日志文件路径
+    :param speed: 回放速度的倍数，如 2.0 表示以两倍速回放，为 `None` 时不等待，尽快发出全部推送
+    :param bot_id: bot 的 QQ 号
+    """
+
+    def __init__(self, path: str | os.PathLike[str], speed: float | None = 1.0, bot_id: int = 0):
+        super().__init__(bot_id)
+        self.base_url = f'file:{os.fspath(path)}'
+        self.path = path
+        self.speed = speed
+        self.replayed = 0
+        """已经发出的推送数"""
+        self.__records: Generator[tuple[float, str], None, None] | None = None
+        self.__start = 0.0
+        self.__first: float | None = None
+
+    async def connect(self):
+        if self.__records is None:
+            self.__records = read_journal(self.path)
+
+    async def close(self):
+        """停止回放，之后 `recv` 抛出 `ConnectionAbortedError`"""
+        if self.__records is None:
+            self.__records = read_journal(self.path)
+        self.__records.close()
+
+    async def recv_frame(self) -> Frame:
+        """
+        :raises ConnectionAbortedError: 日志已经回放完毕时抛出
+        """
+        await self.connect()
+        record = next(cast(Generator[tuple[float, str], None, None], self.__records), None)
+        if record is None:
+            raise ConnectionAbortedError('the journal has been replayed')
+        timestamp, frame = record
+        loop = asyncio.get_running_loop()
+        if self.__first is None:
+            self.__first, self.__start = timestamp, loop.time()
+        elif self.speed is not None:
+            delay = self.__start + (timestamp - self.__first) / self.speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self.replayed += 1
+        return frame
@@ -0,0 +1,309 @@
+"""
+bot 运行时的指标：计数器（`Counter`）、仪表（`Gauge`）和直方图（`Histogram`），由 `MetricsRegistry` 统一管理，
+可以以 Prometheus 文本格式导出，也可以在测试中直接读取。
+
+Examples:
+::
+    bot.metrics = BotMetrics()
+    await bot.metrics.serve(port=9100)  # 在 http://127.0.0.1:9100/metrics 提供 Prometheus 格式的指标
+    ...
+    bot.metrics.received.value(type='GroupMessage')
+"""
+
+import asyncio
+import bisect
+import math
+import typing
+from typing import Callable, Iterable, Iterator
+
+if typing.TYPE_CHECKING:
+    from .framework import Bot
+
+__all__ = ['Counter', 'Gauge', 'Histogram', 'MetricsRegistry', 'BotMetrics']
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+"""直方图的默认桶（秒），从 100 微秒到 10 秒"""
+
+
+def format_labels(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra != '':
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if len(pairs) > 0 else ''
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    type: str
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if len(labels) != len(self.labels):
+            raise ValueError(f'metric {self.name!r} expects labels {self.labels}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        """产生 `(指标名, 标签, 值)`"""
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = [f'# HELP {self.name} {escape(self.documentation)}', f'# TYPE {self.name} {self.type}']
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{labels} {format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """只增不减的计数器"""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self.__values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        if amount < 0:
+            raise ValueError('counters can only be increased')
+        key = self._key(labels)
+        self.__values[key] = self.__values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self.__values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for key, value in self.__values.items():
+            yield self.name, format_labels(self.labels, key), value
+
+
+class Gauge(Metric):
+    """
+    可增可减的仪表。若指定了 `func`，则每次读取时调用 `func` 取得当前值（此时不支持标签）。
+    """
+
+    type = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        func: Callable[[], float] | None = None
+    ):
+        super().__init__(name, documentation, labels)
+        if func is not None and len(self.labels) > 0:
+            raise ValueError('a gauge with a callback cannot have labels')
+        self.func = func
+        self.__values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str):
+        self.__values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        self.__values[key] = self.__values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        if self.func is not None:
+            return self.func()
+        return self.__values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        if self.func is not None:
+            yield self.name, '', self.func()
+            return
+        for key, value in self.__values.items():
+            yield self.name, format_labels(self.labels, key), value
+
+
+class Histogram(Metric):
+    """按桶统计观测值的分布，同时记录观测值的总数和总和"""
+
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.__counts: dict[LabelValues, list[int]] = {}  # 各桶（不累积）的计数，最后一个为 +Inf 桶
+        self.__sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        counts = self.__counts.get(key)
+        if counts is None:
+            counts = self.__counts[key] = [0] * (len(self.buckets) + 1)
+            self.__sums[key] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.__sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self.__counts.get(self._key(labels), ()))
+
+    def sum(self, **labels: str) -> float:
+        return self.__sums.get(self._key(labels), 0.0)
+
+    def label_values(self) -> list[LabelValues]:
+        """已有观测值的标签组合"""
+        return list(self.__counts)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        for key, counts in self.__counts.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield (f'{self.name}_bucket',
+                       format_labels(self.labels, key, f'le="{format_value(bound)}"'),
+                       cumulative)
+            yield f'{self.name}_sum', format_labels(self.labels, key), self.__sums[key]
+            yield f'{self.name}_count', format_labels(self.labels, key), cumulative
+
+
+class MetricsRegistry:
+    """指标的集合，负责导出和对外提供指标"""
+
+    def __init__(self):
+        self.__metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.__metrics:
+            raise ValueError(f'metric {metric.name!r} is already registered')
+        self.__metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Iterable[str] = ()) -> Counter:
+        return typing.cast(Counter, self.register(Counter(name, documentation, labels)))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        func: Callable[[], float] | None = None
+    ) -> Gauge:
+        return typing.cast(Gauge, self.register(Gauge(name, documentation, labels, func)))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return typing.cast(Histogram, self.register(Histogram(name, documentation, labels, buckets)))
+
+    def get(self, name: str) -> Metric | None:
+        return self.__metrics.get(name)
+
+    def __iter__(self) -> Iterator[Metric]:
+        return iter(self.__metrics.values())
+
+    def expose(self) -> str:
+        """以 Prometheus 文本格式导出所有指标"""
+        return ''.join(metric.expose() + '\n' for metric in self.__metrics.values())
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 9100) -> asyncio.Server:
+        """
+        启动一个 HTTP 服务器，对 ``GET /metrics`` 返回 Prometheus 文本格式的指标。返回的服务器需由调用者关闭。
+        """
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            try:
+                request_line = (await reader.readline()).decode('latin-1')
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):  # 忽略请求头
+                    pass
+                parts = request_line.split()
+                if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                    status, body = '200 OK', self.expose().encode()
+                else:
+                    status, body = '404 Not Found', b'not found\n'
+                writer.write(
+                    f'HTTP/1.1 {status}\r\n'
+                    'Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    'Connection: close\r\n\r\n'.encode() + body
+                )
+                await writer.drain()
+            finally:
+                writer.close()
+
+        return await asyncio.start_server(handle, host, port)
+
+
+class BotMetrics:
+    """
+    `Bot` 的内置指标。赋值给 `bot.metrics` 后生效，未设置时不会记录任何指标。
+
+    :param registry: 指标注册到的 `MetricsRegistry`，默认新建一个
+    """
+
+    def __init__(self, registry: MetricsRegistry | None = None):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.__bot: 'Bot | None' = None
+        r = self.registry
+        self.received = r.counter('lightq_received_total', 'Pushes received, by entity type.', ['type'])
+        self.route_seconds = r.histogram(
+            'lightq_route_seconds', 'Time spent routing a context to a handler.', ['kind']
+        )
+        self.handler_seconds = r.histogram(
+            'lightq_handler_seconds', 'Time spent in a handler, including resolvers and sending the reply.',
+            ['handler']
+        )
+        self.filter_rejects = r.counter('lightq_filter_rejects_total', 'Contexts rejected by filters.', ['handler'])
+        self.exceptions = r.counter('lightq_exceptions_total', 'Exceptions raised while handling.', ['type'])
+        self.command_seconds = r.histogram(
+            'lightq_command_seconds', 'Round trip time of commands sent to mirai-api-http.', ['command']
+        )
+        self.pending_responses = r.gauge(
+            'lightq_pending_responses', 'Commands waiting for a response.', func=self.__pending_responses
+        )
+        self.queued_pushes = r.gauge(
+            'lightq_queued_pushes', 'Pushes received but not yet taken by the bot.', func=self.__queued_pushes
+        )
+        self.background_tasks = r.gauge(
+            'lightq_background_tasks', 'Background tasks of the bot.', func=self.__background_tasks
+        )
+
+    def bind(self, bot: 'Bot'):
+        """由 `Bot` 调用，使仪表读取该 bot 的状态"""
+        self.__bot = bot
+
+    def __pending_responses(self) -> float:
+        return self.__bot.api.pending_responses if self.__bot is not None else 0
+
+    def __queued_pushes(self) -> float:
+        return self.__bot.api.queued_pushes if self.__bot is not None else 0
+
+    def __background_tasks(self) -> float:
+        return self.__bot.background_task_count if self.__bot is not None else 0
+
+    def expose(self) -> str:
+        return self.registry.expose()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 9100) -> asyncio.Server:
+        return await self.registry.serve(host, port)
@@ -0,0 +1,176 @@
+"""
+处理器的性能剖析：记录每个处理器的 `can_handle`、`handle` 以及每个路由器的 `route` 的耗时，
+并找出耗时超过阈值的慢处理器。
+
+耗时分为两部分：墙上时间（从开始到结束经过的时间，包括等待网络等 await 的时间）和阻塞时间
+（协程实际占用事件循环的时间）。同步的处理器、过滤器和参数解析函数在事件循环中直接执行，
+它们的耗时全部计入阻塞时间，阻塞时间长的处理器会拖慢整个 bot。
+
+Examples:
+::
+    bot.profiler = HandlerProfiler(slow_threshold=0.1, sample_rate=0.05, profile_dir='profiles')
+    ...
+    print(bot.profiler.report())
+"""
+
+import contextvars
+import cProfile
+import dataclasses
+import os
+import random
+import time
+from typing import Any, Coroutine, Generator, TypeVar
+
+from .framework import RecvContext, ExceptionContext
+from .logging import logger
+
+__all__ = ['HandlerStats', 'HandlerProfiler']
+
+T = TypeVar('T')
+
+sampling: contextvars.ContextVar[bool] = contextvars.ContextVar('lightq.profiling.sampling', default=False)
+"""
+当前是否处于被 cProfile 剖析的调用中。路由器的 `route` 中会调用处理器的 `can_handle`，
+同一时刻只能启用一个 cProfile（Python 3.12 起重复启用会抛出 `ValueError`），因此只剖析最外层的调用
+"""
+
+
+@dataclasses.dataclass
+class HandlerStats:
+    """某个处理器（或路由器）在某个阶段的累计耗时，单位为秒"""
+
+    calls: int = 0
+    wall_time: float = 0.0
+    blocking_time: float = 0.0
+    max_wall_time: float = 0.0
+    max_blocking_time: float = 0.0
+    slow_calls: int = 0
+
+    def add(self, wall_time: float, blocking_time: float, slow: bool):
+        self.calls += 1
+        self.wall_time += wall_time
+        self.blocking_time += blocking_time
+        self.max_wall_time = max(self.max_wall_time, wall_time)
+        self.max_blocking_time = max(self.max_blocking_time, blocking_time)
+        self.slow_calls += slow
+
+
+class StepTimer:
+    """
+    逐步驱动协程并累计每一步占用事件循环的时间。若指定了 `profile`，则只在协程执行的步骤中启用 cProfile，
+    不会把同时运行的其他任务计入剖析结果。
+    """
+
+    def __init__(self, coro: Coroutine[Any, Any, T], profile: cProfile.Profile | None = None):
+        self.coro = coro
+        self.profile = profile
+        self.blocking_time = 0.0
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        send_value: Any = None
+        throw_value: BaseException | None = None
+        while True:
+            start = time.perf_counter()
+            if self.profile is not None:
+                self.profile.enable()
+            try:
+                if throw_value is not None:
+                    yielded = self.coro.throw(throw_value)
+                else:
+                    yielded = self.coro.send(send_value)
+            except StopIteration as e:
+                return e.value
+            finally:
+                if self.profile is not None:
+                    self.profile.disable()
+                self.blocking_time += time.perf_counter() - start
+            try:
+                send_value, throw_value = (yield yielded), None
+            except BaseException as e:  # 如 CancelledError，转交给被驱动的协程
+                send_value, throw_value = None, e
+
+
+class HandlerProfiler:
+    """
+    处理器的性能剖析器，赋值给 `bot.profiler` 后生效。
+
+    :param slow_threshold: 墙上时间或阻塞时间超过该值（秒）的调用被视为慢调用，会记录一条警告日志
+    :param sample_rate: 以该概率对调用进行 cProfile 剖析，为 0 时不剖析
+    :param profile_dir: 被剖析的调用为慢调用时，将 cProfile 的结果保存到该目录（可用 `pstats` 或 snakeviz 查看），
+        为 `None` 时不保存
+    """
+
+    def __init__(
+        self,
+        slow_threshold: float = 0.1,
+        sample_rate: float = 0.0,
+        profile_dir: str | os.PathLike[str] | None = None
+    ):
+        self.slow_threshold = slow_threshold
+        self.sample_rate = sample_rate
+        self.profile_dir = profile_dir
+        self.stats: dict[tuple[str, str], HandlerStats] = {}
+        """(处理器或路由器的名称, 阶段) => 累计耗时，阶段为 can_handle、handle 或 route"""
+
+    async def profile(
+        self,
+        name: str,
+        phase: str,
+        context: RecvContext | ExceptionContext,
+        coro: Coroutine[Any, Any, T]
+    ) -> T:
+        """运行 `coro` 并记录其耗时"""
+        profile = None
+        token = None
+        if self.sample_rate > 0 and not sampling.get() and random.random() < self.sample_rate:
+            profile = cProfile.Profile()
+            token = sampling.set(True)
+        timer = StepTimer(coro, profile)
+        start = time.perf_counter()
+        try:
+            return await timer
+        finally:
+            if token is not None:
+                sampling.reset(token)
+            wall_time = time.perf_counter() - start
+            slow = max(wall_time, timer.blocking_time) > self.slow_threshold
+            key = (name, phase)
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = HandlerStats()
+            stats.add(wall_time, timer.blocking_time, slow)
+            if slow:
+                self.__report_slow(name, phase, context, wall_time, timer.blocking_time, profile)
+
+    def __report_slow(
+        self,
+        name: str,
+        phase: str,
+        context: RecvContext | ExceptionContext,
+        wall_time: float,
+        blocking_time: float,
+        profile: cProfile.Profile | None
+    ):
+        data = context.data if isinstance(context, RecvContext) else context.exception
+        message = (f'slow {phase} of {name}: {wall_time * 1000:.1f} ms '
+                   f'(blocking {blocking_time * 1000:.1f} ms), context type: {type(data).__name__}')
+        if profile is not None and self.profile_dir is not None:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f'{name}.{phase}.{time.time_ns()}.prof')
+            profile.dump_stats(path)
+            message += f', profile saved to {path}'
+        logger.warning(message)
+
+    def report(self) -> str:
+        """按阻塞时间从高到低排列的文本报表，时间单位为毫秒"""
+        lines = [f'{"name":<48}{"phase":<12}{"calls":>8}{"wall":>12}{"blocking":>12}'
+                 f'{"max wall":>12}{"max block":>12}{"slow":>6}']
+        items = sorted(self.stats.items(), key=lambda item: item[1].blocking_time, reverse=True)
+        for (name, phase), stats in items:
+            lines.append(f'{name:<48}{phase:<12}{stats.calls:>8}{stats.wall_time * 1000:>12.2f}'
+                         f'{stats.blocking_time * 1000:>12.2f}{stats.max_wall_time * 1000:>12.2f}'
+                         f'{stats.max_blocking_time * 1000:>12.2f}{stats.slow_calls:>6}')
+        return '\n'.join(lines)
+
+    def clear(self):
+        self.stats.clear()
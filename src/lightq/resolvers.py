@@ -84,3 +84,8 @@ def text(context: RecvContext | ExceptionContext) -> str:
 
 def at_targets(context: RecvContext | ExceptionContext) -> list[int]:
     return [at.target for at in MessageChain.from_context(context).get_all(entities.At)]
+
+
+def bot_id(context: RecvContext | ExceptionContext) -> int:
+    """收到推送的 bot 账号"""
+    return context.bot_id
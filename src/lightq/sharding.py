@@ -0,0 +1,459 @@
+"""
+多进程分片运行：一个主进程持有与 mirai-api-http 的连接，将收到的原始推送帧按会话（群号或私聊对象）分片转发给
+N 个工作进程，每个工作进程运行同一套处理器。工作进程发出的命令（包括回复）经由主进程的连接发送。
+
+同一个群的推送总是被转发到同一个工作进程，因此处理器中按群保存的状态只存在于一个进程内，无需跨进程同步。
+JSON 解析、路由和处理器的执行分摊到多个 CPU 核心上，主进程只读出推送的群号（见 `peek_shard_key`）而不解析整个推送。
+
+Examples:
+::
+    # 必须定义在模块顶层，工作进程会按名称导入该函数
+    def setup(bot: Bot):
+        bot.add_all(scan_handlers(my_handlers))
+
+    if __name__ == '__main__':
+        api = MiraiApi(bot_id, verify_key, 'ws://localhost:8080')
+        asyncio.run(ShardedRunner(api, setup, workers=4).run())
+"""
+
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import struct
+import typing
+from typing import Any, AsyncIterable, AsyncIterator, Callable, cast
+
+from .api import BaseApi
+from .api._base import push_from_json
+from .api._frame import Frame, load_frame, peek_shard_key
+from .api._http import HttpClient
+from .api._media_cache import MediaCache
+from .api._upload import post_multipart
+from .entities import Message, Event, SyncMessage, UnsupportedEntity
+from .exceptions import MiraiApiException
+from .framework import Bot
+from .logging import logger
+
+__all__ = ['ShardedRunner', 'ShardApi', 'shard_of']
+
+# 进程间消息：1 字节类型 + 4 字节长度（大端序）+ UTF-8 编码的内容
+HEADER = struct.Struct('>cI')
+HELLO = b'H'  # 工作进程 -> 主进程：{"shard": 序号}；主进程 -> 工作进程：会话信息
+PUSH = b'P'  # 主进程 -> 工作进程：原始推送帧
+COMMAND = b'C'  # 工作进程 -> 主进程：{"id", "command", "content", "subCommand"}
+RESPONSE = b'R'  # 主进程 -> 工作进程：{"id", "response"} 或 {"id", "error"}
+
+Setup = Callable[[Bot], Any]
+
+WATCH_INTERVAL = 0.5
+"""检查工作进程是否存活的间隔（秒）"""
+
+
+def shard_of(frame: Frame, shards: int) -> int:
+    """推送帧应转发到的分片序号"""
+    return peek_shard_key(frame) % shards
+
+
+async def write_message(writer: asyncio.StreamWriter, kind: bytes, payload: str):
+    data = payload.encode()
+    writer.write(HEADER.pack(kind, len(data)) + data)
+    await writer.drain()
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[bytes, str]:
+    """
+    :raises asyncio.IncompleteReadError: 连接被关闭时抛出
+    """
+    kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return kind, (await reader.readexactly(length)).decode()
+
+
+class ShardApi(BaseApi):
+    """
+    工作进程使用的适配器：推送来自主进程，命令通过主进程的连接发送。媒体文件直接上传到 mirai-api-http 的 HTTP 适配器。
+
+    :param bot_id: bot 的 QQ 号
+    :param shard: 分片序号
+    :param host: 主进程监听的地址
+    :param port: 主进程监听的端口
+    """
+
+    def __init__(self, bot_id: int, shard: int, host: str, port: int):
+        self.bot_id = bot_id
+        self.verify_key = ''
+        self.base_url = f'tcp://{host}:{port}'
+        self.shard = shard
+        self.host = host
+        self.port = port
+        self.session_key: str | None = None
+        self.http_url: str | None = None
+        self.media_cache: MediaCache | None = MediaCache()
+        self.__reader: asyncio.StreamReader | None = None
+        self.__writer: asyncio.StreamWriter | None = None
+        self.__pushes: asyncio.Queue[str | None] = asyncio.Queue()
+        self.__responses: dict[int, asyncio.Future[dict[str, Any]]] = {}
+        self.__ids = itertools.count()
+        self.__reading_task: asyncio.Task | None = None
+        self.__connect_lock = asyncio.Lock()
+        self.__http_client: HttpClient | None = None
+
+    @property
+    def pending_responses(self) -> int: return len(self.__responses)
+
+    @property
+    def queued_pushes(self) -> int: return self.__pushes.qsize()
+
+    async def connect(self):
+        if self.__writer is not None:
+            return
+        async with self.__connect_lock:
+            if self.__writer is not None:
+                return
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            await write_message(writer, HELLO, json.dumps({'shard': self.shard}))
+            kind, payload = await read_message(reader)
+            assert kind == HELLO
+            hello = json.loads(payload)
+            self.session_key, self.http_url = hello['session_key'], hello['http_url']
+            self.__reader, self.__writer = reader, writer
+            self.__reading_task = asyncio.create_task(self.__read())
+
+    async def __read(self):
+        if typing.TYPE_CHECKING:
+            assert self.__reader is not None
+        try:
+            while True:
+                kind, payload = await read_message(self.__reader)
+                if kind == PUSH:
+                    self.__pushes.put_nowait(payload)
+                elif kind == RESPONSE:
+                    message = json.loads(payload)
+                    future = self.__responses.pop(message['id'], None)
+                    if future is not None and not future.done():
+                        future.set_result(message)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for future in self.__responses.values():
+                if not future.done():
+                    future.set_exception(ConnectionAbortedError('the owner process closed the connection'))
+            self.__responses.clear()
+            self.__pushes.put_nowait(None)  # 通知 recv 连接已关闭
+            writer = self.__writer
+            self.__reader = self.__writer = None
+            if writer is not None:
+                writer.close()
+
+    async def close(self):
+        if self.__writer is None:
+            return
+        self.__writer.close()
+        if self.__reading_task is not None:
+            await self.__reading_task
+        if self.__http_client is not None:
+            await self.__http_client.close()
+
+    async def send_command(
+        self,
+        command: str,
+        content: dict[str, Any] | None = None,
+        sub_command: str | None = None
+    ) -> dict[str, Any]:
+        """
+        通过主进程执行命令
+
+        :raises:
+            MiraiApiException: 若状态码非 0 则抛出对应的异常
+            ConnectionAbortedError: 与主进程的连接断开时抛出
+            RuntimeError: 主进程执行命令时出现其他错误
+        """
+        await self.connect()
+        if typing.TYPE_CHECKING:
+            assert self.__writer is not None
+        request_id = next(self.__ids)
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        self.__responses[request_id] = future
+        await write_message(self.__writer, COMMAND, json.dumps({
+            'id': request_id,
+            'command': command,
+            'content': content if content is not None else {},
+            'subCommand': sub_command
+        }, ensure_ascii=False))
+        message = await future
+        if 'error' in message:
+            error = message['error']
+            if 'code' in error:
+                raise MiraiApiException.from_response(error)
+            raise RuntimeError(f'command {command} failed in the owner process: {error["message"]}')
+        return cast(dict[str, Any], message['response'])
+
+    __send_command__ = send_command
+
+    async def recv_frame(self) -> Frame:
+        """
+        :raises ConnectionAbortedError: 与主进程的连接断开时抛出
+        """
+        await self.connect()
+        frame = await self.__pushes.get()
+        if frame is None:
+            raise ConnectionAbortedError('the owner process closed the connection')
+        return frame
+
+    async def recv(self) -> Message | Event | SyncMessage | UnsupportedEntity:
+        return push_from_json(cast(dict[str, Any], load_frame(await self.recv_frame())['data']))
+
+    def __aiter__(self) -> AsyncIterator[Message | Event | SyncMessage | UnsupportedEntity]:
+        async def generator():
+            while True:
+                try:
+                    yield await self.recv()
+                except ConnectionAbortedError:
+                    break
+
+        return aiter(generator())
+
+    async def __upload__(
+        self,
+        path: str,
+        fields: dict[str, str],
+        file_field: str,
+        filename: str,
+        chunks: AsyncIterable[bytes]
+    ) -> dict[str, Any]:
+        await self.connect()
+        if self.http_url is None:
+            raise RuntimeError('the owner process does not provide an http url for uploading')
+        if self.__http_client is None:
+            self.__http_client = HttpClient(self.http_url)
+        fields = {'sessionKey': cast(str, self.session_key), **fields}
+        return await post_multipart(self.__http_client, path, fields, file_field, filename, chunks)
+
+
+def run_worker(bot_id: int, shard: int, host: str, port: int, setup: Setup):
+    """工作进程的入口"""
+
+    async def main():
+        bot = Bot.from_api(ShardApi(bot_id, shard, host, port))
+        setup(bot)
+        await bot.run()
+
+    asyncio.run(main())
+
+
+class ShardedRunner:
+    """
+    在主进程中运行，持有 `api` 的连接并管理工作进程。
+
+    :param api: 与 mirai-api-http 连接的适配器
+    :param setup: 在每个工作进程中调用，用于向该进程的 `Bot` 注册处理器。必须是模块顶层的函数（可被 pickle）
+    :param workers: 工作进程数，默认为 CPU 核心数
+    :param start_method: multiprocessing 的启动方式，默认为 spawn
+    :param start_timeout: 等待工作进程全部连接的最长时间（秒），为 `None` 时不限
+    :param queue_size: 每个分片等待转发的推送数上限。每个分片由各自的任务转发，一个处理缓慢的工作进程不会阻塞
+        推送的接收和其他分片的转发，其队列满时新的推送被丢弃
+    """
+
+    def __init__(
+        self,
+        api: BaseApi,
+        setup: Setup,
+        workers: int | None = None,
+        start_method: str = 'spawn',
+        start_timeout: float | None = 60.0,
+        queue_size: int = 1000
+    ):
+        self.api = api
+        self.setup = setup
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.start_method = start_method
+        self.start_timeout = start_timeout
+        self.queue_size = queue_size
+        self.forwarded = [0] * self.workers
+        """转发到各工作进程的推送数"""
+
+        self.dropped = [0] * self.workers
+        """因工作进程已退出、连接已断开或转发队列已满而丢弃的推送数"""
+
+        self.__writers: dict[int, asyncio.StreamWriter] = {}
+        self.__queues: list[asyncio.Queue[str]] = [asyncio.Queue(queue_size) for _ in range(self.workers)]
+        self.__forwarding_tasks: dict[int, asyncio.Task] = {}
+        self.__congested: set[int] = set()
+        self.__all_connected = asyncio.Event()
+        self.__processes: list[multiprocessing.process.BaseProcess] = []
+        self.__server: asyncio.Server | None = None
+        self.__tasks: set[asyncio.Task] = set()
+        self.__unavailable: set[int] = set()
+        self.__watching_task: asyncio.Task | None = None
+
+    async def start(self):
+        """
+        连接 mirai-api-http，启动工作进程并等待它们全部连接
+
+        :raises:
+            RuntimeError: 有工作进程在连接前退出（如 `setup` 抛出异常）时抛出
+            TimeoutError: 工作进程未能在 `start_timeout` 内全部连接时抛出
+        """
+        await self.api.connect()
+        self.__server = await asyncio.start_server(self.__handle_worker, '127.0.0.1', 0)
+        host, port = self.__server.sockets[0].getsockname()[:2]
+        context = multiprocessing.get_context(self.start_method)
+        for shard in range(self.workers):
+            process = context.Process(
+                target=run_worker,
+                args=(self.api.bot_id, shard, host, port, self.setup),
+                name=f'lightq-shard-{shard}',
+                daemon=True
+            )
+            process.start()
+            self.__processes.append(process)
+        try:
+            await asyncio.wait_for(self.__wait_connected(), self.start_timeout)
+        except BaseException as e:
+            await self.close()
+            if isinstance(e, asyncio.TimeoutError):
+                raise TimeoutError(f'not all shard workers connected in {self.start_timeout} seconds') from None
+            raise
+        self.__watching_task = asyncio.create_task(self.__watch())
+
+    async def __wait_connected(self):
+        while not self.__all_connected.is_set():
+            for shard, process in enumerate(self.__processes):
+                if process.exitcode is not None and shard not in self.__writers:
+                    raise RuntimeError(f'shard {shard} exited with code {process.exitcode} before connecting')
+            try:
+                await asyncio.wait_for(self.__all_connected.wait(), WATCH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def __watch(self):
+        """记录退出的工作进程，并关闭与它的连接，之后转发到该分片的推送被丢弃"""
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL)
+            for shard, process in enumerate(self.__processes):
+                if process.exitcode is not None and shard not in self.__unavailable:
+                    self.__mark_unavailable(shard, f'the worker exited with code {process.exitcode}')
+
+    def __mark_unavailable(self, shard: int, reason: str):
+        """停止向该分片转发，关闭与它的连接，队列中尚未转发的推送计为丢弃"""
+        if shard in self.__unavailable:
+            return
+        self.__unavailable.add(shard)
+        logger.error(f'shard {shard} is unavailable ({reason}), its pushes will be dropped')
+        task = self.__forwarding_tasks.pop(shard, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        writer = self.__writers.pop(shard, None)
+        if writer is not None:
+            writer.close()
+        queue = self.__queues[shard]
+        self.dropped[shard] += queue.qsize()
+        while not queue.empty():
+            queue.get_nowait()
+
+    async def __forward(self, shard: int, writer: asyncio.StreamWriter):
+        """将分片队列中的推送依次写给工作进程"""
+        queue = self.__queues[shard]
+        while True:
+            frame = await queue.get()
+            try:
+                await write_message(writer, PUSH, frame)
+            except ConnectionError as e:
+                self.dropped[shard] += 1
+                self.__mark_unavailable(shard, repr(e))
+                return
+            self.forwarded[shard] += 1
+            if queue.empty():
+                self.__congested.discard(shard)
+
+    async def run(self):
+        """转发推送，直到与 mirai-api-http 的连接关闭"""
+        if self.__server is None:
+            await self.start()
+        try:
+            while True:
+                try:
+                    frame = await self.api.recv_frame()
+                except Exception as e:
+                    logger.info(f'stop forwarding pushes: {repr(e)}')
+                    break
+                shard = shard_of(frame, self.workers)
+                if shard not in self.__writers:
+                    self.__mark_unavailable(shard, 'the worker disconnected')
+                    self.dropped[shard] += 1
+                    continue
+                try:
+                    self.__queues[shard].put_nowait(
+                        frame if isinstance(frame, str) else json.dumps(frame, ensure_ascii=False)
+                    )
+                except asyncio.QueueFull:
+                    self.dropped[shard] += 1
+                    if shard not in self.__congested:  # 每次队列被填满时只记录一次
+                        self.__congested.add(shard)
+                        logger.warning(f'the forwarding queue of shard {shard} is full, its pushes will be dropped')
+        finally:
+            await self.close()
+
+    async def __handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        kind, payload = await read_message(reader)
+        assert kind == HELLO
+        shard: int = json.loads(payload)['shard']
+        http_url = getattr(self.api, 'http_url', self.api.base_url)
+        session_key = getattr(self.api, 'session_key', None)
+        await write_message(writer, HELLO, json.dumps({'session_key': session_key, 'http_url': http_url}))
+        self.__writers[shard] = writer
+        self.__forwarding_tasks[shard] = asyncio.create_task(self.__forward(shard, writer))
+        if len(self.__writers) == self.workers:
+            self.__all_connected.set()
+        try:
+            while True:
+                kind, payload = await read_message(reader)
+                if kind == COMMAND:
+                    task = asyncio.create_task(self.__execute(writer, json.loads(payload)))
+                    self.__tasks.add(task)
+                    task.add_done_callback(self.__tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if self.__writers.get(shard) is writer:
+                self.__mark_unavailable(shard, 'the worker disconnected')
+            writer.close()
+
+    async def __execute(self, writer: asyncio.StreamWriter, request: dict[str, Any]):
+        message: dict[str, Any] = {'id': request['id']}
+        try:
+            message['response'] = await self.api.send_command(
+                request['command'], request['content'], request['subCommand']
+            )
+        except MiraiApiException as e:
+            message['error'] = e.response
+        except Exception as e:
+            message['error'] = {'message': repr(e)}
+        try:
+            await write_message(writer, RESPONSE, json.dumps(message, ensure_ascii=False))
+        except ConnectionError:
+            pass
+
+    async def close(self):
+        """关闭与工作进程和 mirai-api-http 的连接，并等待工作进程退出"""
+        if self.__watching_task is not None:
+            self.__watching_task.cancel()
+            self.__watching_task = None
+        for task in self.__forwarding_tasks.values():
+            task.cancel()
+        self.__forwarding_tasks.clear()
+        writers = list(self.__writers.values())
+        self.__writers.clear()
+        for writer in writers:
+            writer.close()
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+        for process in self.__processes:
+            await asyncio.to_thread(process.join, 10)
+            if process.is_alive():
+                process.terminate()
+        self.__processes.clear()
+        await self.api.close()
@@ -0,0 +1,245 @@
+"""
+会话状态存储：为连续对话等有状态的处理器保存状态，状态在有效期（TTL）后自动删除，可选地持久化到 SQLite 数据库。
+
+将 `StateStore` 赋值给 `bot.state` 后，处理器可以通过类型为 `StateStore` 的参数得到整个存储，或通过类型为 `Session`
+的参数得到推送所属会话（同一个群中的同一个用户，或同一个好友）的状态。
+
+Examples:
+::
+    @message_handler(GroupMessage)
+    def handler(session: Session) -> str | None:
+        command = session.pop()
+        ...
+
+    bot.state = StateStore(ttl=30)
+"""
+
+import asyncio
+import math
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from ._from_context import FromContext
+from .framework import RecvContext
+from .resolvers import get_group_id, get_sender_id
+
+__all__ = ['StateStore', 'Session']
+
+
+class StateStore(FromContext):
+    """
+    带有效期的键值存储。
+
+    过期的状态通过时间轮删除：时间被划分为长度为 `resolution` 秒的刻度，每个状态按过期的刻度放入 `slots` 个槽中的一个，
+    每次访问存储（或调用 `expire`）时只需处理自上次以来经过的槽，而不必扫描全部状态，长时间无人访问的会话也会被删除。
+
+    :param ttl: 状态的默认有效期（秒）
+    :param max_size: 最多保存的状态数，超出时淘汰最久未写入的状态，为 `None` 时不限制
+    :param path: SQLite 数据库文件路径，为 `None` 时只保存在内存中。状态（键和值须可被 pickle）在每次写入时持久化，
+        bot 重启后仍然有效
+    :param resolution: 时间轮一个刻度的长度（秒）
+    :param slots: 时间轮的槽数
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_size: int | None = 10000,
+        path: str | os.PathLike[str] | None = None,
+        resolution: float = 1.0,
+        slots: int = 512
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.path = path
+        self.resolution = resolution
+        # key => (value, 过期时间)，按写入顺序排列
+        self.__entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self.__wheel: list[set[Hashable]] = [set() for _ in range(slots)]
+        self.__tick = self.__to_tick(time.time())  # 已经处理到的刻度
+        self.__db: sqlite3.Connection | None = None
+        if path is not None:
+            self.__db = sqlite3.connect(path)
+            self.__db.execute('PRAGMA journal_mode=WAL')
+            with self.__db:
+                self.__db.execute(
+                    'CREATE TABLE IF NOT EXISTS state ('
+                    'key BLOB PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)'
+                )
+                self.__db.execute('DELETE FROM state WHERE expires <= ?', (time.time(),))
+            for key, value, expires in self.__db.execute('SELECT key, value, expires FROM state ORDER BY rowid'):
+                self.__put(pickle.loads(key), pickle.loads(value), expires)
+            self.__evict()
+
+    def __to_tick(self, timestamp: float) -> int:
+        return math.floor(timestamp / self.resolution)
+
+    def __slot(self, expires: float) -> set[Hashable]:
+        # 向上取整，保证处理到该槽时状态已经过期
+        return self.__wheel[math.ceil(expires / self.resolution) % len(self.__wheel)]
+
+    def __put(self, key: Hashable, value: Any, expires: float):
+        old = self.__entries.pop(key, None)
+        if old is not None:
+            self.__slot(old[1]).discard(key)
+        self.__entries[key] = (value, expires)
+        self.__slot(expires).add(key)
+
+    def __remove(self, key: Hashable) -> tuple[Any, float] | None:
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.__slot(entry[1]).discard(key)
+        return entry
+
+    def __evict(self):
+        if self.max_size is None or len(self.__entries) <= self.max_size:
+            return
+        evicted = []
+        while len(self.__entries) > self.max_size:
+            key, (_, expires) = self.__entries.popitem(last=False)
+            self.__slot(expires).discard(key)
+            evicted.append(key)
+        self.__delete(evicted)
+
+    def __delete(self, keys: list[Hashable]):
+        if self.__db is not None and len(keys) > 0:
+            with self.__db:
+                self.__db.executemany('DELETE FROM state WHERE key = ?', ((pickle.dumps(key),) for key in keys))
+
+    def expire(self) -> int:
+        """
+        删除已经过期的状态
+
+        :return: 删除的状态数
+        """
+        now = time.time()
+        target = self.__to_tick(now)
+        if target <= self.__tick:
+            return 0
+        if target - self.__tick >= len(self.__wheel):
+            slots = self.__wheel  # 经过了一整圈，每个槽都要处理
+        else:
+            slots = [self.__wheel[tick % len(self.__wheel)] for tick in range(self.__tick + 1, target + 1)]
+        self.__tick = target
+        expired = []
+        for slot in slots:
+            # 槽中还可能有转了若干圈之后才过期的状态
+            expired.extend(key for key in slot if self.__entries[key][1] <= now)
+        for key in expired:
+            self.__remove(key)
+        self.__delete(expired)
+        return len(expired)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        self.expire()
+        entry = self.__entries.get(key)
+        if entry is None:
+            return default
+        if entry[1] <= time.time():  # 未到下一个刻度，但已经过期
+            self.__remove(key)
+            self.__delete([key])
+            return default
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """保存状态，`ttl` 为 `None` 时使用默认的有效期"""
+        self.expire()
+        expires = time.time() + (ttl if ttl is not None else self.ttl)
+        self.__put(key, value, expires)
+        if self.__db is not None:
+            with self.__db:
+                self.__db.execute(
+                    'INSERT OR REPLACE INTO state (key, value, expires) VALUES (?, ?, ?)',
+                    (pickle.dumps(key), pickle.dumps(value), expires)
+                )
+        self.__evict()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """删除并返回状态"""
+        value = self.get(key, self)
+        if value is self:
+            return default
+        self.__remove(key)
+        self.__delete([key])
+        return value
+
+    def touch(self, key: Hashable, ttl: float | None = None) -> bool:
+        """
+        重新计算状态的有效期
+
+        :return: 状态是否存在
+        """
+        value = self.get(key, self)
+        if value is self:
+            return False
+        self.set(key, value, ttl)
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, self) is not self
+
+    def __len__(self) -> int:
+        self.expire()
+        return len(self.__entries)
+
+    def clear(self):
+        self.__entries.clear()
+        for slot in self.__wheel:
+            slot.clear()
+        if self.__db is not None:
+            with self.__db:
+                self.__db.execute('DELETE FROM state')
+
+    def close(self):
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    async def run(self, interval: float | None = None):
+        """每隔 `interval` 秒（默认为 `resolution`）删除一次过期的状态，直到被取消"""
+        while True:
+            await asyncio.sleep(interval if interval is not None else self.resolution)
+            self.expire()
+
+    @classmethod
+    def from_recv_context(cls, context: RecvContext) -> 'StateStore':
+        store = context.bot.state
+        if store is None:
+            raise RuntimeError('bot.state is not set')
+        return store
+
+
+class Session(FromContext):
+    """
+    推送所属会话在 `bot.state` 中的状态。群消息和群事件的会话为（群号，发送者），私聊为（0，好友的 QQ 号）。
+
+    :param store: 状态存储
+    :param key: 会话在存储中的键
+    """
+
+    def __init__(self, store: StateStore, key: Hashable):
+        self.store = store
+        self.key = key
+
+    def get(self, default: Any = None) -> Any:
+        return self.store.get(self.key, default)
+
+    def set(self, value: Any, ttl: float | None = None):
+        self.store.set(self.key, value, ttl)
+
+    def pop(self, default: Any = None) -> Any:
+        return self.store.pop(self.key, default)
+
+    def touch(self, ttl: float | None = None) -> bool:
+        return self.store.touch(self.key, ttl)
+
+    @classmethod
+    def from_recv_context(cls, context: RecvContext) -> 'Session':
+        return cls(
+            StateStore.from_recv_context(context),
+            (get_group_id(context) or 0, get_sender_id(context) or 0)
+        )
@@ -0,0 +1,431 @@
+"""
+本地的 mirai-api-http 替身服务器，用于在没有 QQ 账号的情况下对 `Bot` 和 `MiraiApi` 进行测试和压力测试。
+
+服务器实现了 WebSocket 适配器的 `/all`、`/message`、`/event` 端点，能应答 `ApiMixin` 中的全部命令，
+支持注入延迟和错误，并能按指定速率合成或回放推送。
+
+命令行用法：
+::
+    python -m lightq.testing --port 8080 --rate 100 --latency 0.01 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+import urllib.parse
+from typing import Any, Callable, Awaitable, Iterable, AsyncIterable
+
+import websockets.exceptions
+import websockets.server
+
+__all__ = ['FakeMiraiServer', 'make_group_message', 'make_friend_message']
+
+CommandHandler = Callable[[dict[str, Any]], dict[str, Any]] | Callable[[dict[str, Any]], Awaitable[dict[str, Any]]]
+CommandListener = Callable[[str, str | None, dict[str, Any]], Any]
+
+MESSAGE_TYPES = frozenset({
+    'FriendMessage', 'GroupMessage', 'TempMessage', 'StrangerMessage', 'OtherClientMessage',
+    'FriendSyncMessage', 'GroupSyncMessage', 'TempSyncMessage', 'StrangerSyncMessage'
+})
+
+
+def make_group_message(
+    text: str,
+    group_id: int = 10000,
+    sender_id: int = 20000,
+    message_id: int = 1,
+    timestamp: int | None = None
+) -> dict[str, Any]:
+    """合成一条群消息推送的 `data` 部分"""
+    return {
+        'type': 'GroupMessage',
+        'sender': {
+            'id': sender_id,
+            'memberName': f'member{sender_id}',
+            'specialTitle': '',
+            'permission': 'MEMBER',
+            'joinTimestamp': 0,
+            'lastSpeakTimestamp': 0,
+            'muteTimeRemaining': 0,
+            'group': {'id': group_id, 'name': f'group{group_id}', 'permission': 'MEMBER'}
+        },
+        'messageChain': [
+            {'type': 'Source', 'id': message_id, 'time': timestamp if timestamp is not None else int(time.time())},
+            {'type': 'Plain', 'text': text}
+        ]
+    }
+
+
+def make_friend_message(
+    text: str,
+    sender_id: int = 20000,
+    message_id: int = 1,
+    timestamp: int | None = None
+) -> dict[str, Any]:
+    """合成一条好友消息推送的 `data` 部分"""
+    return {
+        'type': 'FriendMessage',
+        'sender': {'id': sender_id, 'nickname': f'friend{sender_id}', 'remark': ''},
+        'messageChain': [
+            {'type': 'Source', 'id': message_id, 'time': timestamp if timestamp is not None else int(time.time())},
+            {'type': 'Plain', 'text': text}
+        ]
+    }
+
+
+def dumps(obj: Any) -> str:
+    """以 mirai-api-http 的格式（紧凑、不转义非 ASCII 字符）序列化"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+class FakeMiraiServer:
+    """
+    mirai-api-http WebSocket 适配器的替身
+
+    Examples:
+    ::
+        async with FakeMiraiServer(latency=0.01) as server:
+            bot = Bot(server.bot_id, server.verify_key, server.url)
+            ...
+            await server.push(make_group_message('hello'))
+
+    :param host: 监听的地址
+    :param port: 监听的端口，为 0 时自动选择空闲端口
+    :param bot_id: bot 的 QQ 号
+    :param verify_key: 连接时校验的 verify key
+    :param latency: 应答每条命令前等待的秒数，可以是固定值或 `(最小值, 最大值)` 的均匀分布
+    :param error_rate: 命令以错误状态码应答的概率
+    :param error_code: 注入错误时使用的状态码
+    :param session_delay: 建立连接后发送 session 前等待的秒数
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        bot_id: int = 1234567890,
+        verify_key: str = 'verify-key',
+        latency: float | tuple[float, float] = 0.0,
+        error_rate: float = 0.0,
+        error_code: int = 500,
+        session_delay: float = 0.0
+    ):
+        self.host = host
+        self.port = port
+        self.bot_id = bot_id
+        self.verify_key = verify_key
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.session_delay = session_delay
+        self.commands: dict[str, CommandHandler] = self.__default_commands()
+        """命令字 => 处理函数，处理函数接收命令的 `content` 并返回响应的 `data` 部分，可以替换或添加"""
+
+        self.command_counts: dict[str, int] = {}
+        self.sent_messages: dict[int, dict[str, Any]] = {}
+        """bot 发送的消息，message id => 消息内容"""
+
+        self.__listeners: list[CommandListener] = []
+        self.__connections: dict[websockets.server.WebSocketServerProtocol, str] = {}  # connection => endpoint
+        self.__server: websockets.server.WebSocketServer | None = None
+        self.__message_ids = itertools.count(1)
+        self.__sessions = itertools.count(1)
+        self.__tasks: set[asyncio.Task] = set()
+
+    @property
+    def url(self) -> str:
+        return f'ws://{self.host}:{self.port}'
+
+    @property
+    def connections(self) -> int:
+        return len(self.__connections)
+
+    async def start(self):
+        self.__server = await websockets.server.serve(self.__handle, self.host, self.port)
+        self.port = self.__server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self.__server is None:
+            return
+        self.__server.close()
+        await self.__server.wait_closed()
+        self.__server = None
+        for task in list(self.__tasks):
+            task.cancel()
+
+    async def __aenter__(self) -> 'FakeMiraiServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def add_listener(self, listener: CommandListener):
+        """添加命令监听器，每收到一条命令都会以 `(command, sub_command, content)` 调用监听器"""
+        self.__listeners.append(listener)
+
+    async def disconnect(self, endpoint: str | None = None, limit: int | None = None) -> int:
+        """
+        关闭连接，用于模拟连接断开，返回关闭的连接数
+
+        :param endpoint: 只关闭该端点（如 event）的连接，为 `None` 时不限
+        :param limit: 最多关闭的连接数，为 `None` 时不限
+        """
+        targets = [ws for ws, e in self.__connections.items() if endpoint is None or e == endpoint][:limit]
+        for ws in targets:
+            await ws.close()
+        return len(targets)
+
+    # region push
+    async def push(self, data: dict[str, Any]) -> int:
+        """向订阅了该推送的所有连接发送推送，返回发送的连接数"""
+        frame = dumps({'syncId': '-1', 'data': data})
+        kind = 'message' if data.get('type') in MESSAGE_TYPES else 'event'
+        targets = [ws for ws, endpoint in self.__connections.items() if endpoint in ('all', kind)]
+        for ws in targets:
+            try:
+                await ws.send(frame)
+            except websockets.exceptions.ConnectionClosed:
+                pass
+        return len(targets)
+
+    async def push_at_rate(
+        self,
+        pushes: Iterable[dict[str, Any]] | AsyncIterable[dict[str, Any]],
+        rate: float
+    ) -> int:
+        """
+        以每秒 `rate` 条的速率发送推送，返回发送的推送数。速率按绝对时间计算，单条推送的延误不会累积。
+        """
+        interval = 1 / rate
+        start = time.perf_counter()
+        count = 0
+
+        async def send(data: dict[str, Any]):
+            nonlocal count
+            delay = start + count * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.push(data)
+            count += 1
+
+        if isinstance(pushes, AsyncIterable):
+            async for data in pushes:
+                await send(data)
+        else:
+            for data in pushes:
+                await send(data)
+        return count
+
+    async def synthesize(self, rate: float, count: int | None = None, duration: float | None = None) -> int:
+        """
+        以每秒 `rate` 条的速率合成群消息推送，直到发送了 `count` 条或经过了 `duration` 秒。返回发送的推送数。
+        """
+        deadline = time.perf_counter() + duration if duration is not None else None
+
+        def generate():
+            for i in itertools.count(1) if count is None else range(1, count + 1):
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                yield make_group_message(f'message {i}', message_id=i)
+
+        return await self.push_at_rate(generate(), rate)
+
+    async def replay(self, pushes: Iterable[tuple[float, dict[str, Any]]], speed: float = 1.0) -> int:
+        """
+        按原始时间间隔回放推送，返回发送的推送数。
+
+        :param pushes: `(时间戳, 推送内容)` 序列，时间戳单位为秒
+        :param speed: 回放速度的倍数，如 2.0 表示以两倍速回放
+        """
+        start = time.perf_counter()
+        first: float | None = None
+        count = 0
+        for timestamp, data in pushes:
+            if first is None:
+                first = timestamp
+            delay = start + (timestamp - first) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.push(data)
+            count += 1
+        return count
+    # endregion
+
+    async def __handle(self, ws: websockets.server.WebSocketServerProtocol):
+        url = urllib.parse.urlsplit(ws.path)
+        endpoint = url.path.strip('/')
+        query = urllib.parse.parse_qs(url.query)
+        if endpoint not in ('all', 'message', 'event'):
+            await ws.close(code=1008, reason=f'unknown endpoint: {endpoint}')
+            return
+        if query.get('verifyKey', [''])[0] != self.verify_key:
+            await ws.send(dumps({'syncId': '', 'data': {'code': 1, 'msg': 'Wrong verify key'}}))
+            await ws.close()
+            return
+        if query.get('qq', [''])[0] != str(self.bot_id):
+            await ws.send(dumps({'syncId': '', 'data': {'code': 2, 'msg': 'Bot not exist'}}))
+            await ws.close()
+            return
+        if self.session_delay > 0:
+            await asyncio.sleep(self.session_delay)
+        await ws.send(dumps({'syncId': '', 'data': {'code': 0, 'session': f'session-{next(self.__sessions)}'}}))
+        self.__connections[ws] = endpoint
+        try:
+            async for frame in ws:
+                request = json.loads(frame)
+                task = asyncio.create_task(self.__respond(ws, request))
+                self.__tasks.add(task)
+                task.add_done_callback(self.__tasks.discard)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            del self.__connections[ws]
+
+    async def __respond(self, ws: websockets.server.WebSocketServerProtocol, request: dict[str, Any]):
+        command: str = request['command']
+        sub_command: str | None = request.get('subCommand')
+        content: dict[str, Any] = request.get('content') or {}
+        self.command_counts[command] = self.command_counts.get(command, 0) + 1
+        for listener in self.__listeners:
+            result = listener(command, sub_command, content)
+            if asyncio.iscoroutine(result):
+                await result
+        latency = random.uniform(*self.latency) if isinstance(self.latency, tuple) else self.latency
+        if latency > 0:
+            await asyncio.sleep(latency)
+        if self.error_rate > 0 and random.random() < self.error_rate:
+            data = {'code': self.error_code, 'msg': 'injected error'}
+        else:
+            key = f'{command}.{sub_command}' if sub_command is not None else command
+            handler = self.commands.get(key, self.commands.get(command))
+            if handler is None:
+                data = {'code': 400, 'msg': f'unknown command: {command}'}
+            else:
+                data = handler(content)
+                if asyncio.iscoroutine(data):
+                    data = await data
+        try:
+            await ws.send(dumps({'syncId': str(request['syncId']), 'data': data}))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    # region default commands
+    def __default_commands(self) -> dict[str, CommandHandler]:
+        def ok(_: dict[str, Any]) -> dict[str, Any]:
+            return {'code': 0, 'msg': 'success'}
+
+        def send_message(content: dict[str, Any]) -> dict[str, Any]:
+            message_id = next(self.__message_ids)
+            self.sent_messages[message_id] = content
+            return {'code': 0, 'msg': 'success', 'messageId': message_id}
+
+        def message_from_id(content: dict[str, Any]) -> dict[str, Any]:
+            sent = self.sent_messages.get(content['messageId'])
+            if sent is None:
+                return {'code': 5, 'msg': 'target not exist'}
+            return {'code': 0, 'msg': '', 'data': {
+                'type': 'FriendMessage',
+                'sender': self.__friend(self.bot_id),
+                'messageChain': [{'type': 'Source', 'id': content['messageId'], 'time': 0}, *sent['messageChain']]
+            }}
+
+        def profile(_: dict[str, Any]) -> dict[str, Any]:
+            return {'nickname': 'nickname', 'email': '', 'age': 0, 'level': 1, 'sign': '', 'sex': 'UNKNOWN'}
+
+        return {
+            'messageFromId': message_from_id,
+            'botList': lambda _: {'code': 0, 'msg': '', 'data': [self.bot_id]},
+            'friendList': lambda _: {'code': 0, 'msg': '', 'data': [self.__friend(20000)]},
+            'groupList': lambda _: {'code': 0, 'msg': '', 'data': [self.__group(10000)]},
+            'memberList': lambda c: {'code': 0, 'msg': '', 'data': [self.__member(20000, c['target'])]},
+            'botProfile': profile,
+            'friendProfile': profile,
+            'memberProfile': profile,
+            'userProfile': profile,
+            'sendFriendMessage': send_message,
+            'sendGroupMessage': send_message,
+            'sendTempMessage': send_message,
+            'sendNudge': ok,
+            'recall': ok,
+            'deleteFriend': ok,
+            'mute': ok,
+            'unmute': ok,
+            'kick': ok,
+            'quit': ok,
+            'muteAll': ok,
+            'unmuteAll': ok,
+            'setEssence': ok,
+            'groupConfig.get': lambda c: {
+                'name': f'group{c["target"]}', 'announcement': '', 'confessTalk': False,
+                'allowMemberInvite': False, 'autoApprove': False, 'anonymousChat': False
+            },
+            'groupConfig.update': ok,
+            'memberInfo.get': lambda c: self.__member(c['memberId'], c['target']),
+            'memberInfo.update': ok,
+            'memberAdmin': ok,
+            'anno_list': lambda _: {'code': 0, 'msg': '', 'data': []},
+            'anno_publish': lambda c: {'code': 0, 'msg': '', 'data': {
+                'group': self.__group(c['target']), 'content': c['content'], 'senderId': self.bot_id,
+                'fid': f'fid-{next(self.__message_ids)}', 'allConfirmed': False, 'confirmedMembersCount': 0,
+                'publicationTime': int(time.time())
+            }},
+            'anno_delete': ok
+        }
+
+    @staticmethod
+    def __friend(friend_id: int) -> dict[str, Any]:
+        return {'id': friend_id, 'nickname': f'friend{friend_id}', 'remark': ''}
+
+    @staticmethod
+    def __group(group_id: int) -> dict[str, Any]:
+        return {'id': group_id, 'name': f'group{group_id}', 'permission': 'MEMBER'}
+
+    def __member(self, member_id: int, group_id: int) -> dict[str, Any]:
+        return {
+            'id': member_id, 'memberName': f'member{member_id}', 'specialTitle': '', 'permission': 'MEMBER',
+            'joinTimestamp': 0, 'lastSpeakTimestamp': 0, 'muteTimeRemaining': 0, 'group': self.__group(group_id)
+        }
+    # endregion
+
+
+async def main(args: argparse.Namespace):
+    latency = tuple(args.latency) if len(args.latency) == 2 else args.latency[0]
+    server = FakeMiraiServer(
+        args.host, args.port, args.qq, args.verify_key, latency, args.error_rate, args.error_code
+    )
+    async with server:
+        print(f'fake mirai-api-http listening on {server.url} (qq={server.bot_id}, verifyKey={server.verify_key})')
+        if args.rate > 0:
+            while server.connections == 0:
+                await asyncio.sleep(0.1)
+            start = time.perf_counter()
+            count = await server.synthesize(args.rate, args.count, args.duration)
+            elapsed = time.perf_counter() - start
+            print(f'pushed {count} messages in {elapsed:.2f}s ({count / elapsed:.1f} msg/s)')
+            print(f'commands received: {server.command_counts}')
+        else:
+            await asyncio.Future()  # serve forever
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='A local stand-in for mirai-api-http (websocket adapter).')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--qq', type=int, default=1234567890)
+    parser.add_argument('--verify-key', default='verify-key')
+    parser.add_argument('--latency', type=float, nargs='+', default=[0.0],
+                        help='command latency in seconds, or "MIN MAX" for a uniform distribution')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-code', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=0.0,
+                        help='synthesize group messages at this rate (messages per second) once a client connects')
+    parser.add_argument('--count', type=int, default=None)
+    parser.add_argument('--duration', type=float, default=None)
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
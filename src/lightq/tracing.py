@@ -0,0 +1,257 @@
+"""
+分布式追踪：为每条收到的推送创建一个 span，并为路由、每个过滤器、每个参数解析函数、处理器以及处理过程中
+发出的每条命令创建子 span，从而拆解一次对话的延迟。
+
+`Tracer` 的接口与 OpenTelemetry 的 `Tracer` 兼容（`start_as_current_span`），因此 `bot.tracer` 既可以是
+本模块的 `Tracer`，也可以是 ``opentelemetry.trace.get_tracer(...)`` 返回的对象。`bot.tracer` 默认为 `None`，
+此时不创建任何 span，开销可以忽略。
+
+Examples:
+::
+    bot.tracer = Tracer(FileSpanExporter('spans.jsonl'))
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+import traceback
+from typing import Any, Iterator, Protocol, TextIO
+
+__all__ = [
+    'Span',
+    'SpanExporter',
+    'FileSpanExporter',
+    'InMemorySpanExporter',
+    'Tracer',
+    'NoOpTracer',
+    'get_current_span'
+]
+
+AttributeValue = str | bool | int | float
+
+
+class Span:
+    """一段被追踪的操作，接口与 OpenTelemetry 的 `Span` 的常用部分一致"""
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: int,
+        span_id: int,
+        parent_id: int | None,
+        attributes: dict[str, AttributeValue] | None = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attributes: dict[str, AttributeValue] = dict(attributes) if attributes is not None else {}
+        self.events: list[dict[str, Any]] = []
+        self.status = 'UNSET'
+        self.status_description: str | None = None
+        self.start_time = time.time_ns()
+        self.end_time: int | None = None
+
+    def is_recording(self) -> bool:
+        return self.end_time is None
+
+    def set_attribute(self, key: str, value: AttributeValue):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict[str, AttributeValue]):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, attributes: dict[str, AttributeValue] | None = None):
+        self.events.append({'name': name, 'time': time.time_ns(), 'attributes': dict(attributes or {})})
+
+    def record_exception(self, exception: BaseException):
+        self.add_event('exception', {
+            'exception.type': type(exception).__qualname__,
+            'exception.message': str(exception),
+            'exception.stacktrace': ''.join(traceback.format_exception(exception))
+        })
+
+    def set_status(self, status: str, description: str | None = None):
+        """`status` 为 UNSET、OK 或 ERROR"""
+        self.status = status
+        self.status_description = description
+
+    def end(self):
+        if self.end_time is None:
+            self.end_time = time.time_ns()
+
+    @property
+    def duration(self) -> float | None:
+        """持续时间（秒），尚未结束时为 `None`"""
+        return (self.end_time - self.start_time) / 1e9 if self.end_time is not None else None
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            'name': self.name,
+            'trace_id': f'{self.trace_id:032x}',
+            'span_id': f'{self.span_id:016x}',
+            'parent_id': f'{self.parent_id:016x}' if self.parent_id is not None else None,
+            'start_time_unix_nano': self.start_time,
+            'end_time_unix_nano': self.end_time,
+            'attributes': self.attributes,
+            'events': self.events,
+            'status': {'code': self.status, 'description': self.status_description}
+        }
+
+    def __repr__(self) -> str:
+        return f'<Span {self.name} trace_id={self.trace_id:032x} span_id={self.span_id:016x}>'
+
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar('lightq_current_span', default=None)
+
+
+def get_current_span() -> Span | None:
+    """当前上下文中的 span。asyncio 的任务会继承创建它时的上下文，因此后台任务中的 span 也能正确地关联到父 span"""
+    return _current_span.get()
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]): ...
+
+    def shutdown(self): ...
+
+
+class FileSpanExporter:
+    """将结束的 span 以 JSON Lines 格式追加写入本地文件"""
+
+    def __init__(self, path: str | os.PathLike[str]):
+        self.path = path
+        self.__file: TextIO | None = open(path, 'a', encoding='utf-8')
+        self.__lock = threading.Lock()
+
+    def export(self, spans: list[Span]):
+        with self.__lock:
+            if self.__file is None:
+                return
+            for span in spans:
+                self.__file.write(json.dumps(span.to_json(), ensure_ascii=False) + '\n')
+
+    def flush(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.flush()
+
+    def shutdown(self):
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+
+class InMemorySpanExporter:
+    """将结束的 span 保存在内存中，用于测试"""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, spans: list[Span]):
+        self.spans.extend(spans)
+
+    def shutdown(self):
+        pass
+
+    def clear(self):
+        self.spans.clear()
+
+
+class Tracer:
+    """
+    创建 span 并在 span 结束时交给 `exporter`。
+
+    :param exporter: span 的导出目标
+    """
+
+    def __init__(self, exporter: SpanExporter):
+        self.exporter = exporter
+
+    @contextlib.contextmanager
+    def start_as_current_span(
+        self,
+        name: str,
+        context: Any = None,
+        kind: Any = None,
+        attributes: dict[str, AttributeValue] | None = None,
+        links: Any = None,
+        start_time: int | None = None,
+        record_exception: bool = True,
+        set_status_on_exception: bool = True
+    ) -> Iterator[Span]:
+        """
+        创建一个以当前 span 为父 span 的新 span，并在 `with` 语句块中将其设为当前 span。参数与 OpenTelemetry 的
+        `Tracer.start_as_current_span` 相同，`context`、`kind` 和 `links` 仅为兼容而保留，会被忽略
+
+        :param start_time: span 的开始时间（Unix 纪元以来的纳秒数），默认为当前时间
+        """
+        parent = _current_span.get()
+        span = Span(
+            name,
+            parent.trace_id if parent is not None else random.getrandbits(128),
+            random.getrandbits(64),
+            parent.span_id if parent is not None else None,
+            attributes
+        )
+        if start_time is not None:
+            span.start_time = start_time
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if record_exception:
+                span.record_exception(e)
+            if set_status_on_exception:
+                span.set_status('ERROR', f'{type(e).__qualname__}: {e}')
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self.exporter.export([span])
+
+    def shutdown(self):
+        self.exporter.shutdown()
+
+
+class NonRecordingSpan(Span):
+    def __init__(self):
+        super().__init__('', 0, 0, None)
+        self.end_time = self.start_time
+
+    def set_attribute(self, key: str, value: AttributeValue): pass
+
+    def set_attributes(self, attributes: dict[str, AttributeValue]): pass
+
+    def add_event(self, name: str, attributes: dict[str, AttributeValue] | None = None): pass
+
+    def set_status(self, status: str, description: str | None = None): pass
+
+
+INVALID_SPAN = NonRecordingSpan()
+
+
+class NoOpTracer:
+    """什么也不记录的 tracer，可在需要一个 tracer 对象但又不想记录 span 时使用"""
+
+    @contextlib.contextmanager
+    def start_as_current_span(
+        self,
+        name: str,
+        context: Any = None,
+        kind: Any = None,
+        attributes: dict[str, AttributeValue] | None = None,
+        links: Any = None,
+        start_time: int | None = None,
+        record_exception: bool = True,
+        set_status_on_exception: bool = True
+    ) -> Iterator[Span]:
+        yield INVALID_SPAN
+
+    def shutdown(self):
+        pass
@@ -0,0 +1,163 @@
+"""
+事件循环的看门狗：测量事件循环的延迟，并在事件循环被阻塞时找出阻塞它的处理器。
+
+同步的处理器、过滤器和参数解析函数在事件循环中直接执行，其中的一个阻塞调用（如 `time.sleep`、同步的网络请求）
+就会使整个 bot 停止响应。看门狗在事件循环中运行一个定时的心跳任务，另有一个后台线程检查心跳，
+心跳超时时读取事件循环所在线程的调用栈，并将其与 bot 中各处理器的函数对照，从而定位阻塞事件循环的处理器。
+
+Examples:
+::
+    bot.watchdog = LoopWatchdog(threshold=0.5)
+    await bot.run()  # run 会启动和停止看门狗
+"""
+
+import asyncio
+import dataclasses
+import sys
+import threading
+import time
+import traceback
+import types
+import typing
+from typing import Callable, Any
+
+from .logging import logger
+
+if typing.TYPE_CHECKING:
+    from .framework import Bot, MessageHandler, EventHandler, ExceptionHandler
+
+__all__ = ['Stall', 'LoopWatchdog']
+
+
+@dataclasses.dataclass
+class Stall:
+    """一次事件循环阻塞"""
+
+    duration: float
+    """检测到阻塞时事件循环已被阻塞的时间（秒）"""
+
+    handler: 'MessageHandler | EventHandler | ExceptionHandler | None'
+    """阻塞事件循环的处理器，未能定位时为 `None`"""
+
+    role: str | None
+    """阻塞发生在处理器的哪一部分：handler、filter 或 resolver"""
+
+    stack: str
+    """事件循环所在线程的调用栈"""
+
+
+def code_of(func: Callable) -> types.CodeType | None:
+    func = getattr(func, '__func__', func)  # bound method
+    func = getattr(func, '__wrapped__', func)  # functools.wraps
+    return getattr(func, '__code__', None)
+
+
+class LoopWatchdog:
+    """
+    事件循环的看门狗，赋值给 `bot.watchdog` 后由 `Bot.run` 启动。也可以调用 `start` 和 `stop` 手动控制。
+
+    :param threshold: 心跳超过该时间（秒）未更新时视为事件循环被阻塞
+    :param interval: 心跳间隔（秒）
+    """
+
+    def __init__(self, threshold: float = 0.5, interval: float = 0.1):
+        self.threshold = threshold
+        self.interval = interval
+        self.lag = 0.0
+        """最近一次心跳的延迟（秒），即心跳任务实际被唤醒的时间与预定时间之差"""
+
+        self.max_lag = 0.0
+        self.stalls: list[Stall] = []
+        self.__bot: 'Bot | None' = None
+        self.__last_beat = 0.0
+        self.__loop_thread_id: int | None = None
+        self.__heartbeat_task: asyncio.Task | None = None
+        self.__monitor_thread: threading.Thread | None = None
+        self.__stopped = threading.Event()
+
+    @property
+    def running(self) -> bool: return self.__heartbeat_task is not None
+
+    def start(self, bot: 'Bot | None' = None):
+        """在事件循环中启动看门狗。`bot` 用于将阻塞归因到处理器。"""
+        if self.running:
+            return
+        self.__bot = bot
+        self.__loop_thread_id = threading.get_ident()
+        self.__last_beat = time.monotonic()
+        self.__stopped.clear()
+        self.__heartbeat_task = asyncio.create_task(self.__heartbeat())
+        self.__monitor_thread = threading.Thread(target=self.__monitor, name='lightq-watchdog', daemon=True)
+        self.__monitor_thread.start()
+
+    async def stop(self):
+        if self.__heartbeat_task is None:
+            return
+        self.__stopped.set()
+        self.__heartbeat_task.cancel()
+        try:
+            await self.__heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        self.__heartbeat_task = None
+        if self.__monitor_thread is not None:
+            await asyncio.to_thread(self.__monitor_thread.join)
+            self.__monitor_thread = None
+
+    async def __heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag = max(0.0, now - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+            self.__last_beat = now
+
+    def __monitor(self):
+        reported_beat: float | None = None  # 同一次阻塞只报告一次
+        while not self.__stopped.wait(self.interval):
+            last_beat = self.__last_beat
+            blocked = time.monotonic() - last_beat
+            if blocked > self.threshold and reported_beat != last_beat:
+                reported_beat = last_beat
+                self.__report(blocked)
+
+    def __report(self, duration: float):
+        frame = sys._current_frames().get(typing.cast(int, self.__loop_thread_id))
+        if frame is None:
+            return
+        stack = ''.join(traceback.format_stack(frame))
+        handler, role = self.__attribute(frame)
+        stall = Stall(duration, handler, role, stack)
+        self.stalls.append(stall)
+        where = f'{role} of {handler!r}' if handler is not None else 'unknown code'
+        logger.warning(f'event loop blocked for more than {duration:.2f}s in {where}, stack:\n{stack}')
+
+    def __attribute(
+        self,
+        frame: types.FrameType | None
+    ) -> tuple['MessageHandler | EventHandler | ExceptionHandler | None', str | None]:
+        """从最内层的栈帧向外查找，返回第一个属于某个处理器的栈帧所对应的处理器"""
+        codes = self.__handler_codes()
+        while frame is not None:
+            found = codes.get(frame.f_code)
+            if found is not None:
+                return found
+            frame = frame.f_back
+        return None, None
+
+    def __handler_codes(self) -> dict[types.CodeType, tuple[Any, str]]:
+        """代码对象 => (处理器, 角色)。在检测到阻塞时才构建，因此总能反映 bot 当前的处理器"""
+        bot = self.__bot
+        if bot is None:
+            return {}
+        codes: dict[types.CodeType, tuple[Any, str]] = {}
+        # 处理器列表可能正在被事件循环线程修改，复制后再遍历
+        for handler in [*list(bot.message_handlers), *list(bot.event_handlers), *list(bot.exception_handlers)]:
+            for func, role in [(handler.handler, 'handler'),
+                               *((f, 'filter') for f in list(handler.filters)),
+                               *((r, 'resolver') for r in list(handler.resolvers.values()))]:
+                code = code_of(func)
+                if code is not None:
+                    codes.setdefault(code, (handler, role))
+        return codes
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from typing import Any
+
+import websockets.exceptions
+
+from lightq.api import MiraiApi
+from lightq.entities import GroupMessage
+from lightq.testing import FakeMiraiServer, make_group_message
+
+
+class CommandChannelsTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeMiraiServer()
+        await self.server.start()
+        self.api = MiraiApi(self.server.bot_id, self.server.verify_key, self.server.url, command_channels=2)
+        # botList 一直等到 release 被设置才应答，用于让命令停留在连接上
+        self.release = asyncio.Event()
+
+        async def bot_list(_: dict[str, Any]) -> dict[str, Any]:
+            await self.release.wait()
+            return {'code': 0, 'msg': '', 'data': [self.server.bot_id]}
+
+        self.server.commands['botList'] = bot_list
+
+    async def asyncTearDown(self):
+        self.release.set()
+        await self.api.close()
+        await self.server.close()
+
+    async def start_blocking(self) -> asyncio.Task:
+        """发送一条不会立即应答的命令，等到它在某条连接上等待响应后返回"""
+        pending = self.api.pending_responses
+        task = asyncio.create_task(self.api.bot_list())
+        while self.api.pending_responses == pending:
+            await asyncio.sleep(0.01)
+        return task
+
+    async def test_concurrent_connect(self):
+        await asyncio.gather(*(self.api.connect() for _ in range(5)))
+        self.assertEqual(3, self.server.connections)  # 一条 /all 连接和两条 /event 连接
+        await asyncio.gather(*(self.api.group_list() for _ in range(5)))
+        self.assertEqual(3, self.server.connections)
+
+    async def test_least_pending(self):
+        await self.api.connect()
+        first = await self.start_blocking()
+        self.assertEqual([1, 0], self.api.command_channel_pending)
+        await self.api.group_list()  # 轮到第二条连接，立即应答
+        second = await self.start_blocking()
+        # 按轮流的顺序应选第一条连接，但它的等待响应数更多
+        self.assertEqual([1, 1], self.api.command_channel_pending)
+        tasks = [first, second, *[await self.start_blocking() for _ in range(4)]]
+        self.assertEqual([3, 3], self.api.command_channel_pending)
+        self.release.set()
+        self.assertEqual([[self.server.bot_id]] * 6, await asyncio.gather(*tasks))
+        self.assertEqual([0, 0], self.api.command_channel_pending)
+
+    async def test_one_channel_fails(self):
+        await self.api.connect()
+        tasks = [await self.start_blocking() for _ in range(2)]
+        self.assertEqual([1, 1], self.api.command_channel_pending)
+        self.assertEqual(1, await self.server.disconnect('event', limit=1))
+        done, _ = await asyncio.wait(tasks, timeout=10, return_when=asyncio.FIRST_COMPLETED)
+        [failed] = done
+        self.assertIsInstance(failed.exception(), websockets.exceptions.ConnectionClosed)
+        # 另一条连接上的命令和推送连接不受影响，断开的连接在下一次使用时重新建立
+        self.release.set()
+        [succeeded] = [task for task in tasks if task is not failed]
+        self.assertEqual([self.server.bot_id], await succeeded)
+        self.assertEqual(10000, (await asyncio.gather(*(self.api.group_list() for _ in range(4))))[0][0].id)
+        self.assertEqual(3, self.server.connections)
+        await self.server.push(make_group_message('hello'))
+        self.assertIsInstance(await asyncio.wait_for(self.api.recv(), 10), GroupMessage)
+
+
+if __name__ == '__main__':
+    unittest.main()
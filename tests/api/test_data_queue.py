@@ -0,0 +1,20 @@
+import asyncio
+import unittest
+
+from lightq.api._api import DataQueue
+
+
+class DataQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def test_push_consecutive_frames(self):
+        queue = DataQueue()
+        consumer = asyncio.create_task(queue.pop())
+        await asyncio.sleep(0)
+        # 两次 push 之间没有让出事件循环，第一个 consumer 已完成但尚未被移除
+        queue.push('a')
+        queue.push('b')
+        self.assertEqual('a', await consumer)
+        self.assertEqual('b', await queue.pop())
+
+
+if __name__ == '__main__':
+    unittest.main()
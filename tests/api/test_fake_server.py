@@ -0,0 +1,79 @@
+import asyncio
+import time
+import unittest
+
+from lightq import Bot, message_handler
+from lightq.api import MiraiApi
+from lightq.entities import GroupMessage, MessageChain, Plain, Source
+from lightq.exceptions import TargetNotExist
+from lightq.testing import FakeMiraiServer, make_group_message
+
+
+class FakeMiraiServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = FakeMiraiServer()
+        await self.server.start()
+        self.api = MiraiApi(self.server.bot_id, self.server.verify_key, self.server.url)
+
+    async def asyncTearDown(self):
+        await self.api.close()
+        await self.server.close()
+
+    async def test_commands(self):
+        await self.api.connect()
+        self.assertEqual([self.server.bot_id], await self.api.bot_list())
+        self.assertEqual(10000, (await self.api.group_list())[0].id)
+        self.assertEqual(20000, (await self.api.get_member_info(10000, 20000)).id)
+        message_id = await self.api.send_group_message(10000, MessageChain([Plain('hello')]))
+        message = await self.api.message_from_id(message_id, 10000)
+        self.assertEqual(MessageChain([Plain('hello')]), message.message_chain[1:])
+        self.assertIsNone(await self.api.message_from_id(message_id + 1, 10000))
+        await self.api.recall(message_id, 10000)
+        self.assertEqual(1, self.server.command_counts['sendGroupMessage'])
+
+    async def test_error_injection(self):
+        self.server.error_rate = 1.0
+        self.server.error_code = 5
+        with self.assertRaises(TargetNotExist):
+            await self.api.send_group_message(10000, MessageChain([Plain('hello')]))
+
+    async def test_latency(self):
+        self.server.latency = 0.1
+        start = time.perf_counter()
+        await asyncio.gather(*(self.api.bot_list() for _ in range(10)))  # 并发的命令同时等待
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    async def test_push(self):
+        await self.api.connect()
+        self.assertEqual(1, await self.server.push(make_group_message('hello', message_id=42)))
+        message = await self.api.recv()
+        assert isinstance(message, GroupMessage)
+        self.assertEqual(42, message.message_chain[Source].id)
+        self.assertEqual(3, await self.server.synthesize(rate=1000, count=3))
+        for _ in range(3):
+            self.assertIsInstance(await self.api.recv(), GroupMessage)
+
+    async def test_bot(self):
+        replied = asyncio.Event()
+
+        @message_handler(GroupMessage)
+        def echo(chain: MessageChain) -> MessageChain:
+            return chain[1:]
+
+        def listener(command: str, sub_command: str | None, content: dict):
+            if command == 'sendGroupMessage' and content['messageChain'][0]['text'] == 'ping':
+                replied.set()
+
+        self.server.add_listener(listener)
+        bot = Bot.from_api(self.api)
+        bot.add(echo)
+        task = asyncio.create_task(bot.run())
+        while self.server.connections == 0:
+            await asyncio.sleep(0.01)
+        await self.server.push(make_group_message('ping'))
+        await asyncio.wait_for(replied.wait(), 5)
+        task.cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()
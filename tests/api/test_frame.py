@@ -0,0 +1,40 @@
+import json
+import unittest
+
+from lightq.api._frame import peek_sync_id, peek_code, peek_shard_key, load_frame
+from lightq.testing import make_group_message, make_friend_message, dumps
+
+
+class FrameTest(unittest.TestCase):
+    def test_peek_sync_id(self):
+        self.assertEqual('-1', peek_sync_id('{"syncId":"-1","data":{"type":"FriendMessage"}}'))
+        self.assertEqual('', peek_sync_id('{"syncId":"","data":{"code":0,"session":"abc"}}'))
+        self.assertEqual('123', peek_sync_id('{"syncId":"123","data":{"code":0,"msg":""}}'))
+
+    def test_peek_sync_id_unexpected_format(self):
+        self.assertIsNone(peek_sync_id('{"syncId": "-1", "data": {}}'))
+        self.assertIsNone(peek_sync_id('{"data":{},"syncId":"-1"}'))
+        self.assertIsNone(peek_sync_id('{"syncId":"-1'))
+
+    def test_peek_code(self):
+        self.assertEqual(0, peek_code('{"syncId":"5","data":{"code":0,"msg":"success"}}'))
+        self.assertEqual(10, peek_code('{"syncId":"5","data":{"code":10,"msg":"no permission"}}'))
+        self.assertEqual(0, peek_code({'syncId': '5', 'data': {'code': 0, 'msg': ''}}))
+
+    def test_peek_code_with_payload(self):
+        self.assertIsNone(peek_code('{"syncId":"5","data":{"code":0,"msg":"","messageId":1}}'))
+        self.assertIsNone(peek_code('{"syncId":"5","data":{"code":0,"msg":"a\\"b"}}'))
+        self.assertIsNone(peek_code({'syncId': '5', 'data': {'code': 0, 'msg': '', 'data': []}}))
+
+    def test_peek_shard_key(self):
+        self.assertEqual(123, peek_shard_key(dumps({'syncId': '-1', 'data': make_group_message('hi', group_id=123)})))
+        self.assertEqual(456, peek_shard_key({'syncId': '-1', 'data': make_friend_message('hi', sender_id=456)}))
+        self.assertEqual(0, peek_shard_key('{"syncId":"-1","data":{"type":"BotOnlineEvent","qq":1}}'))
+        # 消息文本中的内容不会被误认为群号
+        frame = dumps({'syncId': '-1', 'data': make_friend_message('"group":{"id":1}', sender_id=4)})
+        self.assertEqual(4, peek_shard_key(frame))
+
+    def test_load_frame(self):
+        frame = {'syncId': '-1', 'data': {}}
+        self.assertIs(frame, load_frame(frame))
+        self.assertEqual(frame, load_frame(json.dumps(frame)))
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import unittest
+
+from lightq.api._http import HttpClient
+from lightq.api._http_api import command_to_path, command_method
+
+
+class HttpClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.connections = 0
+        self.requests: list[tuple[str, bytes]] = []
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            self.connections += 1
+            while not reader.at_eof():
+                try:
+                    request_line = (await reader.readuntil(b'\r\n')).decode().strip()
+                except asyncio.IncompleteReadError:
+                    break
+                headers = {}
+                while (line := (await reader.readuntil(b'\r\n')).decode().strip()) != '':
+                    name, _, value = line.partition(':')
+                    headers[name.lower()] = value.strip()
+                if headers.get('transfer-encoding') == 'chunked':
+                    body = b''
+                    while (size := int(await reader.readuntil(b'\r\n'), 16)) != 0:
+                        body += await reader.readexactly(size)
+                        await reader.readexactly(2)
+                    await reader.readexactly(2)
+                else:
+                    body = await reader.readexactly(int(headers.get('content-length', 0)))
+                self.requests.append((request_line, body))
+                payload = json.dumps({'code': 0, 'length': len(body)}).encode()
+                if request_line.startswith('GET /chunked'):
+                    writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n')
+                    writer.write(b'%x\r\n%s\r\n0\r\n\r\n' % (len(payload), payload))
+                else:
+                    writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(payload), payload))
+                await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.client = HttpClient(f'http://127.0.0.1:{port}', max_connections=2)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_keep_alive(self):
+        for _ in range(5):
+            response = await self.client.request('GET', '/botList', query={'sessionKey': 'abc'})
+            self.assertEqual(200, response.status)
+            self.assertEqual({'code': 0, 'length': 0}, response.json())
+        self.assertEqual(1, self.connections)
+        self.assertEqual('GET /botList?sessionKey=abc HTTP/1.1', self.requests[0][0])
+
+    async def test_max_connections(self):
+        await asyncio.gather(*(self.client.request('POST', '/recall', body=b'{}') for _ in range(10)))
+        self.assertLessEqual(self.connections, 2)
+        self.assertEqual(10, len(self.requests))
+
+    async def test_chunked_response(self):
+        response = await self.client.request('GET', '/chunked')
+        self.assertEqual({'code': 0, 'length': 0}, response.json())
+        response = await self.client.request('GET', '/chunked')
+        self.assertEqual(1, self.connections)
+
+    async def test_streaming_body(self):
+        async def chunks():
+            for i in range(3):
+                yield bytes([i]) * 1000
+
+        response = await self.client.request('POST', '/upload', body=chunks())
+        self.assertEqual(3000, response.json()['length'])
+        self.assertEqual(b'\x00' * 1000 + b'\x01' * 1000 + b'\x02' * 1000, self.requests[0][1])
+
+
+class CommandMappingTest(unittest.TestCase):
+    def test_command_to_path(self):
+        self.assertEqual('/friendList', command_to_path('friendList'))
+        self.assertEqual('/anno/list', command_to_path('anno_list'))
+
+    def test_command_method(self):
+        self.assertEqual('GET', command_method('friendList'))
+        self.assertEqual('POST', command_method('sendGroupMessage'))
+        self.assertEqual('GET', command_method('groupConfig', 'get'))
+        self.assertEqual('POST', command_method('groupConfig', 'update'))
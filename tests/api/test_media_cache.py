@@ -0,0 +1,124 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lightq.api import MediaCache, SqliteMediaCache
+
+
+class MediaCacheTest(unittest.TestCase):
+    def test_max_entries(self):
+        cache = MediaCache(max_entries=2)
+        cache.put('a', '1')
+        cache.put('b', '2')
+        self.assertEqual('1', cache.get('a'))  # 'b' is now the least recently used
+        cache.put('c', '3')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual('1', cache.get('a'))
+        self.assertEqual('3', cache.get('c'))
+
+    def test_max_age(self):
+        cache = MediaCache(max_age=60)
+        with mock.patch('lightq.api._media_cache.time.time', return_value=1000):
+            cache.put('a', '1')
+        with mock.patch('lightq.api._media_cache.time.time', return_value=1030):
+            self.assertEqual('1', cache.get('a'))
+        with mock.patch('lightq.api._media_cache.time.time', return_value=1061):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(0, len(cache))
+
+    def test_file_digest(self):
+        cache = MediaCache()
+        cache.put_file_digest('/a.png', 10, 123, 'digest')
+        self.assertEqual('digest', cache.get_file_digest('/a.png', 10, 123))
+        self.assertIsNone(cache.get_file_digest('/a.png', 10, 456))  # modified
+
+
+class SqliteMediaCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'media.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_persistence(self):
+        cache = SqliteMediaCache(self.path)
+        cache.put('image:group:abc', 'id-1')
+        cache.put_file_digest('/a.png', 10, 123, 'abc')
+        cache.close()
+        cache = SqliteMediaCache(self.path)
+        self.assertEqual(1, len(cache))
+        self.assertEqual('id-1', cache.get('image:group:abc'))
+        self.assertEqual('abc', cache.get_file_digest('/a.png', 10, 123))
+        cache.close()
+
+    def test_put_existing_key(self):
+        cache = SqliteMediaCache(self.path)
+        cache.put('a', '1')
+        cache.put('a', '2')
+        self.assertEqual(1, len(cache))
+        self.assertEqual('2', cache.get('a'))
+        cache.close()
+
+    def test_max_entries(self):
+        cache = SqliteMediaCache(self.path, max_entries=2)
+        with mock.patch('lightq.api._media_cache.time.time', side_effect=range(100)):
+            cache.put('a', '1')
+            cache.put('b', '2')
+            self.assertEqual('1', cache.get('a'))
+            cache.put('c', '3')
+            self.assertEqual(2, len(cache))
+            self.assertIsNone(cache.get('b'))
+            self.assertEqual('1', cache.get('a'))
+        cache.close()
+
+    def test_max_age(self):
+        with mock.patch('lightq.api._media_cache.time.time', return_value=1000):
+            cache = SqliteMediaCache(self.path, max_age=60)
+            cache.put('a', '1')
+            cache.put('b', '2')
+        with mock.patch('lightq.api._media_cache.time.time', return_value=1061):
+            self.assertIsNone(cache.get('a'))
+            self.assertEqual(1, len(cache))
+        cache.close()
+        with mock.patch('lightq.api._media_cache.time.time', return_value=1061):
+            cache = SqliteMediaCache(self.path, max_age=60)  # expired entries are removed on open
+        self.assertEqual(0, len(cache))
+        cache.close()
+
+    def test_file_digest_eviction(self):
+        # 没有 max_entries 时，文件哈希也按 max_age 删除
+        cache = SqliteMediaCache(self.path, max_age=60)
+        with mock.patch('lightq.api._media_cache.time.time', return_value=1000):
+            cache.put_file_digest('/a.png', 10, 123, 'a')
+        with mock.patch('lightq.api._media_cache.time.time', return_value=1030):
+            cache.put_file_digest('/b.png', 10, 123, 'b')
+        with mock.patch('lightq.api._media_cache.time.time', return_value=1061):
+            cache.put_file_digest('/c.png', 10, 123, 'c')
+        self.assertIsNone(cache.get_file_digest('/a.png', 10, 123))
+        self.assertEqual('b', cache.get_file_digest('/b.png', 10, 123))
+        cache.close()
+
+        # 文件哈希数不超过 max_entries，与 id 的数量无关
+        cache = SqliteMediaCache(self.path, max_entries=2)
+        with mock.patch('lightq.api._media_cache.time.time', side_effect=range(2000, 2100)):
+            for name in 'defg':
+                cache.put_file_digest(f'/{name}.png', 10, 123, name)
+        self.assertEqual(0, len(cache))
+        self.assertEqual([None, None, 'f', 'g'], [cache.get_file_digest(f'/{name}.png', 10, 123) for name in 'defg'])
+        cache.close()
+
+        # 更新已有文件的哈希不增加条目数，重新打开后从数据库恢复计数
+        cache = SqliteMediaCache(self.path, max_entries=2)
+        with mock.patch('lightq.api._media_cache.time.time', side_effect=range(3000, 3100)):
+            cache.put_file_digest('/g.png', 20, 456, 'g2')
+            cache.put_file_digest('/f.png', 20, 456, 'f2')
+            self.assertEqual('g2', cache.get_file_digest('/g.png', 20, 456))
+            cache.put_file_digest('/h.png', 10, 123, 'h')
+        self.assertEqual([None, 'f2', 'h'], [
+            cache.get_file_digest('/g.png', 20, 456),
+            cache.get_file_digest('/f.png', 20, 456),
+            cache.get_file_digest('/h.png', 10, 123)
+        ])
+        cache.close()
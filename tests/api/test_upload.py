@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lightq.api import MiraiApi, MiraiHttpApi
+from lightq.entities import Image, Voice
+from lightq.testing import FakeMiraiServer
+
+
+class UploadTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.uploads: list[bytes] = []
+
+        async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            while True:
+                try:
+                    request_line = (await reader.readuntil(b'\r\n')).decode()
+                except asyncio.IncompleteReadError:
+                    break
+                headers = {}
+                while (line := (await reader.readuntil(b'\r\n')).decode().strip()) != '':
+                    name, _, value = line.partition(':')
+                    headers[name.lower()] = value.strip()
+                if headers.get('transfer-encoding') == 'chunked':
+                    body = b''
+                    while (size := int(await reader.readuntil(b'\r\n'), 16)) != 0:
+                        body += await reader.readexactly(size)
+                        await reader.readexactly(2)
+                    await reader.readexactly(2)
+                else:
+                    body = await reader.readexactly(int(headers.get('content-length', 0)))
+                path = request_line.split()[1]
+                if path == '/verify':
+                    result = {'code': 0, 'session': 'session'}
+                elif path == '/uploadImage':
+                    self.uploads.append(body)
+                    result = {'imageId': f'image-{len(self.uploads)}', 'url': ''}
+                elif path == '/uploadVoice':
+                    self.uploads.append(body)
+                    result = {'voiceId': f'voice-{len(self.uploads)}', 'url': ''}
+                else:
+                    result = {'code': 0, 'msg': ''}
+                payload = json.dumps(result).encode()
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(payload), payload))
+                await writer.drain()
+            writer.close()
+
+        self.server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.api = MiraiHttpApi(1, 'key', f'http://127.0.0.1:{port}')
+
+    async def asyncTearDown(self):
+        await self.api.close()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def test_upload_file_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'sticker.png')
+            with open(path, 'wb') as file:
+                file.write(os.urandom(200 * 1024))
+            self.assertEqual('image-1', await self.api.upload_image(path))
+            self.assertEqual('image-1', await self.api.upload_image(path))  # cached
+            self.assertEqual(1, len(self.uploads))
+            with open(path, 'rb') as file:
+                self.assertIn(file.read(), self.uploads[0])
+            self.assertIn(b'name="sessionKey"\r\n\r\nsession', self.uploads[0])
+            self.assertIn(b'filename="sticker.png"', self.uploads[0])
+
+    async def test_cache_key_contains_kind(self):
+        content = b'image content'
+        self.assertEqual('image-1', await self.api.upload_image(content, 'group'))
+        self.assertEqual('image-2', await self.api.upload_image(content, 'friend'))
+        self.assertEqual('image-1', await self.api.upload_image(content, 'group'))
+        self.assertEqual('voice-3', await self.api.upload_voice(content))
+
+    async def test_async_iterable(self):
+        async def chunks():
+            yield b'voice '
+            yield b'content'
+
+        self.assertEqual('voice-1', await self.api.upload_voice(chunks()))
+        self.assertEqual('voice-1', await self.api.upload_voice(b'voice content'))
+        self.assertEqual(1, len(self.uploads))
+
+    async def test_disable_cache(self):
+        self.api.media_cache = None
+        await self.api.upload_image(b'content')
+        await self.api.upload_image(b'content')
+        self.assertEqual(2, len(self.uploads))
+
+    async def test_build_image(self):
+        image = await self.api.build_image(b'content')
+        self.assertEqual(Image(image_id='image-1'), image)
+        voice = await self.api.build_voice(b'content')
+        self.assertEqual(Voice(voice_id='voice-2'), voice)
+
+    async def test_unchanged_file_is_not_rehashed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'menu.png')
+            with open(path, 'wb') as file:
+                file.write(b'menu')
+            await self.api.upload_image(path)
+            with mock.patch('lightq.api._upload.read_file_chunks') as read_file_chunks:
+                self.assertEqual('image-1', await self.api.upload_image(path))
+                read_file_chunks.assert_not_called()
+
+
+class WebSocketUploadTest(unittest.IsolatedAsyncioTestCase):
+    async def test_wait_for_session(self):
+        async with FakeMiraiServer(session_delay=0.1) as server:
+            api = MiraiApi(server.bot_id, server.verify_key, server.url)
+            post = mock.AsyncMock(return_value={'imageId': 'image-1', 'url': ''})
+            with mock.patch('lightq.api._api.post_multipart', post):
+                # 刚建立连接时还没有收到 session，上传应等待 session 而不是发送空的 sessionKey
+                self.assertEqual('image-1', await api.upload_image(b'image'))
+            self.assertEqual('session-1', post.call_args.args[2]['sessionKey'])
+            await api.close()
+
+    async def test_no_session(self):
+        async with FakeMiraiServer() as server:
+            api = MiraiApi(server.bot_id, 'wrong-key', server.url)
+            post = mock.AsyncMock()
+            with mock.patch('lightq.api._api.post_multipart', post):
+                with self.assertRaises(ConnectionError):
+                    await asyncio.wait_for(api.upload_image(b'image'), 10)
+            post.assert_not_called()
+            await api.close()
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import unittest
+
+from lightq import Bot, RecvContext, MessageHandler, message_handler, event_handler
+from lightq.framework import MessageRouter
+from lightq.batch import BatchRunner, OfflineApi, read_lines, routed_types
+from lightq.entities import GroupMessage, FriendMessage, NudgeEvent, MessageChain, Source
+from lightq.testing import make_group_message, make_friend_message
+
+
+@message_handler(GroupMessage)
+async def moderate(chain: MessageChain, bot: Bot, message: GroupMessage) -> str | None:
+    text = str(chain[1:])
+    if 'spam' in text:
+        await bot.api.recall(message.message_chain[Source].id, message.sender.group.id)
+        return f'recalled {os.getpid()}'
+    return None
+
+
+@message_handler(FriendMessage)
+def fail(chain: MessageChain):
+    raise ValueError(str(chain[1:]))
+
+
+def setup(bot: Bot):
+    bot.add_all([moderate, fail])
+
+
+def make_pushes(count: int) -> list[str | dict]:
+    pushes: list[str | dict] = []
+    for i in range(count):
+        text = 'spam' if i % 2 == 0 else 'hello'
+        if i % 3 == 0:  # 完整的帧
+            pushes.append(json.dumps({'syncId': '-1', 'data': make_group_message(text, message_id=i)}))
+        else:  # 只有 data 部分
+            pushes.append(make_group_message(text, message_id=i))
+    return pushes
+
+
+class BatchRunnerTest(unittest.TestCase):
+    def test_process_locally(self):
+        runner = BatchRunner(setup, chunk_size=3)
+        results = runner.run(make_pushes(10))
+        self.assertEqual(list(range(10)), [result.index for result in results])
+        for result in results:
+            self.assertEqual('GroupMessage', result.type)
+            self.assertEqual('moderate', result.handler)
+            self.assertIsNone(result.error)
+        self.assertEqual(
+            [f'recalled {os.getpid()}', None] * 5,
+            [str(result.response) if result.response is not None else None for result in results]
+        )
+        self.assertEqual({'recall': 5}, runner.command_counts)
+
+    def test_unhandled_and_errors(self):
+        nudge = {
+            'type': 'NudgeEvent', 'fromId': 1, 'subject': {'id': 2, 'kind': 'Group'},
+            'action': '', 'suffix': '', 'target': 3
+        }
+        pushes = [make_group_message('hello'), nudge, '{broken', make_friend_message('oops')]
+        results = BatchRunner(setup).run(pushes, unhandled=True)
+        self.assertEqual(4, len(results))
+        self.assertEqual(('GroupMessage', 'moderate', None, None), (
+            results[0].type, results[0].handler, results[0].response, results[0].error
+        ))
+        self.assertEqual(('NudgeEvent', None), (results[1].type, results[1].handler))
+        self.assertIsNone(results[2].type)
+        self.assertIn('JSONDecodeError', results[2].error)
+        self.assertEqual(('FriendMessage', 'fail', "ValueError('oops')"), (
+            results[3].type, results[3].handler, results[3].error
+        ))
+
+    def test_event_handler(self):
+        @event_handler(NudgeEvent)
+        def nudged(event: NudgeEvent) -> str:
+            return f'nudged by {event.from_id}'
+
+        def setup_events(bot: Bot):
+            bot.add(nudged)
+
+        nudge = {
+            'type': 'NudgeEvent', 'fromId': 1, 'subject': {'id': 2, 'kind': 'Group'},
+            'action': '', 'suffix': '', 'target': 3
+        }
+        [result] = BatchRunner(setup_events).run([nudge])
+        self.assertEqual('nudged by 1', str(result.response))
+
+    def test_routed_types(self):
+        bot = Bot.from_api(OfflineApi())
+        setup(bot)
+        bot.build()
+        self.assertEqual({'GroupMessage', 'FriendMessage'}, routed_types(bot))
+
+        class AnyRouter(MessageRouter):
+            before: list[MessageRouter] = []
+            after: list[MessageRouter] = []
+
+            async def route(self, context: RecvContext) -> MessageHandler | None:
+                return None
+
+            def build(self, handlers): pass
+
+            def clear(self): pass
+
+        bot.add(AnyRouter())
+        self.assertIsNone(routed_types(bot))
+
+    def test_process_in_pool(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'archive.jsonl')
+            with open(path, 'w', encoding='utf-8') as file:
+                for push in make_pushes(100):
+                    file.write((push if isinstance(push, str) else json.dumps(push)) + '\n\n')
+            runner = BatchRunner(setup, workers=2, chunk_size=10)
+            results = runner.run(read_lines(path))
+        self.assertEqual(list(range(100)), [result.index for result in results])
+        pids = {str(result.response).split()[1] for result in results if result.response is not None}
+        self.assertNotIn(str(os.getpid()), pids)
+        self.assertEqual({'recall': 50}, runner.command_counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
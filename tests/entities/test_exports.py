@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import lightq
+from lightq import entities
+from lightq.entities import _event
+
+
+class ExportsTest(unittest.TestCase):
+    def test_star_import(self):
+        namespace: dict = {}
+        exec('from lightq.entities import *', namespace)
+        for name in ['Friend', 'MessageChain', 'Plain', 'Event', 'FriendMessage', 'FriendSyncMessage',
+                     'EVENT_CLASSES', 'MemberJoinEvent', 'NudgeEvent']:
+            self.assertIn(name, namespace)
+        self.assertIs(entities.NudgeEvent, namespace['NudgeEvent'])
+
+    def test_lazy_event_names(self):
+        self.assertEqual([name for name in _event.__all__ if name != 'Event'], entities._EVENT_NAMES)
+        self.assertEqual(len(entities.__all__), len(set(entities.__all__)))
+        with self.assertRaises(AttributeError):
+            getattr(entities, 'NoSuchEvent')
+
+    def test_submodules(self):
+        code = ('import lightq\n'
+                'for name in ["entities", "api", "exceptions", "logging", "decorators", "framework", "filters"]:\n'
+                '    getattr(lightq, name)\n'
+                'print(lightq.entities.MemberJoinEvent.__name__)')
+        env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+        output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+        self.assertEqual('MemberJoinEvent', output.stdout.strip())
+        with self.assertRaises(AttributeError):
+            getattr(lightq, 'no_such_module')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import random
+import unittest
+
+from lightq import entities, RecvContext, Bot
+from lightq.decorators import message_handler, resolve
+from lightq.entities import FriendMessage, Friend, MessageChain
+from lightq.filters import KeywordFilter
+
+
+def make_context(text: str) -> RecvContext:
+    return RecvContext(Bot(0, ''), FriendMessage(Friend(0, '', ''), MessageChain([entities.Plain(text)])))
+
+
+def brute_force(words: list[str], text: str) -> set[str]:
+    return {word for word in words if word in text}
+
+
+class KeywordFilterTest(unittest.IsolatedAsyncioTestCase):
+    def test_find(self):
+        keywords = KeywordFilter(['he', 'she', 'his', 'hers'])
+        self.assertEqual(['she', 'he', 'hers'], keywords.find('ushers'))
+        self.assertEqual([], keywords.find('hi'))
+        self.assertEqual(['his'], keywords.find('this this'))
+        self.assertEqual([], KeywordFilter().find('anything'))
+
+    def test_overlapping(self):
+        keywords = KeywordFilter(['a', 'ab', 'bab', 'bc', 'bca', 'c', 'caa'])
+        self.assertEqual({'a', 'ab', 'bab', 'bc', 'bca', 'c', 'caa'}, set(keywords.find('abccab' + 'babcaa')))
+
+    def test_random_against_brute_force(self):
+        rng = random.Random(42)
+        for _ in range(200):
+            words = [''.join(rng.choices('abc', k=rng.randint(1, 4))) for _ in range(rng.randint(1, 10))]
+            text = ''.join(rng.choices('abcd', k=rng.randint(0, 30)))
+            self.assertEqual(brute_force(words, text), set(KeywordFilter(words).find(text)))
+
+    def test_ignore_case(self):
+        self.assertEqual(['Spam'], KeywordFilter(['Spam']).find('buy SPAM now'))
+        self.assertEqual([], KeywordFilter(['Spam'], ignore_case=False).find('buy SPAM now'))
+        self.assertEqual(['广告', '加群'], KeywordFilter(['广告', '加群']).find('发广告，快加群'))
+
+    def test_hot_update(self):
+        keywords = KeywordFilter(['foo'])
+        keywords.add('bar', 'baz')
+        self.assertEqual(frozenset({'foo', 'bar', 'baz'}), keywords.words)
+        self.assertEqual(['foo', 'bar'], keywords.find('foo bar'))
+        keywords.remove('foo')
+        self.assertEqual(['bar'], keywords.find('foo bar'))
+        keywords.set_words(['qux'])
+        self.assertEqual([], keywords.find('foo bar'))
+        self.assertEqual(['qux'], keywords.find('qux'))
+
+    async def test_filter_and_resolver(self):
+        banned = KeywordFilter(['spam', 'scam'])
+        calls = 0
+        original_find = banned.find
+
+        def find(text: str) -> list[str]:
+            nonlocal calls
+            calls += 1
+            return original_find(text)
+
+        banned.find = find  # type: ignore[method-assign]
+
+        @resolve(banned.matched_words)
+        @message_handler(FriendMessage, filters=banned)
+        def handler(matched_words: list[str]) -> str:
+            return ','.join(matched_words)
+
+        context = make_context('hello')
+        self.assertFalse(await handler.can_handle(context))
+        context = make_context('a scam and spam')
+        self.assertTrue(await handler.can_handle(context))
+        self.assertEqual('scam,spam', str(await handler.handle(context)))
+        self.assertEqual(2, calls)  # 每条推送只扫描一次
+
+
+if __name__ == '__main__':
+    unittest.main()
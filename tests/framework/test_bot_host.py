@@ -0,0 +1,49 @@
+import asyncio
+import unittest
+
+from lightq import Bot, BotHost, RecvContext, message_handler
+from lightq.entities import GroupMessage
+from lightq.testing import FakeMiraiServer, make_group_message
+
+
+class BotHostTest(unittest.IsolatedAsyncioTestCase):
+    async def test_accounts_share_handlers(self):
+        @message_handler(GroupMessage)
+        def reply(context: RecvContext, bot: Bot) -> str:
+            self.assertEqual(context.bot_id, bot.bot_id)
+            return f'from {context.bot_id}'
+
+        replies: dict[int, list[str]] = {111: [], 222: []}
+        received = asyncio.Event()
+        async with FakeMiraiServer(bot_id=111) as server1, FakeMiraiServer(bot_id=222) as server2:
+            for server in (server1, server2):
+                def listener(command, sub_command, content, bot_id=server.bot_id):
+                    if command == 'sendGroupMessage':
+                        replies[bot_id].append(content['messageChain'][0]['text'])
+                        received.set()
+
+                server.add_listener(listener)
+            bot = Bot(server1.bot_id, server1.verify_key, server1.url)
+            bot.add(reply)
+            host = BotHost(bot)
+            other = host.add_account(server2.bot_id, server2.verify_key, server2.url)
+            with self.assertRaises(ValueError):
+                host.add_account(server2.bot_id, server2.verify_key, server2.url)
+            task = asyncio.create_task(host.run())
+            while server1.connections == 0 or server2.connections == 0:
+                await asyncio.sleep(0.01)
+            self.assertIs(bot.default_message_router, other.default_message_router)
+            self.assertIs(bot.message_handlers, other.message_handlers)
+
+            await server1.push(make_group_message('hello'))
+            await server2.push(make_group_message('hello'))
+            while sum(map(len, replies.values())) < 2:
+                received.clear()
+                await asyncio.wait_for(received.wait(), 5)
+            task.cancel()
+            await host.close()
+        self.assertEqual({111: ['from 111'], 222: ['from 222']}, replies)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -137,6 +137,29 @@ class ControllerHandlerTest(unittest.TestCase):
             obj.public_property
         ], obj.handlers())
 
+    def test_controller_handlers_many_instances(self):
+        class MyController(Controller):
+            def __init__(self, name: str):
+                self.name = name
+
+            def is_enabled(self, message: Message) -> bool:
+                return True
+
+            @message_handler(Message, filters=is_enabled)
+            def first(self): return self.name
+
+            @message_handler(Message, after=first)
+            def second(self): return self.name
+
+        obj1, obj2 = MyController('1'), MyController('2')
+        self.assertEqual([obj1.first, obj1.second], list(obj1.handlers()))
+        self.assertEqual([obj2.first, obj2.second], list(obj2.handlers()))
+        self.assertEqual([obj1.first], obj1.second.after)
+        self.assertEqual([obj2.first], obj2.second.after)
+        self.assertEqual(obj1.is_enabled, obj1.first.filters[0])
+        self.assertEqual(obj2.is_enabled, obj2.first.filters[0])
+        self.assertEqual('2', obj2.second.handler())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+from lightq import entities, filters, RecvContext, Bot
+from lightq.decorators import message_handler
+from lightq.entities import GroupMessage, Member, Group, MessageChain
+from lightq.framework import FilterCost, filter_cost
+from lightq.framework._filter_order import RESORT_INTERVAL, get_filter_cost
+
+
+def make_context(bot: Bot, group_id: int = 1) -> RecvContext:
+    return RecvContext(bot, GroupMessage(
+        Member(2, '', '', 'MEMBER', 0, 0, 0, Group(group_id, '', 'MEMBER')),
+        MessageChain([entities.Plain('hello')])
+    ))
+
+
+class FilterOrderTest(unittest.IsolatedAsyncioTestCase):
+    def test_default_cost(self):
+        async def async_filter(context: RecvContext) -> bool:
+            return True
+
+        def sync_filter(context: RecvContext) -> bool:
+            return True
+
+        self.assertEqual(FilterCost.EXPENSIVE, get_filter_cost(async_filter))
+        self.assertEqual(FilterCost.NORMAL, get_filter_cost(sync_filter))
+        self.assertEqual(FilterCost.CHEAP, get_filter_cost(filters.from_group(1)))
+        self.assertEqual(FilterCost.CHEAP, get_filter_cost(filters.is_at_bot))
+        self.assertEqual(FilterCost.NORMAL, get_filter_cost(filters.KeywordFilter(['a'])))
+        self.assertEqual(FilterCost.CHEAP, get_filter_cost(filter_cost(FilterCost.CHEAP)(async_filter)))
+
+    async def test_cheap_filter_first(self):
+        calls = []
+
+        async def expensive(context: RecvContext) -> bool:
+            calls.append('expensive')
+            return True
+
+        @message_handler(GroupMessage, filters=[expensive, filters.from_group(1)])
+        def handler(): pass
+
+        bot = Bot(0, '')
+        self.assertFalse(await handler.can_handle(make_context(bot, group_id=2)))
+        self.assertEqual(['expensive'], calls)  # 默认按声明的顺序评估
+        calls.clear()
+        bot.reorder_filters = True
+        self.assertFalse(await handler.can_handle(make_context(bot, group_id=2)))
+        self.assertEqual([], calls)
+        self.assertTrue(await handler.can_handle(make_context(bot, group_id=1)))
+        self.assertEqual(['expensive'], calls)
+        stats = handler.filter_stats
+        self.assertEqual([FilterCost.CHEAP, FilterCost.EXPENSIVE], [s.cost for s in stats])
+        self.assertEqual([(2, 1), (1, 0)], [(s.calls, s.rejects) for s in stats])
+
+    async def test_learn_reject_rate(self):
+        def rarely_rejects(context: RecvContext) -> bool:
+            return True
+
+        def always_rejects(context: RecvContext) -> bool:
+            return False
+
+        @message_handler(GroupMessage, filters=[rarely_rejects, always_rejects])
+        def handler(): pass
+
+        bot = Bot(0, '')
+        bot.reorder_filters = True
+        for _ in range(RESORT_INTERVAL):
+            await handler.can_handle(make_context(bot))
+        names = [s.name.rsplit('.', 1)[-1] for s in handler.filter_stats]
+        self.assertEqual(['always_rejects', 'rarely_rejects'], names)
+        rejects_before = handler.filter_stats[0].rejects
+        calls_before = handler.filter_stats[1].calls
+        for _ in range(10):
+            await handler.can_handle(make_context(bot))
+        self.assertEqual(rejects_before + 10, handler.filter_stats[0].rejects)
+        self.assertEqual(calls_before, handler.filter_stats[1].calls)  # 不再被评估
+
+    async def test_filters_modified(self):
+        @message_handler(GroupMessage, filters=filters.from_group(1))
+        def handler(): pass
+
+        bot = Bot(0, '')
+        bot.reorder_filters = True
+        bot.add(handler)
+        await handler.can_handle(make_context(bot))
+        self.assertEqual(1, handler.filter_stats[0].calls)
+        handler.filters.append(filters.from_user(2))
+        self.assertEqual([0, 0], [s.calls for s in handler.filter_stats])
+        self.assertTrue(await handler.can_handle(make_context(bot)))
+        self.assertEqual({handler.name: handler.filter_stats}, bot.filter_stats())
+
+
+if __name__ == '__main__':
+    unittest.main()
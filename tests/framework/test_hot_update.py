@@ -0,0 +1,143 @@
+import asyncio
+import unittest
+
+from lightq import Bot, RecvContext, message_handler, exception_handler
+from lightq.entities import FriendMessage, GroupMessage
+from lightq.framework._bot import insertion_index, bot_topo_sort
+from lightq.framework._router import MessageTypeRouter
+from lightq.testing import FakeMiraiServer, make_group_message
+
+
+def friend_message_context(bot: Bot) -> RecvContext:
+    return RecvContext(bot, FriendMessage.from_json({
+        'type': 'FriendMessage',
+        'sender': {'id': 123, 'nickname': '', 'remark': ''},
+        'messageChain': []
+    }))
+
+
+class Component:
+    def __init__(self, data: str):
+        self.data = data
+        self.before: list[Component] = []
+        self.after: list[Component] = []
+
+    def __repr__(self) -> str:
+        return f'Component({self.data})'
+
+
+class InsertionIndexTest(unittest.TestCase):
+    def test_insertion_index(self):
+        a, b, c, d = Component('a'), Component('b'), Component('c'), Component('d')
+        self.assertEqual(2, insertion_index([a, b], c, []))
+        c.before = [b]
+        self.assertEqual(1, insertion_index([a, b], c, []))
+        self.assertEqual(0, insertion_index([a, b], d, [(d, a)]))
+        # c 需要排在 b 之前、a 之后，但 b 已经排在 a 之前，只能重新排序
+        c.after = [a]
+        self.assertIsNone(insertion_index([b, a], c, []))
+
+    def test_insertion_index_with_default(self):
+        default, a, b = Component('default'), Component('a'), Component('b')
+        items = bot_topo_sort([a, default], [], default)
+        self.assertEqual([a, default], items)
+        self.assertEqual(1, insertion_index(items, b, [], default))
+        self.assertEqual(2, insertion_index(items, b, [(default, b)], default))
+
+
+class HotUpdateTest(unittest.IsolatedAsyncioTestCase):
+    async def test_add_and_remove_handler(self):
+        @message_handler(FriendMessage)
+        def first(): pass
+
+        @message_handler(FriendMessage, before=first)
+        def second(): pass
+
+        @message_handler(GroupMessage)
+        def third(): pass
+
+        bot = Bot(0, '')
+        router = MessageTypeRouter()
+        bot.add_all([first, router])
+        bot.build()
+        context = friend_message_context(bot)
+        self.assertIs(first, await bot.default_message_router.route(context))
+
+        bot.add(second)
+        self.assertEqual([second, first], bot.message_handlers)
+        self.assertIs(second, await bot.default_message_router.route(context))
+        self.assertIs(second, await router.route(context))
+
+        bot.add(third)
+        self.assertEqual([second, first, third], bot.message_handlers)
+        self.assertEqual([third], router.type_to_handlers[GroupMessage])
+        self.assertEqual([second, first], router.type_to_handlers[FriendMessage])
+
+        with self.assertRaises(ValueError):
+            bot.remove(first)  # second 仍然引用 first
+        bot.remove(second)
+        self.assertIs(first, await bot.default_message_router.route(context))
+        bot.remove_all([first, third])
+        self.assertEqual([], bot.message_handlers)
+        self.assertIsNone(await bot.default_message_router.route(context))
+
+        bot.remove(router)
+        self.assertEqual([bot.default_message_router], bot.message_routers)
+        self.assertEqual({}, router.type_to_handlers)
+        with self.assertRaises(ValueError):
+            bot.remove(bot.default_message_router)
+
+    async def test_add_exception_handler(self):
+        @exception_handler(ValueError)
+        def handler(): pass
+
+        bot = Bot(0, '')
+        bot.build()
+        bot.add(handler)
+        self.assertEqual([handler, bot.default_exception_handler], bot.exception_handlers)
+        with self.assertRaises(ValueError):
+            bot.remove(bot.default_exception_handler)
+
+    async def test_add_order_on_built_bot(self):
+        @message_handler(FriendMessage)
+        def first(): pass
+
+        @message_handler(FriendMessage)
+        def second(): pass
+
+        bot = Bot(0, '')
+        bot.add_all([first, second])
+        bot.build()
+        bot.add_order(second, first)
+        self.assertIs(second, await bot.default_message_router.route(friend_message_context(bot)))
+
+    async def test_add_handler_while_running(self):
+        async with FakeMiraiServer() as server:
+            replies: list[str] = []
+            received = asyncio.Event()
+
+            def listener(command, sub_command, content):
+                if command == 'sendGroupMessage':
+                    replies.append(content['messageChain'][0]['text'])
+                    received.set()
+
+            server.add_listener(listener)
+
+            @message_handler(GroupMessage)
+            def echo(context: RecvContext) -> str:
+                return 'echo'
+
+            bot = Bot(server.bot_id, server.verify_key, server.url)
+            task = asyncio.create_task(bot.run())
+            while server.connections == 0:
+                await asyncio.sleep(0.01)
+            bot.add(echo)
+            await server.push(make_group_message('hello'))
+            await asyncio.wait_for(received.wait(), 5)
+            task.cancel()
+            await bot.close()
+        self.assertEqual(['echo'], replies)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+
+from lightq import Bot, RecvContext, PluginLoader
+from lightq.entities import FriendMessage
+
+PLUGIN = '''
+from lightq import message_handler
+from lightq.entities import FriendMessage
+
+
+@message_handler(FriendMessage)
+def reply():
+    return {reply!r}
+'''
+
+CYCLIC_PLUGIN = '''
+from lightq import message_handler, event_handler
+from lightq.entities import FriendMessage, NudgeEvent
+
+__all__ = ['reply', 'first', 'second']
+
+
+@message_handler(FriendMessage)
+def reply():
+    return 'cyclic'
+
+
+@event_handler(NudgeEvent)
+def first():
+    pass
+
+
+@event_handler(NudgeEvent, after=first)
+def second():
+    pass
+
+
+first.after = [second]
+'''
+
+HELPER_PLUGIN = '''
+from lightq import message_handler
+from lightq.entities import FriendMessage
+
+
+def helper():
+    return {version!r}
+
+
+@message_handler(FriendMessage)
+def reply():
+    return helper()
+{tail}
+'''
+
+
+class PluginLoaderTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        sys.path.insert(0, self.directory.name)
+        self.path = os.path.join(self.directory.name, 'lightq_test_plugin.py')
+        self.mtime = 1_000_000_000
+        self.write(PLUGIN.format(reply='v1'))
+
+    def tearDown(self):
+        sys.path.remove(self.directory.name)
+        sys.modules.pop('lightq_test_plugin', None)
+        self.directory.cleanup()
+
+    def write(self, source: str):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(textwrap.dedent(source))
+        # 保证每次写入后修改时间都不同，避免命中旧的字节码缓存
+        self.mtime += 10
+        os.utime(self.path, (self.mtime, self.mtime))
+
+    async def reply(self, bot: Bot) -> str | None:
+        context = RecvContext(bot, FriendMessage.from_json({
+            'type': 'FriendMessage',
+            'sender': {'id': 123, 'nickname': '', 'remark': ''},
+            'messageChain': []
+        }))
+        handler = await bot.default_message_router.route(context)
+        return None if handler is None else handler.handler()
+
+    async def test_reload(self):
+        bot = Bot(0, '')
+        loader = PluginLoader(bot, ['lightq_test_plugin'])
+        loader.load()
+        bot.build()
+        self.assertEqual('v1', await self.reply(bot))
+        self.assertEqual([], loader.check())
+
+        old_handler = loader.handlers['lightq_test_plugin'][0]
+        self.write(PLUGIN.format(reply='version 2'))
+        self.assertEqual(['lightq_test_plugin'], loader.check())
+        self.assertEqual('version 2', await self.reply(bot))
+        self.assertNotIn(old_handler, bot.message_handlers)
+        self.assertEqual(1, len(bot.message_handlers))
+
+    async def test_reload_failed(self):
+        bot = Bot(0, '')
+        loader = PluginLoader(bot, ['lightq_test_plugin'])
+        loader.load()
+        bot.build()
+        self.write('def broken(:\n')
+        with self.assertLogs('lightq', 'ERROR'):
+            self.assertEqual([], loader.check())
+        self.assertEqual('v1', await self.reply(bot))
+        self.assertEqual([], loader.check())  # 同一个版本不再重复加载
+
+    async def test_reload_cyclic_orders(self):
+        bot = Bot(0, '')
+        loader = PluginLoader(bot, ['lightq_test_plugin'])
+        loader.load()
+        bot.build()
+        old_handlers = loader.handlers['lightq_test_plugin']
+        # 新的消息处理器可以加入，事件处理器之间的顺序构成环，整个替换应被撤销
+        self.write(CYCLIC_PLUGIN)
+        with self.assertLogs('lightq', 'ERROR'):
+            self.assertEqual([], loader.check())
+        self.assertEqual(old_handlers, loader.handlers['lightq_test_plugin'])
+        self.assertEqual(old_handlers, bot.message_handlers)
+        self.assertEqual([], bot.event_handlers)
+        self.assertEqual('v1', await self.reply(bot))
+
+    async def test_old_handlers_keep_old_globals(self):
+        self.write(HELPER_PLUGIN.format(version='old', tail=''))
+        bot = Bot(0, '')
+        loader = PluginLoader(bot, ['lightq_test_plugin'])
+        loader.load()
+        bot.build()
+        [old_handler] = loader.handlers['lightq_test_plugin']
+        old_module = sys.modules['lightq_test_plugin']
+
+        # 新版本执行失败：旧的处理器不能看到新版本定义的 helper
+        self.write(HELPER_PLUGIN.format(version='new', tail="raise RuntimeError('broken')"))
+        with self.assertLogs('lightq', 'ERROR'):
+            self.assertEqual([], loader.check())
+        self.assertEqual('old', await self.reply(bot))
+        self.assertIs(old_module, sys.modules['lightq_test_plugin'])
+
+        # 新版本执行成功：新的处理器使用新的 helper，仍在执行的旧处理器使用旧的 helper
+        self.write(HELPER_PLUGIN.format(version='v3', tail=''))
+        self.assertEqual(['lightq_test_plugin'], loader.check())
+        self.assertEqual('v3', await self.reply(bot))
+        self.assertEqual('old', old_handler.handler())
+        self.assertIsNot(old_module, sys.modules['lightq_test_plugin'])
+        self.assertEqual('v3', sys.modules['lightq_test_plugin'].helper())
+
+
+if __name__ == '__main__':
+    unittest.main()
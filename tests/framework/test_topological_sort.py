@@ -1,3 +1,4 @@
+import graphlib
 import unittest
 from typing import Iterable
 
@@ -113,6 +114,42 @@ class TopologicalSortTest(unittest.TestCase):
         with self.assertRaises(Exception):
             bot_topo_sort([default, a, b, c], [], default)
 
+    def test_bot_topo_sort_report_cycle(self):
+        a = Component('a')
+        b = Component('b')
+        c = Component('c')
+        d = Component('d')
+        a.before = [b]
+        b.before = [c]
+        c.before = [a]
+        d.after = [a]
+        with self.assertRaises(graphlib.CycleError) as cm:
+            bot_topo_sort([d, a, b, c], [])
+        cycle = cm.exception.args[1]
+        self.assertEqual(cycle[0], cycle[-1])
+        self.assertCountEqual([a, b, c], cycle[:-1])
+        for u, v in zip(cycle, cycle[1:]):
+            self.assertIn(v, u.before)
+
+    def test_bot_topo_sort_stable(self):
+        default = Component('default')
+        items = [Component(str(i)) for i in range(5)]
+        self.assertEqual(items, bot_topo_sort(items, []))
+        items[3].after = [items[4]]
+        self.assertEqual([*items[:3], items[4], items[3], default], bot_topo_sort([*items, default], [], default))
+
+        # 输入已经满足约束时保持原样，没有约束的元素不会越过有约束的元素
+        a, b, c = Component('a'), Component('b'), Component('c')
+        b.after = [a]
+        self.assertEqual([a, b, c], bot_topo_sort([a, b, c], []))
+        self.assertEqual([a, b, c, default], bot_topo_sort([a, b, c, default], [], default))
+
+    def test_bot_topo_sort_long_chain(self):
+        items = [Component(str(i)) for i in range(10000)]
+        for u, v in zip(items, items[1:]):
+            v.after = [u]
+        self.assertEqual(items, bot_topo_sort(list(reversed(items)), []))
+
 
 if __name__ == '__main__':
     unittest.main()
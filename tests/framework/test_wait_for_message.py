@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+
+from lightq import Bot, RecvContext, message_handler
+from lightq.decorators import regex_fullmatch
+from lightq.entities import GroupMessage
+from lightq.framework._waiter import WaiterTable
+from lightq.testing import FakeMiraiServer, make_group_message
+
+
+class WaiterTableTest(unittest.IsolatedAsyncioTestCase):
+    async def test_offer(self):
+        table = WaiterTable()
+        first = table.add((10000, 20000), lambda message: str(message.message_chain[1:]) == 'yes')
+        second = table.add((10000, 20000))
+        self.assertFalse(table.offer(GroupMessage.from_json(make_group_message('yes', sender_id=30000))))
+        self.assertTrue(table.offer(GroupMessage.from_json(make_group_message('no'))))
+        self.assertFalse(first.done())
+        self.assertEqual('no', str((await second).message_chain[1:]))
+        self.assertTrue(table.offer(GroupMessage.from_json(make_group_message('yes'))))
+        await first
+        await asyncio.sleep(0)  # 等待者在 future 的回调中被移除
+        self.assertEqual(0, len(table))
+
+    async def test_predicate_exception(self):
+        table = WaiterTable()
+        future = table.add((10000, 20000), lambda message: 1 / 0)
+        self.assertFalse(table.offer(GroupMessage.from_json(make_group_message('hi'))))
+        with self.assertRaises(ZeroDivisionError):
+            await future
+
+    async def test_cancel(self):
+        table = WaiterTable()
+        table.add((10000, 20000)).cancel()
+        await asyncio.sleep(0)
+        self.assertEqual(0, len(table))
+        self.assertFalse(table.offer(GroupMessage.from_json(make_group_message('hi'))))
+
+
+class WaitForMessageTest(unittest.IsolatedAsyncioTestCase):
+    async def test_multi_turn(self):
+        @regex_fullmatch('/weather')
+        @message_handler(GroupMessage)
+        async def weather(context: RecvContext, bot: Bot) -> str:
+            await bot.api.send_group_message(10000, '您想查询哪个城市的天气？')
+            try:
+                message = await context.wait_for_next(timeout=5)
+            except TimeoutError:
+                return '超时'
+            return f'{message.message_chain[1:]}的天气为小雨'
+
+        @message_handler(GroupMessage)
+        def other() -> str:
+            return 'other'
+
+        async with FakeMiraiServer() as server:
+            replies: list[str] = []
+            received = asyncio.Event()
+
+            def listener(command, sub_command, content):
+                if command == 'sendGroupMessage':
+                    replies.append(''.join(element['text'] for element in content['messageChain']))
+                    received.set()
+
+            server.add_listener(listener)
+            bot = Bot(server.bot_id, server.verify_key, server.url)
+            bot.add_all([weather, other])
+            bot.add_order(weather, other)
+            task = asyncio.create_task(bot.run())
+            while server.connections == 0:
+                await asyncio.sleep(0.01)
+
+            async def push_and_wait(text: str, sender_id: int = 20000):
+                received.clear()
+                await server.push(make_group_message(text, sender_id=sender_id))
+                await asyncio.wait_for(received.wait(), 5)
+
+            await push_and_wait('/weather')
+            await push_and_wait('hello', sender_id=30000)  # 其他群成员的消息照常路由
+            await push_and_wait('武汉')
+            await push_and_wait('武汉')
+            task.cancel()
+            await bot.close()
+        self.assertEqual(['您想查询哪个城市的天气？', 'other', '武汉的天气为小雨', 'other'], replies)
+
+
+if __name__ == '__main__':
+    unittest.main()
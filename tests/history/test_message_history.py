@@ -0,0 +1,99 @@
+import asyncio
+import unittest
+
+from lightq import Bot, message_handler
+from lightq.entities import GroupMessage, FriendMessage, GroupRecallEvent, MessageChain, Plain, Quote
+from lightq.history import MessageHistory
+from lightq.testing import FakeMiraiServer, make_group_message, make_friend_message
+
+
+class MessageHistoryTest(unittest.TestCase):
+    def test_record_and_get(self):
+        history = MessageHistory()
+        history.record(GroupMessage.from_json(make_group_message('hello', group_id=1, message_id=10)))
+        history.record(FriendMessage.from_json(make_friend_message('hi', sender_id=2, message_id=10)))
+        entry = history.get(10, 1)
+        self.assertIsNotNone(entry)
+        self.assertEqual(('Group', 1, 20000), (entry.kind, entry.target, entry.sender_id))
+        self.assertEqual(MessageChain([Plain('hello')]), entry.message_chain)
+        self.assertEqual('Friend', history.get(10, 2).kind)
+        self.assertIsNone(history.get(11, 1))
+
+    def test_ring_buffer(self):
+        history = MessageHistory(capacity=3)
+        for i in range(5):
+            history.record_sent('Group', 1, 0, i, MessageChain([Plain(str(i))]))
+        self.assertEqual(3, len(history))
+        self.assertIsNone(history.get(1, 1))
+        self.assertEqual([2, 3, 4], [entry.message_id for entry in history.recent(1)])
+        self.assertEqual([3, 4], [entry.message_id for entry in history.recent(1, 2)])
+        self.assertEqual([], history.recent(2))
+
+    def test_group_and_friend_with_same_number(self):
+        history = MessageHistory(capacity=4)
+        history.record_sent('Group', 1, 0, 7, MessageChain([Plain('group')]))
+        history.record_sent('Friend', 1, 0, 7, MessageChain([Plain('friend')]))
+        self.assertEqual(2, len(history))
+        self.assertEqual('group', str(history.get(7, 1, 'Group').message_chain))
+        self.assertEqual('friend', str(history.get(7, 1, 'Friend').message_chain))
+        self.assertEqual('friend', str(history.resolve_quote(Quote(7, 0, 0, 1, MessageChain([]))).message_chain))
+        self.assertEqual('group', str(history.resolve_quote(Quote(7, 1, 0, 1, MessageChain([]))).message_chain))
+        for i in range(3):
+            history.record_sent('Group', 1, 0, 10 + i, MessageChain([Plain(str(i))]))
+        # 第一条群消息被覆盖，好友消息仍在
+        self.assertIsNone(history.get(7, 1, 'Group'))
+        self.assertEqual([7], [entry.message_id for entry in history.recent(1, kind='Friend')])
+        self.assertEqual([10, 11, 12], [entry.message_id for entry in history.recent(1, kind='Group')])
+        self.assertEqual([11, 12], [entry.message_id for entry in history.recent(1, 2)])
+        self.assertEqual([7, 10, 11, 12], [entry.message_id for entry in history.recent(1)])
+        self.assertEqual([12, 11, 10, 7], [entry.message_id for entry in history])
+
+    def test_resolve(self):
+        history = MessageHistory()
+        history.record_sent('Group', 1, 0, 5, MessageChain([Plain('group')]))
+        history.record_sent('Friend', 2, 0, 6, MessageChain([Plain('friend')]))
+        quote = Quote(5, 1, 0, 1, MessageChain([]))
+        self.assertEqual(5, history.resolve_quote(quote).message_id)
+        quote = Quote(6, 0, 0, 2, MessageChain([]))
+        self.assertEqual(6, history.resolve_quote(quote).message_id)
+        event = GroupRecallEvent.from_json({
+            'type': 'GroupRecallEvent',
+            'authorId': 0,
+            'messageId': 5,
+            'time': 0,
+            'group': {'id': 1, 'name': '', 'permission': 'MEMBER'},
+            'operator': None
+        })
+        self.assertEqual('group', str(history.resolve_recall(event).message_chain))
+
+
+class BotHistoryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_record_inbound_and_outbound(self):
+        @message_handler(GroupMessage)
+        def echo(chain: MessageChain, history: MessageHistory) -> str:
+            return f'{len(history)} {chain[1:]}'
+
+        async with FakeMiraiServer() as server:
+            received = asyncio.Event()
+            server.add_listener(lambda command, sub_command, content: received.set())
+            bot = Bot(server.bot_id, server.verify_key, server.url)
+            bot.history = MessageHistory()
+            bot.add(echo)
+            task = asyncio.create_task(bot.run())
+            while server.connections == 0:
+                await asyncio.sleep(0.01)
+            await server.push(make_group_message('hello', message_id=100))
+            await asyncio.wait_for(received.wait(), 5)
+            while len(bot.history) < 2:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            await bot.close()
+        inbound, outbound = bot.history.recent(10000)
+        self.assertEqual(100, inbound.message_id)
+        self.assertEqual(20000, inbound.sender_id)
+        self.assertEqual(server.bot_id, outbound.sender_id)
+        self.assertEqual('1 hello', str(outbound.message_chain))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from lightq import Bot, message_handler
+from lightq.api import MiraiApi
+from lightq.entities import GroupMessage, MessageChain
+from lightq.journal import Journal, ReplayApi, read_journal
+from lightq.testing import FakeMiraiServer, make_group_message
+
+
+def frame(i: int) -> str:
+    return json.dumps({'syncId': '-1', 'data': make_group_message(f'message {i}', message_id=i, timestamp=0)})
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'pushes.journal')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_and_read(self):
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                with Journal(self.path, compress=compress) as journal:
+                    for i in range(100):
+                        journal.write(frame(i), timestamp=float(i))
+                    journal.write({'syncId': '-1', 'data': {'type': '中文'}}, timestamp=100.0)
+                records = list(read_journal(self.path))
+                self.assertEqual(101, len(records))
+                self.assertEqual((3.0, frame(3)), records[3])
+                self.assertEqual('{"syncId":"-1","data":{"type":"中文"}}', records[100][1])
+                os.remove(self.path)
+                for name in os.listdir(self.directory.name):
+                    os.remove(os.path.join(self.directory.name, name))
+
+    def test_compression(self):
+        with Journal(self.path) as journal:
+            for i in range(200):
+                journal.write(frame(i))
+        plain_size = os.path.getsize(self.path)
+        os.remove(self.path)
+        with Journal(self.path, compress=True) as journal:
+            for i in range(200):
+                journal.write(frame(i))
+        self.assertLess(os.path.getsize(self.path), plain_size / 5)
+
+    def test_readable_before_close(self):
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                journal = Journal(self.path, compress=compress)
+                journal.write(frame(1))
+                journal.write(frame(2))
+                journal.flush()
+                self.assertEqual([frame(1), frame(2)], [f for _, f in read_journal(self.path)])
+                journal.write(frame(3))
+                journal.flush()
+                self.assertEqual([frame(1), frame(2), frame(3)], [f for _, f in read_journal(self.path)])
+                journal.close()
+                for name in os.listdir(self.directory.name):
+                    os.remove(os.path.join(self.directory.name, name))
+
+    def test_truncated_tail(self):
+        with Journal(self.path) as journal:
+            journal.write(frame(1))
+            journal.write(frame(2))
+        with open(self.path, 'r+b') as file:
+            file.truncate(os.path.getsize(self.path) - 3)
+        self.assertEqual([frame(1)], [f for _, f in read_journal(self.path)])
+
+    def test_append(self):
+        with Journal(self.path) as journal:
+            journal.write(frame(1))
+        with Journal(self.path) as journal:
+            journal.write(frame(2))
+        self.assertEqual([self.path], [os.path.join(self.directory.name, n) for n in os.listdir(self.directory.name)])
+        self.assertEqual([frame(1), frame(2)], [f for _, f in read_journal(self.path)])
+        with Journal(self.path, compress=True) as journal:  # 压缩的日志不能续写，旧文件被轮转
+            journal.write(frame(3))
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        self.assertEqual([frame(1), frame(2), frame(3)], [f for _, f in read_journal(self.path)])
+
+    def test_rotate(self):
+        size = len(frame(0)) + 12
+        with Journal(self.path, max_bytes=size * 3, backups=2) as journal:
+            for i in range(10):
+                journal.write(frame(i))
+        self.assertEqual(
+            ['pushes.journal', 'pushes.journal.1', 'pushes.journal.2'],
+            sorted(os.listdir(self.directory.name))
+        )
+        frames = [f for _, f in read_journal(self.path)]
+        self.assertEqual([frame(i) for i in range(3, 10)], frames)  # 每个文件 3 条，最旧的文件被删除
+
+
+class ReplayTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'pushes.journal')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def test_record_from_mirai_api(self):
+        async with FakeMiraiServer() as server:
+            api = MiraiApi(server.bot_id, server.verify_key, server.url)
+            api.journal = Journal(self.path, compress=True)
+            await api.connect()
+            for i in range(3):
+                await server.push(make_group_message(f'message {i}', message_id=i))
+            for i in range(3):
+                await api.recv()
+            await api.close()
+            api.journal.close()
+        records = list(read_journal(self.path))
+        self.assertEqual(3, len(records))
+        self.assertEqual('message 2', json.loads(records[2][1])['data']['messageChain'][1]['text'])
+        self.assertAlmostEqual(time.time(), records[0][0], delta=10)
+
+    async def test_journal_write_failure(self):
+        async with FakeMiraiServer() as server:
+            api = MiraiApi(server.bot_id, server.verify_key, server.url)
+            api.journal = Journal(self.path)
+            api.journal.close()  # 之后写入会抛出 ValueError
+            await api.connect()
+            with self.assertLogs('lightq', 'ERROR') as logs:
+                await server.push(make_group_message('message 0', message_id=0))
+                await asyncio.wait_for(api.recv(), 10)
+            self.assertIn('journaling is disabled', logs.output[0])
+            self.assertIsNone(api.journal)
+            await server.push(make_group_message('message 1', message_id=1))
+            message = await asyncio.wait_for(api.recv(), 10)
+            self.assertEqual('message 1', str(message.message_chain[1:]))
+            await api.close()
+
+    async def test_replay(self):
+        with Journal(self.path) as journal:
+            for i in range(5):
+                journal.write(frame(i), timestamp=i * 0.05)
+        received = []
+
+        @message_handler(GroupMessage)
+        def handler(chain: MessageChain) -> str:
+            received.append(str(chain[1:]))
+            return 'reply'
+
+        api = ReplayApi(self.path)
+        bot = Bot.from_api(api)
+        bot.add(handler)
+        start = time.perf_counter()
+        await bot.run()
+        elapsed = time.perf_counter() - start
+        while bot.background_task_count > 0:
+            await asyncio.sleep(0.01)
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertEqual([f'message {i}' for i in range(5)], received)
+        self.assertEqual(5, api.replayed)
+        self.assertEqual({'sendGroupMessage': 5}, api.command_counts)
+
+    async def test_replay_without_waiting(self):
+        with Journal(self.path) as journal:
+            for i in range(3):
+                journal.write(frame(i), timestamp=i * 100.0)
+        api = ReplayApi(self.path, speed=None)
+        frames = [api_frame async for api_frame in aiter_frames(api)]
+        self.assertEqual([frame(i) for i in range(3)], frames)
+        await api.close()
+        with self.assertRaises(ConnectionAbortedError):
+            await api.recv_frame()
+
+
+async def aiter_frames(api: ReplayApi):
+    while True:
+        try:
+            yield await asyncio.wait_for(api.recv_frame(), 1)
+        except ConnectionAbortedError:
+            return
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import asyncio
+import unittest
+
+from lightq import Bot, message_handler
+from lightq.entities import GroupMessage, MessageChain
+from lightq.metrics import MetricsRegistry, BotMetrics
+from lightq.testing import FakeMiraiServer, make_group_message
+
+
+class MetricsRegistryTest(unittest.TestCase):
+    def test_counter_and_gauge(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('requests_total', 'Requests.', ['path'])
+        counter.inc(path='/a')
+        counter.inc(2, path='/a')
+        counter.inc(path='/"b"')
+        self.assertEqual(3, counter.value(path='/a'))
+        self.assertEqual(0, counter.value(path='/c'))
+        with self.assertRaises(ValueError):
+            counter.inc(-1, path='/a')
+        with self.assertRaises(ValueError):
+            counter.inc()
+        gauge = registry.gauge('depth', 'Queue depth.', func=lambda: 7)
+        self.assertEqual(7, gauge.value())
+        self.assertEqual(
+            '# HELP requests_total Requests.\n'
+            '# TYPE requests_total counter\n'
+            'requests_total{path="/a"} 3\n'
+            'requests_total{path="/\\"b\\""} 1\n'
+            '# HELP depth Queue depth.\n'
+            '# TYPE depth gauge\n'
+            'depth 7\n',
+            registry.expose()
+        )
+
+    def test_histogram(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram('latency_seconds', 'Latency.', buckets=[0.1, 1])
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        self.assertEqual(4, histogram.count())
+        self.assertAlmostEqual(3.65, histogram.sum())
+        self.assertEqual(
+            '# HELP latency_seconds Latency.\n'
+            '# TYPE latency_seconds histogram\n'
+            'latency_seconds_bucket{le="0.1"} 2\n'
+            'latency_seconds_bucket{le="1"} 3\n'
+            'latency_seconds_bucket{le="+Inf"} 4\n'
+            'latency_seconds_sum 3.65\n'
+            'latency_seconds_count 4\n',
+            registry.expose()
+        )
+
+    def test_duplicate_name(self):
+        registry = MetricsRegistry()
+        registry.counter('x', '')
+        with self.assertRaises(ValueError):
+            registry.gauge('x', '')
+
+
+class BotMetricsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_bot(self):
+        @message_handler(GroupMessage, filters=lambda context: False)
+        def rejected():
+            pass
+
+        @message_handler(GroupMessage)
+        def echo(chain: MessageChain) -> MessageChain:
+            return chain[1:]
+
+        replied = asyncio.Event()
+        async with FakeMiraiServer() as server:
+            server.add_listener(lambda command, sub_command, content: replied.set())
+            bot = Bot(server.bot_id, server.verify_key, server.url)
+            bot.metrics = BotMetrics()
+            bot.add_all([rejected, echo])
+            bot.add_order(rejected, echo)
+            task = asyncio.create_task(bot.run())
+            while server.connections == 0:
+                await asyncio.sleep(0.01)
+            await server.push(make_group_message('ping'))
+            await asyncio.wait_for(replied.wait(), 5)
+            while bot.background_task_count > 0:
+                await asyncio.sleep(0.01)
+
+            metrics = bot.metrics
+            self.assertEqual(1, metrics.received.value(type='GroupMessage'))
+            self.assertEqual(1, metrics.route_seconds.count(kind='message'))
+            self.assertEqual(1, metrics.filter_rejects.value(handler=rejected.name))
+            self.assertEqual(1, metrics.handler_seconds.count(handler=echo.name))
+            self.assertEqual(1, metrics.command_seconds.count(command='sendGroupMessage'))
+            self.assertEqual(0, metrics.pending_responses.value())
+            self.assertEqual(0, metrics.queued_pushes.value())
+
+            exporter = await metrics.serve(port=0)
+            port = exporter.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            response = (await reader.read()).decode()
+            writer.close()
+            exporter.close()
+            await exporter.wait_closed()
+            self.assertTrue(response.startswith('HTTP/1.1 200 OK'))
+            self.assertIn('lightq_received_total{type="GroupMessage"} 1', response)
+            task.cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import pstats
+import tempfile
+import time
+import unittest
+
+from lightq import Bot, RecvContext, message_handler
+from lightq.batch import OfflineApi
+from lightq.entities import FriendMessage, Friend, MessageChain
+from lightq.profiling import HandlerProfiler
+
+
+class HandlerProfilerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.bot = Bot(0, '')
+        self.context = RecvContext(self.bot, FriendMessage(Friend(0, '', ''), MessageChain()))
+
+    async def test_wall_and_blocking_time(self):
+        @message_handler(FriendMessage)
+        async def handler():
+            await asyncio.sleep(0.1)
+            time.sleep(0.05)
+
+        self.bot.profiler = HandlerProfiler(slow_threshold=10)
+        await handler.handle(self.context)
+        stats = self.bot.profiler.stats[(handler.name, 'handle')]
+        self.assertEqual(1, stats.calls)
+        self.assertGreaterEqual(stats.wall_time, 0.15)
+        self.assertGreaterEqual(stats.blocking_time, 0.05)
+        self.assertLess(stats.blocking_time, 0.1)
+        self.assertEqual(0, stats.slow_calls)
+
+    async def test_can_handle(self):
+        @message_handler(FriendMessage, filters=lambda context: False)
+        def handler():
+            pass
+
+        self.bot.profiler = HandlerProfiler()
+        self.assertFalse(await handler.can_handle(self.context))
+        self.assertEqual(1, self.bot.profiler.stats[(handler.name, 'can_handle')].calls)
+
+    async def test_slow_handler(self):
+        def blocking_function():
+            time.sleep(0.02)
+
+        @message_handler(FriendMessage)
+        def handler():
+            blocking_function()
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.bot.profiler = HandlerProfiler(slow_threshold=0.01, sample_rate=1, profile_dir=directory)
+            with self.assertLogs('lightq', 'WARNING') as logs:
+                await handler.handle(self.context)
+            self.assertIn(f'slow handle of {handler.name}', logs.output[0])
+            self.assertIn('context type: FriendMessage', logs.output[0])
+            self.assertEqual(1, self.bot.profiler.stats[(handler.name, 'handle')].slow_calls)
+            [filename] = os.listdir(directory)
+            functions = [func for _, _, func in pstats.Stats(os.path.join(directory, filename)).stats]
+            self.assertIn('blocking_function', functions)
+
+    async def test_exception(self):
+        @message_handler(FriendMessage)
+        async def handler():
+            await asyncio.sleep(0)
+            raise ValueError
+
+        self.bot.profiler = HandlerProfiler()
+        with self.assertRaises(ValueError):
+            await handler.handle(self.context)
+        self.assertEqual(1, self.bot.profiler.stats[(handler.name, 'handle')].calls)
+        self.assertIn(handler.name, self.bot.profiler.report())
+
+    async def test_nested_sampling(self):
+        def slow_filter(context: RecvContext) -> bool:
+            time.sleep(0.02)
+            return True
+
+        @message_handler(FriendMessage, filters=slow_filter)
+        def handler():
+            pass
+
+        bot = Bot.from_api(OfflineApi())
+        bot.add(handler)
+        bot.build()
+        context = RecvContext(bot, FriendMessage(Friend(0, '', ''), MessageChain()))
+        with tempfile.TemporaryDirectory() as directory:
+            # route 中调用 can_handle，两者都被采样时只剖析外层的 route
+            bot.profiler = HandlerProfiler(slow_threshold=0.01, sample_rate=1, profile_dir=directory)
+            with self.assertLogs('lightq', 'WARNING'):
+                self.assertIs(handler, await bot.route(context))
+            self.assertEqual(1, bot.profiler.stats[(handler.name, 'can_handle')].slow_calls)
+            [filename] = os.listdir(directory)
+            self.assertIn('.route.', filename)
+            functions = [func for _, _, func in pstats.Stats(os.path.join(directory, filename)).stats]
+            self.assertIn('slow_filter', functions)
+
+
+if __name__ == '__main__':
+    unittest.main()
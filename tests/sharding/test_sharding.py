@@ -0,0 +1,156 @@
+import asyncio
+import os
+import time
+import unittest
+
+from lightq import Bot, RecvContext, message_handler, resolvers
+from lightq.api import MiraiApi
+from lightq.entities import GroupMessage
+from lightq.sharding import ShardedRunner
+from lightq.testing import FakeMiraiServer, make_group_message
+
+
+@message_handler(GroupMessage)
+def reply(context: RecvContext) -> str:
+    return f'{resolvers.group_id(context)} {os.getpid()}'
+
+
+@message_handler(GroupMessage, filters=lambda context: resolvers.group_id(context) == 2)
+def crash():
+    os._exit(1)
+
+
+stalled = False
+
+
+@message_handler(GroupMessage, filters=lambda context: resolvers.group_id(context) == 2)
+def stall():
+    # 第一条群 2 的推送阻塞工作进程的事件循环，使它不再读取主进程转发的推送
+    global stalled
+    if not stalled:
+        stalled = True
+        time.sleep(3)
+
+
+def setup(bot: Bot):
+    bot.add(reply)
+
+
+def setup_stalling(bot: Bot):
+    bot.add(stall)
+    bot.add(reply)
+
+
+def setup_crashing(bot: Bot):
+    bot.add(crash)
+    bot.add(reply)
+
+
+def setup_failing(bot: Bot):
+    raise ValueError('setup failed')
+
+
+class ShardedRunnerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_replies_through_owner(self):
+        async with FakeMiraiServer() as server:
+            replies: list[tuple[int, str]] = []
+            received = asyncio.Event()
+
+            def listener(command, sub_command, content):
+                if command == 'sendGroupMessage':
+                    replies.append((content['target'], content['messageChain'][0]['text']))
+                    received.set()
+
+            server.add_listener(listener)
+            api = MiraiApi(server.bot_id, server.verify_key, server.url)
+            runner = ShardedRunner(api, setup, workers=2)
+            await asyncio.wait_for(runner.start(), 60)
+            task = asyncio.create_task(runner.run())
+            for group_id in (1, 2, 1, 2):
+                await server.push(make_group_message('hello', group_id=group_id))
+            while len(replies) < 4:
+                received.clear()
+                await asyncio.wait_for(received.wait(), 10)
+            self.assertEqual([2, 2], runner.forwarded)
+            task.cancel()
+            await runner.close()
+        pids: dict[int, set[str]] = {}
+        for target, text in replies:
+            group_id, pid = text.split()
+            self.assertEqual(target, int(group_id))
+            pids.setdefault(target, set()).add(pid)
+        self.assertEqual(1, len(pids[1]))
+        self.assertEqual(1, len(pids[2]))
+        self.assertNotEqual(pids[1], pids[2])
+
+    async def test_worker_fails_to_start(self):
+        async with FakeMiraiServer() as server:
+            api = MiraiApi(server.bot_id, server.verify_key, server.url)
+            runner = ShardedRunner(api, setup_failing, workers=2)
+            with self.assertRaisesRegex(RuntimeError, 'before connecting'):
+                await asyncio.wait_for(runner.start(), 60)
+
+    async def test_drop_pushes_of_dead_shard(self):
+        async with FakeMiraiServer() as server:
+            replies: list[int] = []
+            received = asyncio.Event()
+
+            def listener(command, sub_command, content):
+                if command == 'sendGroupMessage':
+                    replies.append(content['target'])
+                    received.set()
+
+            server.add_listener(listener)
+            api = MiraiApi(server.bot_id, server.verify_key, server.url)
+            runner = ShardedRunner(api, setup_crashing, workers=2)
+            await asyncio.wait_for(runner.start(), 60)
+            task = asyncio.create_task(runner.run())
+            # 群 2 的推送使分片 0 的工作进程退出，之后转发到分片 0 的推送被丢弃
+            with self.assertLogs('lightq', 'ERROR'):
+                for _ in range(100):
+                    await server.push(make_group_message('hello', group_id=2))
+                    await asyncio.sleep(0.1)
+                    if runner.dropped[0] > 0:
+                        break
+            self.assertGreater(runner.dropped[0], 0)
+            await server.push(make_group_message('hello', group_id=1))
+            await asyncio.wait_for(received.wait(), 10)
+            self.assertEqual([1], replies)
+            self.assertFalse(task.done())
+            task.cancel()
+            await runner.close()
+
+    async def test_stalled_shard_does_not_block_others(self):
+        async with FakeMiraiServer() as server:
+            replies: list[int] = []
+            received = asyncio.Event()
+
+            def listener(command, sub_command, content):
+                if command == 'sendGroupMessage':
+                    replies.append(content['target'])
+                    received.set()
+
+            server.add_listener(listener)
+            api = MiraiApi(server.bot_id, server.verify_key, server.url)
+            runner = ShardedRunner(api, setup_stalling, workers=2, queue_size=4)
+            await asyncio.wait_for(runner.start(), 60)
+            task = asyncio.create_task(runner.run())
+            # 分片 0 的工作进程停止读取后，发给它的大量推送填满套接字缓冲区和转发队列
+            with self.assertLogs('lightq', 'WARNING'):
+                await server.push(make_group_message('stall', group_id=2))
+                text = 'x' * 64 * 1024
+                for _ in range(300):
+                    await server.push(make_group_message(text, group_id=2))
+                    if runner.dropped[0] > 0:
+                        break
+                await server.push(make_group_message('hello', group_id=1))
+                await asyncio.wait_for(received.wait(), 2)
+            self.assertEqual([1], replies)
+            self.assertGreater(runner.dropped[0], 0)
+            self.assertEqual(1, runner.forwarded[1])
+            task.cancel()
+            await runner.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lightq import Bot, RecvContext, message_handler
+from lightq.entities import FriendMessage, GroupMessage
+from lightq.state import StateStore, Session
+from lightq.testing import make_group_message
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class StateStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch('lightq.state.time.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_set_pop(self):
+        store = StateStore(ttl=10)
+        store.set('a', 1)
+        self.assertEqual(1, store.get('a'))
+        self.assertIn('a', store)
+        self.assertEqual(1, store.pop('a'))
+        self.assertIsNone(store.pop('a'))
+        self.assertEqual('default', store.get('a', 'default'))
+
+    def test_expire(self):
+        store = StateStore(ttl=10, slots=8)
+        store.set('a', 1)
+        store.set('b', 2, ttl=100)  # 超过时间轮一圈
+        self.clock.now += 5
+        self.assertTrue(store.touch('a'))
+        self.clock.now += 9
+        self.assertEqual(1, store.get('a'))
+        self.clock.now += 2
+        self.assertEqual(1, store.expire())
+        self.assertEqual(1, len(store))
+        self.clock.now += 100
+        self.assertEqual(0, len(store))
+
+    def test_expire_without_access(self):
+        store = StateStore(ttl=10)
+        for i in range(100):
+            store.set(i, i)
+        self.clock.now += 11
+        store.set('other', 0)  # 访问存储时删除所有过期的状态
+        self.assertEqual(1, len(store))
+
+    def test_max_size(self):
+        store = StateStore(max_size=2)
+        store.set('a', 1)
+        store.set('b', 2)
+        store.set('a', 3)
+        store.set('c', 4)
+        self.assertNotIn('b', store)
+        self.assertEqual(3, store.get('a'))
+        self.assertEqual(4, store.get('c'))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state.db')
+            store = StateStore(ttl=10, path=path)
+            store.set((1, 2), {'command': '/weather'})
+            store.set('short', 1, ttl=1)
+            store.set('removed', 1)
+            store.pop('removed')
+            store.close()
+            self.clock.now += 5
+            store = StateStore(ttl=10, path=path)
+            self.assertEqual({'command': '/weather'}, store.get((1, 2)))
+            self.assertEqual(1, len(store))
+            self.clock.now += 6
+            self.assertIsNone(store.get((1, 2)))
+            store.close()
+            store = StateStore(path=path)
+            self.assertEqual(0, len(store))
+            store.close()
+
+
+class SessionTest(unittest.IsolatedAsyncioTestCase):
+    async def test_inject_session(self):
+        @message_handler(GroupMessage)
+        def handler(session: Session, store: StateStore) -> str:
+            count = session.get(0) + 1
+            session.set(count)
+            return f'{count} {len(store)}'
+
+        bot = Bot(0, '')
+        bot.state = StateStore()
+        group_context = RecvContext(bot, GroupMessage.from_json(make_group_message('hi')))
+        self.assertEqual('1 1', str(await handler.handle(group_context)))
+        self.assertEqual('2 1', str(await handler.handle(group_context)))
+        self.assertEqual(2, bot.state.get((10000, 20000)))
+
+        @message_handler(FriendMessage)
+        def friend_handler(session: Session):
+            return str(session.key)
+
+        friend_context = RecvContext(bot, FriendMessage.from_json({
+            'type': 'FriendMessage',
+            'sender': {'id': 123, 'nickname': '', 'remark': ''},
+            'messageChain': []
+        }))
+        self.assertEqual('(0, 123)', str(await friend_handler.handle(friend_context)))
+
+    async def test_state_not_set(self):
+        @message_handler(GroupMessage)
+        def handler(session: Session): pass
+
+        context = RecvContext(Bot(0, ''), GroupMessage.from_json(make_group_message('hi')))
+        with self.assertRaises(RuntimeError):
+            await handler.handle(context)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from lightq import Bot, message_handler, resolve, resolvers
+from lightq.entities import GroupMessage
+from lightq.testing import FakeMiraiServer, make_group_message
+from lightq.tracing import Tracer, InMemorySpanExporter, FileSpanExporter, NoOpTracer, get_current_span
+
+
+class TracerTest(unittest.IsolatedAsyncioTestCase):
+    async def test_parent_and_exception(self):
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+        with tracer.start_as_current_span('parent') as parent:
+            async def child():
+                with tracer.start_as_current_span('child', attributes={'key': 1}):
+                    raise ValueError('boom')
+
+            with self.assertRaises(ValueError):
+                await asyncio.create_task(child())
+            self.assertIs(parent, get_current_span())
+        self.assertIsNone(get_current_span())
+        child_span, parent_span = exporter.spans
+        self.assertEqual(parent_span.trace_id, child_span.trace_id)
+        self.assertEqual(parent_span.span_id, child_span.parent_id)
+        self.assertEqual('ERROR', child_span.status)
+        self.assertEqual('exception', child_span.events[0]['name'])
+        self.assertIsNone(parent_span.parent_id)
+
+    def test_file_exporter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'spans.jsonl')
+            tracer = Tracer(FileSpanExporter(path))
+            with tracer.start_as_current_span('a', None, attributes={'x': 'y'}, start_time=1):
+                pass
+            tracer.shutdown()
+            with open(path, encoding='utf-8') as file:
+                [line] = file.readlines()
+            span = json.loads(line)
+            self.assertEqual('a', span['name'])
+            self.assertEqual({'x': 'y'}, span['attributes'])
+            self.assertEqual(1, span['start_time_unix_nano'])
+            self.assertEqual(32, len(span['trace_id']))
+
+    def test_no_op(self):
+        with NoOpTracer().start_as_current_span('a') as span:
+            span.set_attribute('x', 1)
+            self.assertFalse(span.is_recording())
+
+
+class BotTracingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_bot(self):
+        @resolve(resolvers.group_id)
+        @message_handler(GroupMessage, filters=lambda context: True)
+        async def handler(group_id: int, bot: Bot) -> str:
+            await bot.api.bot_list()
+            return str(group_id)
+
+        exporter = InMemorySpanExporter()
+        replied = asyncio.Event()
+        async with FakeMiraiServer() as server:
+            server.add_listener(lambda command, sub_command, content:
+                                replied.set() if command == 'sendGroupMessage' else None)
+            bot = Bot(server.bot_id, server.verify_key, server.url)
+            bot.tracer = Tracer(exporter)
+            bot.add(handler)
+            task = asyncio.create_task(bot.run())
+            while server.connections == 0:
+                await asyncio.sleep(0.01)
+            await server.push(make_group_message('hello'))
+            await asyncio.wait_for(replied.wait(), 5)
+            while bot.background_task_count > 0:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        spans = {span.name if span.name != 'lightq.command' else span.attributes['lightq.command']: span
+                 for span in exporter.spans}
+        receive = spans['lightq.receive']
+        self.assertIsNone(receive.parent_id)
+        self.assertEqual('GroupMessage', receive.attributes['lightq.type'])
+        self.assertTrue(all(span.trace_id == receive.trace_id for span in exporter.spans))
+        parents = {name: span.parent_id for name, span in spans.items()}
+        self.assertEqual(receive.span_id, parents['lightq.route'])
+        self.assertEqual(spans['lightq.route'].span_id, parents['lightq.filter'])
+        self.assertEqual(receive.span_id, parents['lightq.handle'])
+        self.assertEqual(spans['lightq.handle'].span_id, parents['lightq.resolve'])
+        self.assertEqual(spans['lightq.handle'].span_id, parents['botList'])
+        self.assertEqual(receive.span_id, parents['sendGroupMessage'])
+        self.assertIn('lightq.sync_id', spans['sendGroupMessage'].attributes)
+        self.assertEqual(handler.name, spans['lightq.route'].attributes['lightq.handler'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import time
+import unittest
+
+from lightq import Bot, RecvContext, message_handler
+from lightq.entities import FriendMessage, Friend, MessageChain
+from lightq.watchdog import LoopWatchdog
+
+
+class LoopWatchdogTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.bot = Bot(0, '')
+        self.context = RecvContext(self.bot, FriendMessage(Friend(0, '', ''), MessageChain()))
+
+    async def test_attribute_to_handler(self):
+        def blocking_call():
+            time.sleep(0.3)
+
+        @message_handler(FriendMessage)
+        def handler():
+            blocking_call()
+
+        self.bot.add(handler)
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+        watchdog.start(self.bot)
+        await asyncio.sleep(0.05)
+        with self.assertLogs('lightq', 'WARNING') as logs:
+            await handler.handle(self.context)
+            await asyncio.sleep(0.05)
+        await watchdog.stop()
+        self.assertEqual(1, len(watchdog.stalls))
+        stall = watchdog.stalls[0]
+        self.assertIs(handler, stall.handler)
+        self.assertEqual('handler', stall.role)
+        self.assertIn('blocking_call', stall.stack)
+        self.assertIn('event loop blocked', logs.output[0])
+        self.assertGreaterEqual(watchdog.max_lag, 0.2)
+
+    async def test_attribute_to_filter(self):
+        def slow_filter(context: RecvContext) -> bool:
+            time.sleep(0.3)
+            return True
+
+        @message_handler(FriendMessage, filters=slow_filter)
+        def handler():
+            pass
+
+        self.bot.add(handler)
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+        watchdog.start(self.bot)
+        with self.assertLogs('lightq', 'WARNING'):
+            await handler.can_handle(self.context)
+        await watchdog.stop()
+        self.assertEqual((handler, 'filter'), (watchdog.stalls[0].handler, watchdog.stalls[0].role))
+
+    async def test_no_stall(self):
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+        watchdog.start()
+        await asyncio.sleep(0.2)
+        await watchdog.stop()
+        self.assertFalse(watchdog.running)
+        self.assertEqual([], watchdog.stalls)
+
+
+if __name__ == '__main__':
+    unittest.main()